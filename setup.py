@@ -61,6 +61,10 @@ setup(
         "orjson==3.10.3",
         "numpy==2.1.3",
     ],
+    extras_require={
+        # the analytic engine, see zvt.contract.analytic
+        "analytic": ["duckdb>=1.1.0", "pyarrow>=17.0.0"],
+    },
     project_urls={  # Optional
         "Bug Reports": "https://github.com/zvtvz/zvt/issues",
         "Funding": "https://www.foolcage.com/zvt",
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import importlib
+import importlib.resources
 import json
 import logging
 import os
@@ -9,19 +10,19 @@ import shutil
 from logging.handlers import RotatingFileHandler
 from typing import List
 
+from importlib.metadata import version, PackageNotFoundError
+
 import pandas as pd
-import pkg_resources
-from pkg_resources import get_distribution, DistributionNotFound
 
 from zvt.consts import DATA_SAMPLE_ZIP_PATH, ZVT_TEST_HOME, ZVT_HOME, ZVT_TEST_DATA_PATH, ZVT_TEST_ZIP_DATA_PATH
 
 try:
     dist_name = __name__
-    __version__ = get_distribution(dist_name).version
-except DistributionNotFound:
+    __version__ = version(dist_name)
+except PackageNotFoundError:
     __version__ = "unknown"
 finally:
-    del get_distribution, DistributionNotFound
+    del version, PackageNotFoundError
 
 logger = logging.getLogger(__name__)
 
@@ -70,7 +71,7 @@ pd.set_option("display.max_columns", None)
 zvt_env = {}
 
 # load default config
-with open(pkg_resources.resource_filename("zvt", "config.json")) as f:
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")) as f:
     zvt_config = json.load(f)
 
 _plugins = {}
@@ -124,7 +125,7 @@ def init_env(zvt_home: str, **kwargs) -> dict:
 
 def init_resources(resource_path, force_overwrite=True):
     package_name = "zvt"
-    package_dir = pkg_resources.resource_filename(package_name, "resources")
+    package_dir = str(importlib.resources.files(package_name).joinpath("resources"))
     from zvt.utils.file_utils import list_all_files
 
     files: List[str] = list_all_files(package_dir, ext=None)
@@ -151,7 +152,7 @@ def init_config(pkg_name: str = None, current_config: dict = None, **kwargs) ->
     config_path = os.path.join(zvt_env["zvt_home"], config_file)
     if not os.path.exists(config_path):
         try:
-            sample_config = pkg_resources.resource_filename(pkg_name, "config.json")
+            sample_config = str(importlib.resources.files(pkg_name).joinpath("config.json"))
             if os.path.exists(sample_config):
                 shutil.copyfile(sample_config, config_path)
         except Exception as e:
@@ -230,10 +231,8 @@ else:
 
 old_db_to_provider_dir(zvt_env["data_path"])
 
-# register to meta
+# register to meta, the recorders and factors are imported on first use, see zvt.contract.registry_manifest
 import zvt.contract as zvt_contract
-import zvt.recorders as zvt_recorders
-import zvt.factors as zvt_factors
 
 import platform
 
@@ -140,6 +140,7 @@ def composite_all(data_schema, column, timestamp, provider=None, entity_ids=None
         columns=["entity_id", "timestamp", column],
         filters=filters,
         index="entity_id",
+        engine="analytic",
     )
     entity_type, exchange, _ = decode_entity_id(df["entity_id"].iloc[0])
     pie_df = pd.DataFrame(columns=df.index, data=[df[column].tolist()])
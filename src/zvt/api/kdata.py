@@ -4,11 +4,13 @@ from typing import Union
 
 import numpy as np
 import pandas as pd
+from sqlalchemy import Column
+from sqlalchemy.sql import visitors
 
 from zvt.contract import IntervalLevel, AdjustType, Mixin
 from zvt.contract.api import decode_entity_id, get_schema_by_name
-from zvt.domain import Index1dKdata, Indexus1dKdata, Indexhk1dKdata
-from zvt.utils.pd_utils import pd_is_not_null
+from zvt.domain import Index1dKdata, Indexus1dKdata, Indexhk1dKdata, AdjustFactor
+from zvt.utils.pd_utils import pd_is_not_null, index_df
 from zvt.utils.time_utils import (
     to_date_time_str,
     TIME_FORMAT_DAY,
@@ -119,7 +121,17 @@ def get_kdata(
     index="timestamp",
     drop_index_col=False,
     adjust_type: AdjustType = None,
+    adjust_on_read: bool = None,
 ):
+    """
+    get kdata of the entities
+
+    :param adjust_type: qfq, hfq or bfq, None means qfq
+    :param adjust_on_read: True for reading the bfq kdata and computing qfq/hfq with :class:`AdjustFactor`,
+        False for reading the recorded qfq/hfq kdata, None means reading on the fly if the factors of all the
+        entities are recorded by the provider. Only return_type df is adjusted on read, the columns, filters and order
+        are applied to the bfq kdata
+    """
     assert not entity_id or not entity_ids
     if entity_ids:
         entity_id = entity_ids[0]
@@ -127,6 +139,56 @@ def get_kdata(
         entity_ids = [entity_id]
 
     entity_type, exchange, code = decode_entity_id(entity_id)
+
+    if not adjust_type:
+        adjust_type = AdjustType.qfq
+    adjust_type = AdjustType(adjust_type)
+
+    factor_df = None
+    if adjust_on_read is not False and adjust_type != AdjustType.bfq and return_type == "df":
+        bfq_schema = get_kdata_schema(entity_type, level=level, adjust_type=AdjustType.bfq)
+        if bfq_schema is not None:
+            if not provider:
+                provider = bfq_schema.providers[0]
+            if provider in AdjustFactor.providers:
+                factor_df = get_adjust_factors(entity_ids=entity_ids, provider=provider)
+        if adjust_on_read:
+            _check_adjust_factors(entity_ids, factor_df)
+        elif not pd_is_not_null(factor_df) or not set(entity_ids).issubset(factor_df["entity_id"]):
+            factor_df = None
+
+    if factor_df is not None:
+        data_schema: Mixin = get_kdata_schema(entity_type, level=level, adjust_type=AdjustType.bfq)
+        # the clauses of the caller may be built with the qfq/hfq schema
+        from_schema = get_kdata_schema(entity_type, level=level, adjust_type=adjust_type)
+        if columns:
+            columns = [_to_schema_clause(col, from_schema, data_schema) for col in columns]
+            columns = columns + [col for col in ("entity_id", "timestamp") if col not in columns]
+        if filters:
+            filters = [_to_schema_clause(f, from_schema, data_schema) for f in filters]
+        if order is not None:
+            order = _to_schema_clause(order, from_schema, data_schema)
+        df = data_schema.query_data(
+            entity_ids=entity_ids,
+            level=level,
+            provider=provider,
+            columns=columns,
+            return_type=return_type,
+            start_timestamp=start_timestamp,
+            end_timestamp=end_timestamp,
+            filters=filters,
+            session=session,
+            order=order,
+            limit=limit,
+        )
+        if not pd_is_not_null(df):
+            return df
+
+        df = adjust_kdata(kdata_df=df, factor_df=factor_df, adjust_type=adjust_type)
+        if index:
+            df = index_df(df, index=index, drop=drop_index_col)
+        return df
+
     data_schema: Mixin = get_kdata_schema(entity_type, level=level, adjust_type=adjust_type)
 
     return data_schema.query_data(
@@ -146,6 +208,181 @@ def get_kdata(
     )
 
 
+def _to_schema_clause(clause, from_schema, to_schema):
+    if isinstance(clause, str) or from_schema is None:
+        return clause
+    if hasattr(clause, "__clause_element__"):
+        clause = clause.__clause_element__()
+    from_table, to_table = from_schema.__table__, to_schema.__table__
+
+    def replace(element):
+        if isinstance(element, Column) and element.table is from_table:
+            return to_table.c[element.name]
+        return None
+
+    return visitors.replacement_traverse(clause, {}, replace)
+
+
+def has_adjust_factors(entity_id: str, provider: str) -> bool:
+    """
+    whether the adjust factors of the entity are recorded, then qfq/hfq kdata could be computed on read
+
+    :param entity_id: entity id
+    :param provider: data provider
+    :return: True if recorded
+    """
+    if provider not in AdjustFactor.providers:
+        return False
+    return bool(AdjustFactor.query_data(provider=provider, entity_id=entity_id, limit=1, return_type="domain"))
+
+
+def get_adjust_factors(entity_ids=None, provider=None, end_timestamp=None) -> pd.DataFrame:
+    """
+    get the recorded adjust factors of the entities, ordered by timestamp
+    """
+    return AdjustFactor.query_data(
+        entity_ids=entity_ids,
+        provider=provider,
+        columns=["entity_id", "timestamp", "hfq_factor"],
+        end_timestamp=end_timestamp,
+        order=AdjustFactor.timestamp.asc(),
+    )
+
+
+def _check_adjust_factors(entity_ids, factor_df):
+    recorded = set(factor_df["entity_id"]) if pd_is_not_null(factor_df) else set()
+    missing = [entity_id for entity_id in entity_ids if entity_id not in recorded]
+    if missing:
+        raise ValueError(f"no adjust factors recorded for {missing}, record bfq kdata of them first")
+
+
+def adjust_kdata(
+    kdata_df: pd.DataFrame,
+    factor_df: pd.DataFrame,
+    adjust_type: Union[AdjustType, str] = AdjustType.qfq,
+    price_cols=("open", "close", "high", "low"),
+) -> pd.DataFrame:
+    """
+    compute qfq/hfq prices from bfq kdata and adjust factors
+
+    :param kdata_df: bfq kdata with entity_id and timestamp columns
+    :param factor_df: adjust factors with entity_id, timestamp and hfq_factor columns
+    :param adjust_type: qfq or hfq
+    :param price_cols: the price columns to adjust
+    :return: the adjusted kdata, in the order of kdata_df
+    :raises ValueError: if the factors of some entities are missing, the bfq prices are not returned as adjusted
+    """
+    adjust_type = AdjustType(adjust_type)
+    if adjust_type == AdjustType.bfq or not pd_is_not_null(kdata_df):
+        return kdata_df
+    _check_adjust_factors(kdata_df["entity_id"].unique().tolist(), factor_df)
+
+    factor_df = factor_df[["entity_id", "timestamp", "hfq_factor"]].sort_values("timestamp")
+    df = kdata_df.reset_index(drop=True)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["_order"] = np.arange(len(df))
+
+    df = pd.merge_asof(df.sort_values("timestamp"), factor_df, on="timestamp", by="entity_id", direction="backward")
+    df = df.sort_values("_order")
+
+    # kdata before the first recorded factor use the first factor
+    first_factor = factor_df.groupby("entity_id")["hfq_factor"].first()
+    factors = df["hfq_factor"].fillna(df["entity_id"].map(first_factor))
+
+    if adjust_type == AdjustType.qfq:
+        latest_factor = factor_df.groupby("entity_id")["hfq_factor"].last()
+        factors = factors / df["entity_id"].map(latest_factor)
+
+    for col in price_cols:
+        if col in df.columns:
+            df[col] = df[col] * factors.values
+
+    df = df.drop(columns=["_order", "hfq_factor"])
+    df.index = kdata_df.index
+    return df
+
+
+def to_adjust_factor_df(
+    bfq_df: pd.DataFrame, hfq_df: pd.DataFrame, latest_hfq_factor: float = None, price_tick=0.01
+) -> pd.DataFrame:
+    """
+    extract the adjust factor changes from bfq and hfq kdata of one entity
+
+    the factor is hfq close/bfq close, it changes only at the ex-dividend date.
+    the provider rounds the prices to price_tick, so only the changes beyond the rounding error are kept.
+
+    :param bfq_df: bfq kdata
+    :param hfq_df: hfq kdata of the same entity
+    :param latest_hfq_factor: the latest recorded factor before bfq_df
+    :param price_tick: the price precision of the provider
+    :return: adjust factors which could be saved to :class:`AdjustFactor`
+    """
+    if not pd_is_not_null(bfq_df) or not pd_is_not_null(hfq_df):
+        return None
+    df = pd.merge(
+        bfq_df[["entity_id", "timestamp", "code", "provider", "close"]],
+        hfq_df[["timestamp", "close"]],
+        on="timestamp",
+        suffixes=("", "_hfq"),
+    )
+    df = df[(df["close"] > 0) & (df["close_hfq"] > 0)].sort_values("timestamp").reset_index(drop=True)
+    if not pd_is_not_null(df):
+        return None
+
+    df["hfq_factor"] = df["close_hfq"] / df["close"]
+    error = (price_tick / 2) * (1 / df["close"] + 1 / df["close_hfq"])
+
+    pre_factor = df["hfq_factor"].shift(1)
+    pre_error = error.shift(1)
+    if latest_hfq_factor:
+        pre_factor.iloc[0] = latest_hfq_factor
+        pre_error.iloc[0] = error.iloc[0]
+
+    changed = pre_factor.isna() | ((df["hfq_factor"] - pre_factor).abs() / pre_factor > error + pre_error)
+    df = df[changed].copy()
+    if not pd_is_not_null(df):
+        return None
+
+    df["hfq_factor"] = df["hfq_factor"].round(6)
+    df["id"] = df[["entity_id", "timestamp"]].apply(
+        lambda se: generate_kdata_id(
+            entity_id=se["entity_id"], timestamp=se["timestamp"], level=IntervalLevel.LEVEL_1DAY
+        ),
+        axis=1,
+    )
+    return df[["id", "entity_id", "timestamp", "code", "provider", "hfq_factor"]]
+
+
+def has_adjust_change(bfq_df: pd.DataFrame, pre_close: float = None, price_tick=0.01) -> bool:
+    """
+    whether the bfq kdata of one entity has the ex-dividend date, so the adjust factor changes.
+
+    change_pct of the provider is computed with the ex-dividend pre close, so it differs from the change of
+    bfq close beyond the rounding error only at the ex-dividend date.
+
+    :param bfq_df: bfq kdata with close and change_pct columns
+    :param pre_close: the bfq close before bfq_df, the first kdata is not checked without it
+    :param price_tick: the price precision of the provider
+    :return: True if changed or could not be checked
+    """
+    if not pd_is_not_null(bfq_df):
+        return False
+    if "change_pct" not in bfq_df.columns:
+        return True
+    df = bfq_df.sort_values("timestamp")
+    close = df["close"]
+    pre = close.shift(1)
+    if pre_close:
+        pre.iloc[0] = pre_close
+    checked = (pre > 0) & (close > 0)
+    if df.loc[checked, "change_pct"].isna().any():
+        return True
+    # change_pct is rounded to 0.01%
+    error = 0.00005 + (price_tick / 2) / pre * (1 + close / pre)
+    changed = ((close / pre - 1) - df["change_pct"]).abs() > error
+    return bool(changed[checked].any())
+
+
 def default_adjust_type(entity_type: str) -> AdjustType:
     """
     :type entity_type: entity type, e.g stock, stockhk, stockus
@@ -237,6 +474,11 @@ __all__ = [
     "get_latest_kdata_date",
     "get_kdata_schema",
     "get_kdata",
+    "has_adjust_factors",
+    "get_adjust_factors",
+    "adjust_kdata",
+    "to_adjust_factor_df",
+    "has_adjust_change",
     "default_adjust_type",
     "generate_kdata_id",
     "to_high_level_kdata",
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+from typing import List, Type, Union, Dict
+
+import numpy as np
+import pandas as pd
+
+from zvt.contract import Mixin
+from zvt.utils.pd_utils import pd_is_not_null
+from zvt.utils.time_utils import to_pd_timestamp, date_time_by_interval
+
+#: the max days from the report date to publish by the rules, month of the report date -> days,
+#: it's used as the publish date if the report has no publish date yet(timestamp == report_date)
+REPORT_PUBLISH_LAG_DAYS = {3: 30, 6: 62, 9: 31, 12: 120}
+
+
+def get_publish_timestamp(df: pd.DataFrame, report_lag: Union[int, Dict[int, int]] = None) -> pd.Series:
+    """
+    the timestamp the data could be seen. It's timestamp for the data without report_date, e.g. StockValuation.
+    For the reports, it's the publish date recorded in timestamp, or report_date + lag if it's not recorded
+
+    :param df: df with columns timestamp and report_date(optional)
+    :param report_lag: days from report_date to publish, or month of report_date -> days,
+        default :data:`REPORT_PUBLISH_LAG_DAYS`
+    :return: the publish timestamp
+    """
+    timestamp = pd.to_datetime(df["timestamp"])
+    if "report_date" not in df.columns:
+        return timestamp
+
+    report_date = pd.to_datetime(df["report_date"])
+    if report_lag is None:
+        report_lag = REPORT_PUBLISH_LAG_DAYS
+    if isinstance(report_lag, dict):
+        lag_days = report_date.dt.month.map(report_lag).fillna(max(report_lag.values()))
+    else:
+        lag_days = pd.Series(report_lag, index=df.index)
+    lagged = report_date + pd.to_timedelta(lag_days, unit="D")
+
+    no_publish_date = timestamp.isna() | (timestamp <= report_date)
+    return timestamp.where(~no_publish_date, lagged)
+
+
+def get_pit_data(
+    data_schema: Type[Mixin],
+    columns: List[str],
+    entity_ids: List[str] = None,
+    start_timestamp: Union[str, pd.Timestamp] = None,
+    end_timestamp: Union[str, pd.Timestamp] = None,
+    provider: str = None,
+    report_lag: Union[int, Dict[int, int]] = None,
+    lookback_days: int = 500,
+) -> pd.DataFrame:
+    """
+    get the data ordered by the publish timestamp, the reports which are older than the published ones are dropped
+
+    :param data_schema: the schema, e.g. FinanceFactor, BalanceSheet, IncomeStatement or StockValuation
+    :param columns: column names
+    :param entity_ids: entity ids
+    :param start_timestamp: the data effective at start_timestamp is included
+    :param end_timestamp: the data published after end_timestamp is excluded
+    :param provider: data provider
+    :param report_lag: see :func:`get_publish_timestamp`
+    :param lookback_days: the data published before start_timestamp in the days is loaded
+    :return: df with columns entity_id, pit_timestamp and the columns, sorted by pit_timestamp
+    """
+    has_report_date = hasattr(data_schema, "report_date")
+    query_columns = ["entity_id", "timestamp"] + (["report_date"] if has_report_date else [])
+    query_columns = query_columns + [col for col in columns if col not in query_columns]
+
+    if start_timestamp:
+        start_timestamp = date_time_by_interval(to_pd_timestamp(start_timestamp), -lookback_days)
+    df = data_schema.query_data(
+        provider=provider,
+        entity_ids=entity_ids,
+        columns=query_columns,
+        start_timestamp=start_timestamp,
+        end_timestamp=end_timestamp,
+    )
+    if not pd_is_not_null(df):
+        return None
+
+    df["pit_timestamp"] = get_publish_timestamp(df, report_lag=report_lag)
+    if end_timestamp:
+        df = df[df["pit_timestamp"] <= to_pd_timestamp(end_timestamp)]
+
+    sort_by = ["pit_timestamp", "report_date"] if has_report_date else ["pit_timestamp"]
+    df = df.sort_values(sort_by, kind="stable")
+    if has_report_date:
+        # e.g. the annual report published after the q1 report should not replace it
+        latest_report = df.groupby("entity_id")["report_date"].cummax()
+        df = df[df["report_date"] >= latest_report]
+    return df.reset_index(drop=True)
+
+
+def pit_join(
+    panel_df: pd.DataFrame,
+    columns: List,
+    provider: str = None,
+    report_lag: Union[int, Dict[int, int]] = None,
+    include_publish_day: bool = False,
+    tolerance_days: int = None,
+) -> pd.DataFrame:
+    """
+    join the finance columns to the panel point in time, the value of the entity at the timestamp is the one of the
+    latest published data before it, so there is no look-ahead bias, e.g.
+
+    pit_join(kdata_df, columns=[FinanceFactor.roe, BalanceSheet.goodwill, StockValuation.pe_ttm])
+
+    :param panel_df: normal df with index (entity_id, timestamp), e.g. kdata
+    :param columns: the columns of the schemas
+    :param provider: data provider
+    :param report_lag: see :func:`get_publish_timestamp`
+    :param include_publish_day: whether the data could be used in the publish day,
+        default not as the reports are usually published after the close
+    :param tolerance_days: the data is effective in the days after published, None means no limit
+    :return: panel_df with the columns, the column is renamed to {table}_{column} if the name is duplicated
+    """
+    if not pd_is_not_null(panel_df):
+        return panel_df
+
+    schema_columns: Dict[Type[Mixin], List[str]] = {}
+    for col in columns:
+        schema_columns.setdefault(col.class_, []).append(col.name)
+
+    entity_ids = panel_df.index.get_level_values(0).unique().tolist()
+    timestamps = panel_df.index.get_level_values(1)
+
+    left = pd.DataFrame(
+        {
+            "entity_id": np.asarray(panel_df.index.get_level_values(0), dtype=object),
+            "timestamp": pd.to_datetime(timestamps),
+            "_row": np.arange(len(panel_df)),
+        }
+    ).sort_values("timestamp", kind="stable")
+
+    result_df = panel_df.copy()
+    for data_schema, names in schema_columns.items():
+        pit_df = get_pit_data(
+            data_schema,
+            columns=names,
+            entity_ids=entity_ids,
+            start_timestamp=timestamps.min(),
+            end_timestamp=timestamps.max(),
+            provider=provider,
+            report_lag=report_lag,
+        )
+        if not pd_is_not_null(pit_df):
+            for name in names:
+                result_df[_col_name(result_df, data_schema, name)] = np.nan
+            continue
+
+        right = pit_df[["entity_id", "pit_timestamp"] + names].rename(columns={"pit_timestamp": "timestamp"})
+        right["entity_id"] = right["entity_id"].astype(object)
+        merged = pd.merge_asof(
+            left,
+            right,
+            on="timestamp",
+            by="entity_id",
+            direction="backward",
+            allow_exact_matches=include_publish_day,
+            tolerance=pd.Timedelta(days=tolerance_days) if tolerance_days is not None else None,
+        ).sort_values("_row")
+        for name in names:
+            result_df[_col_name(result_df, data_schema, name)] = merged[name].to_numpy()
+    return result_df
+
+
+def _col_name(df: pd.DataFrame, data_schema: Type[Mixin], name: str) -> str:
+    if name in df.columns:
+        return f"{data_schema.__tablename__}_{name}"
+    return name
+
+
+# the __all__ is generated
+__all__ = ["get_publish_timestamp", "get_pit_data", "pit_join"]
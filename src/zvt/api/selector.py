@@ -317,6 +317,7 @@ def get_entity_list_by_cap(
         provider=provider,
         filters=[kdata_schema.timestamp == to_pd_timestamp(timestamp)],
         index="entity_id",
+        engine="analytic",
     )
     if pd_is_not_null(df):
         df["cap"] = df["turnover"] / df["turnover_rate"]
@@ -8,8 +8,12 @@ from xtquant import xtdata
 from zvt.api.kdata import get_recent_trade_dates
 from zvt.api.selector import get_entity_ids_by_filter
 from zvt.contract import IntervalLevel, AdjustType
-from zvt.contract.api import decode_entity_id, df_to_db, get_db_session
+from zvt.contract.api import decode_entity_id, df_to_db, drop_db_partitions, migrate_to_partitions
+from zvt.contract.data_bus import data_bus
+from zvt.contract.data_event import publish_data_event
+from zvt.contract.tick_journal import TickJournalWriter
 from zvt.domain import StockQuote, Stock, Stock1dKdata, StockQuoteLog, Stock1mQuote
+from zvt.trading.quote_store import quote_store
 from zvt.utils.pd_utils import pd_is_not_null
 from zvt.utils.time_utils import (
     to_date_time_str,
@@ -195,7 +199,7 @@ def get_kdata(
     return df
 
 
-def tick_to_quote(entity_df):
+def tick_to_quote(entity_df, tick_journal: TickJournalWriter = None):
     # def calculate_limit_up_amount(row):
     #     if row["is_limit_up"]:
     #         return row["price"] * row["bidVol"][0] * 100
@@ -298,12 +302,12 @@ def tick_to_quote(entity_df):
             lambda se: "{}_{}".format(se["entity_id"], to_date_time_str(se["timestamp"])), axis=1
         )
         df_to_db(df, data_schema=StockQuote, provider="qmt", force_update=True, drop_duplicates=False)
+        # 同进程的查询直接读内存快照
+        quote_store.update(entity_type="stock", quote_df=df)
 
         # 历史记录
-        # df["id"] = df[["entity_id", "timestamp"]].apply(
-        #     lambda se: "{}_{}".format(se["entity_id"], to_date_time_str(se["timestamp"], TIME_FORMAT_MINUTE2)), axis=1
-        # )
-        # df_to_db(df, data_schema=StockQuoteLog, provider="qmt", force_update=False, drop_duplicates=False)
+        if tick_journal:
+            tick_journal.write(df)
 
         # 1分钟分时
         df["id"] = df[["entity_id", "timestamp"]].apply(
@@ -330,22 +334,21 @@ def tick_to_quote(entity_df):
 
 
 def clear_history_quote(target_date=current_date()):
-    session = get_db_session("qmt", data_schema=StockQuote)
-    session.query(StockQuote).filter(StockQuote.timestamp < target_date).delete()
-    session.commit()
+    drop_db_partitions("qmt", data_schema=StockQuote, before_timestamp=target_date)
+    # the quotes kept in memory are reloaded, the event without df notifies the other processes
+    quote_store.clear(entity_type="stock")
+    publish_data_event(StockQuote, provider="qmt")
     logger.info(f"clear stock quote data before: {target_date}")
 
 
 def clear_history_1m_quote(target_date=current_date()):
-    session = get_db_session("qmt", data_schema=StockQuote)
     dates = get_recent_trade_dates(entity_type="stock", target_date=target_date, days_count=5)
     if dates:
         start_date = dates[0]
     else:
         start_date = date_time_by_interval(target_date, -5)
 
-    session.query(Stock1mQuote).filter(Stock1mQuote.timestamp < start_date).delete()
-    session.commit()
+    drop_db_partitions("qmt", data_schema=Stock1mQuote, before_timestamp=start_date)
     logger.info(f"clear stock 1m data before: {start_date}")
 
 
@@ -356,14 +359,23 @@ def clear_history_quote_log(target_date):
     else:
         start_date = date_time_by_interval(target_date, -2)
 
-    session = get_db_session("qmt", data_schema=StockQuoteLog)
-    session.query(StockQuoteLog).filter(StockQuoteLog.timestamp < start_date).delete()
-    session.commit()
+    drop_db_partitions("qmt", data_schema=StockQuoteLog, before_timestamp=start_date)
     logger.info(f"clear stock quote log data before: {target_date}")
 
 
-def record_stock_quote(subscribe=False):
+def migrate_quote_partitions():
+    # the quotes recorded before the dbs are partitioned by day
+    migrate_to_partitions(StockQuote, provider="qmt")
+    migrate_to_partitions(Stock1mQuote, provider="qmt", legacy_db_name="stock_quote")
+    migrate_to_partitions(StockQuoteLog, provider="qmt")
+
+
+def record_stock_quote(subscribe=False, record_tick=True, serve_data_bus=False):
+    migrate_quote_partitions()
     clear_history_quote(target_date=current_date())
+    if serve_data_bus:
+        # the quotes written by df_to_db are pushed to the processes connected
+        data_bus.serve()
     qmt_stocks = get_qmt_stocks()
     entity_list = _build_entity_list(qmt_stocks=qmt_stocks)
     entity_df = entity_list[
@@ -379,7 +391,8 @@ def record_stock_quote(subscribe=False):
         ]
     ]
     entity_df = entity_df.set_index("entity_id", drop=False)
-    on_data_func = tick_to_quote(entity_df=entity_df)
+    tick_journal = TickJournalWriter() if record_tick else None
+    on_data_func = tick_to_quote(entity_df=entity_df, tick_journal=tick_journal)
 
     if subscribe:
         logger.info(f"subscribe tick for {len(qmt_stocks)} stocks")
@@ -398,6 +411,8 @@ def record_stock_quote(subscribe=False):
                 logger.info(f"record tick finished at: {current_timestamp}")
                 break
         xtdata.unsubscribe_quote(sid)
+        if tick_journal:
+            tick_journal.close()
     else:
         import time
 
@@ -426,6 +441,8 @@ def record_stock_quote(subscribe=False):
                 logger.info(f"record tick finished at: {current_timestamp}")
                 # clear_history_quote_log(target_date=current_date())
                 clear_history_1m_quote(target_date=current_date())
+                if tick_journal:
+                    tick_journal.close()
                 break
 
 
@@ -445,4 +462,5 @@ __all__ = [
     "get_kdata",
     "tick_to_quote",
     "clear_history_quote",
+    "migrate_quote_partitions",
 ]
@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import threading
+from typing import Dict, Tuple, Type
+
+import pandas as pd
+from sqlalchemy.dialects import sqlite
+
+from zvt import zvt_env
+from zvt.contract.schema import Mixin
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+_db = None
+#: why the analytic engine could not be used, None if it's not checked or ok
+_unavailable_reason = None
+_local = threading.local()
+_lock = threading.Lock()
+#: the attached sqlite dbs
+_attached = set()
+
+
+def _init_db() -> bool:
+    global _db, _unavailable_reason
+    with _lock:
+        if _db is not None:
+            return True
+        if _unavailable_reason is not None:
+            return False
+        if duckdb is None:
+            _unavailable_reason = "duckdb is not installed"
+        elif pyarrow is None:
+            _unavailable_reason = "pyarrow is not installed"
+        else:
+            try:
+                db = duckdb.connect(":memory:")
+                try:
+                    db.execute("LOAD sqlite;")
+                except Exception:
+                    # the extension is downloaded only if it's not installed yet
+                    db.execute("INSTALL sqlite;")
+                    db.execute("LOAD sqlite;")
+                _db = db
+                return True
+            except Exception as e:
+                _unavailable_reason = f"the sqlite extension of duckdb could not be loaded: {e}"
+        logger.warning(f"{_unavailable_reason}, fall back to sqlite for the analytic queries")
+        return False
+
+
+def is_analytic_available() -> bool:
+    """
+    whether the analytic engine could be used, it needs ``pip install zvt[analytic]`` and the sqlite extension
+    of duckdb, which is downloaded at the first time
+    """
+    return _init_db()
+
+
+def get_analytic_connection():
+    """
+    get the duckdb connection of current thread, all the connections share one in-memory duckdb database
+
+    :return: duckdb connection
+    """
+    assert is_analytic_available(), f"the analytic engine is not available: {_unavailable_reason}"
+    con = getattr(_local, "con", None)
+    if con is None:
+        con = _db.cursor()
+        _local.con = con
+    return con
+
+
+def get_parquet_path(data_schema: Type[Mixin], provider: str, data_path: str = zvt_env["data_path"]) -> str:
+    return os.path.join(data_path, provider, "parquet", "{}.parquet".format(data_schema.__tablename__))
+
+
+def _get_db_file(data_schema: Type[Mixin], provider: str) -> str:
+    from zvt.contract.api import get_db_engine
+
+    return get_db_engine(provider=provider, data_schema=data_schema).url.database
+
+
+def _get_mtime(file_path: str) -> int:
+    if os.path.exists(file_path):
+        return os.stat(file_path).st_mtime_ns
+    return 0
+
+
+def export_parquet(data_schema: Type[Mixin], provider: str = None, data_path: str = zvt_env["data_path"]) -> str:
+    """
+    export the table to parquet, the analytic engine would read the parquet instead of sqlite until the db changes
+
+    :param data_schema: data schema
+    :param provider: data provider
+    :param data_path: data path
+    :return: the parquet path
+    """
+    if not provider:
+        provider = data_schema.providers[0]
+    parquet_path = get_parquet_path(data_schema, provider=provider, data_path=data_path)
+    os.makedirs(os.path.dirname(parquet_path), exist_ok=True)
+
+    relation = _get_sqlite_relation(data_schema, provider)
+    get_analytic_connection().execute(
+        "COPY (SELECT * FROM {}) TO '{}' (FORMAT PARQUET, COMPRESSION ZSTD)".format(relation, parquet_path)
+    )
+    return parquet_path
+
+
+def _get_sqlite_relation(data_schema: Type[Mixin], provider: str) -> str:
+    from zvt.contract.api import _get_db_name
+
+    alias = "{}_{}".format(provider, _get_db_name(data_schema))
+    con = get_analytic_connection()
+    with _lock:
+        if alias not in _attached:
+            con.execute(
+                "ATTACH IF NOT EXISTS '{}' AS \"{}\" (TYPE SQLITE, READ_ONLY)".format(
+                    _get_db_file(data_schema, provider), alias
+                )
+            )
+            _attached.add(alias)
+    return '"{}".main."{}"'.format(alias, data_schema.__tablename__)
+
+
+def get_analytic_relation(data_schema: Type[Mixin], provider: str = None) -> str:
+    """
+    get the relation name of the table in the analytic engine,
+    the fresh parquet export is preferred, otherwise the sqlite db is attached
+
+    :param data_schema: data schema
+    :param provider: data provider
+    :return: qualified relation name used in sql
+    """
+    from zvt.contract.api import is_partitioned_db, _get_db_name
+
+    if not provider:
+        provider = data_schema.providers[0]
+    assert not is_partitioned_db(_get_db_name(data_schema)), "partitioned db is not supported by the analytic engine"
+
+    parquet_path = get_parquet_path(data_schema, provider=provider)
+    parquet_mtime = _get_mtime(parquet_path)
+    if parquet_mtime:
+        db_file = _get_db_file(data_schema, provider)
+        if parquet_mtime >= max(_get_mtime(db_file), _get_mtime(db_file + "-wal")):
+            return "read_parquet('{}')".format(parquet_path)
+    return _get_sqlite_relation(data_schema, provider)
+
+
+def _to_df(result, time_field: str = None) -> pd.DataFrame:
+    df = result.arrow().to_pandas(types_mapper=pd.ArrowDtype)
+    # keep the time column compatible with the time utils
+    if time_field and time_field in df.columns:
+        df[time_field] = df[time_field].astype("datetime64[ns]")
+    return df
+
+
+def query_analytic(sql: str, schemas: Dict[str, Tuple[Type[Mixin], str]], time_field: str = None) -> pd.DataFrame:
+    """
+    run the sql in the analytic engine, it's good at cross-sectional filters, group-bys and window functions,
+    e.g.
+
+    query_analytic(
+        "select entity_id, avg(turnover) as turnover from {kdata} group by entity_id",
+        schemas={"kdata": (Stock1dKdata, "em")},
+    )
+
+    :param sql: sql with the placeholders of the tables
+    :param schemas: placeholder -> (data schema, provider)
+    :param time_field: the time column which would be converted to datetime64
+    :return: arrow backed df
+    """
+    relations = {
+        name: get_analytic_relation(data_schema, provider) for name, (data_schema, provider) in schemas.items()
+    }
+    return _to_df(get_analytic_connection().execute(sql.format(**relations)), time_field=time_field)
+
+
+def read_sql_analytic(statement, data_schema: Type[Mixin], provider: str, time_field: str = "timestamp"):
+    """
+    run the sqlalchemy statement on the table of the data schema in the analytic engine
+
+    :param statement: sqlalchemy statement
+    :param data_schema: data schema
+    :param provider: data provider
+    :param time_field: the time column which would be converted to datetime64
+    :return: arrow backed df
+    """
+    sql = str(statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+    # the table name in the statement is shadowed by the cte of the relation
+    relation = get_analytic_relation(data_schema, provider)
+    sql = 'WITH "{}" AS (SELECT * FROM {}) {}'.format(data_schema.__tablename__, relation, sql)
+    return _to_df(get_analytic_connection().execute(sql), time_field=time_field)
+
+
+# the __all__ is generated
+__all__ = [
+    "is_analytic_available",
+    "get_analytic_connection",
+    "get_parquet_path",
+    "export_parquet",
+    "get_analytic_relation",
+    "query_analytic",
+    "read_sql_analytic",
+]
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+import functools
 import json
 import logging
 import os
@@ -6,23 +7,43 @@ import platform
 from typing import List, Union, Type
 
 import pandas as pd
-from sqlalchemy import create_engine
-from sqlalchemy import func, exists, and_
+from sqlalchemy import create_engine, event, MetaData, Index
+from sqlalchemy import func, exists, and_, inspect, select
 from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import DeclarativeMeta
 from sqlalchemy.orm import Query
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import sessionmaker, scoped_session, Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.ddl import CreateTable
 from sqlalchemy.sql.expression import text
 
 from zvt import zvt_env
 from zvt.contract import IntervalLevel
-from zvt.contract import zvt_context
+from zvt.contract import zvt_context, registry_manifest
+from zvt.contract.analytic import is_analytic_available, read_sql_analytic
+from zvt.contract.data_event import publish_data_event
 from zvt.contract.schema import Mixin, TradableEntity
-from zvt.utils.pd_utils import pd_is_not_null, index_df
-from zvt.utils.time_utils import to_pd_timestamp
+from zvt.utils.pd_utils import pd_is_not_null, index_df, compact_df
+from zvt.utils.time_utils import to_pd_timestamp, to_date_time_str, current_date, TIME_FORMAT_DAY1
 
 logger = logging.getLogger(__name__)
 
+#: use WAL mode for all the dbs, so the readers and the writer don't block each other
+SQLITE_WAL = True
+
+#: pragmas set on every sqlite connection
+SQLITE_PRAGMAS = {
+    # wait for the lock instead of raising "database is locked" at once
+    "busy_timeout": 30000,
+    # 256M memory mapped io
+    "mmap_size": 268435456,
+    # 64M page cache
+    "cache_size": -65536,
+}
+
+#: connection pool size of every sqlite engine, the overflow connections are not limited
+SQLITE_POOL_SIZE = 8
+
 
 def _get_db_name(data_schema: DeclarativeMeta) -> str:
     """
@@ -36,8 +57,217 @@ def _get_db_name(data_schema: DeclarativeMeta) -> str:
             return db_name
 
 
+def is_partitioned_db(db_name: str) -> bool:
+    """
+    whether the db is stored in one file per trading day
+
+    :param db_name: db name
+    :return: True if partitioned
+    """
+    return db_name in zvt_context.partitioned_dbnames
+
+
+def to_db_partition(timestamp) -> str:
+    """
+    get the partition name of the timestamp
+
+    :param timestamp: timestamp
+    :return: partition name, e.g. 20240102
+    """
+    return to_date_time_str(timestamp, fmt=TIME_FORMAT_DAY1)
+
+
+def _get_partition_dir(provider: str, db_name: str, data_path: str) -> str:
+    return os.path.join(data_path, provider, "{}_{}".format(provider, db_name))
+
+
+def get_db_partitions(
+    provider: str,
+    db_name: str = None,
+    data_schema: object = None,
+    start_timestamp=None,
+    end_timestamp=None,
+    data_path: str = zvt_env["data_path"],
+) -> List[str]:
+    """
+    get existing partitions of the partitioned db in [start_timestamp, end_timestamp]
+
+    :param provider: data provider
+    :param db_name: db name
+    :param data_schema: data schema
+    :param start_timestamp: start timestamp
+    :param end_timestamp: end timestamp
+    :param data_path: data path
+    :return: partition names in ascending order
+    """
+    if data_schema:
+        db_name = _get_db_name(data_schema=data_schema)
+
+    partition_dir = _get_partition_dir(provider, db_name, data_path)
+    if not os.path.exists(partition_dir):
+        return []
+
+    prefix = "{}_{}_".format(provider, db_name)
+    partitions = sorted(
+        [
+            file_name[len(prefix) : -len(".db")]
+            for file_name in os.listdir(partition_dir)
+            if file_name.startswith(prefix) and file_name.endswith(".db")
+        ]
+    )
+    if start_timestamp:
+        partitions = [partition for partition in partitions if partition >= to_db_partition(start_timestamp)]
+    if end_timestamp:
+        partitions = [partition for partition in partitions if partition <= to_db_partition(end_timestamp)]
+    return partitions
+
+
+def _get_default_partition(provider: str, db_name: str, data_path: str = zvt_env["data_path"]) -> str:
+    # the latest partition, or today if no partition yet
+    partitions = get_db_partitions(provider=provider, db_name=db_name, data_path=data_path)
+    if partitions:
+        return partitions[-1]
+    return to_db_partition(current_date())
+
+
+def drop_db_partitions(
+    provider: str,
+    db_name: str = None,
+    data_schema: object = None,
+    before_timestamp=None,
+    data_path: str = zvt_env["data_path"],
+) -> List[str]:
+    """
+    drop the partitions before the timestamp, it's the retention way for partitioned db,
+    which is much cheaper than deleting rows
+
+    :param provider: data provider
+    :param db_name: db name
+    :param data_schema: data schema
+    :param before_timestamp: partitions before it would be dropped
+    :param data_path: data path
+    :return: dropped partitions
+    """
+    if data_schema:
+        db_name = _get_db_name(data_schema=data_schema)
+
+    assert is_partitioned_db(db_name)
+
+    before_partition = to_db_partition(before_timestamp)
+    partition_dir = _get_partition_dir(provider, db_name, data_path)
+
+    dropped = []
+    for partition in get_db_partitions(provider=provider, db_name=db_name, data_path=data_path):
+        if partition >= before_partition:
+            continue
+        key = "{}_{}_{}".format(provider, db_name, partition)
+        for the_key in (key, _to_read_only_key(key)):
+            session = zvt_context.sessions.pop(the_key, None)
+            if session:
+                session.remove()
+            zvt_context.db_session_map.pop(the_key, None)
+            engine = zvt_context.db_engine_map.pop(the_key, None)
+            if engine:
+                engine.dispose()
+
+        db_file = os.path.join(partition_dir, "{}.db".format(key))
+        for file_path in (db_file, db_file + "-wal", db_file + "-shm"):
+            if os.path.exists(file_path):
+                os.remove(file_path)
+        dropped.append(partition)
+    return dropped
+
+
+def migrate_to_partitions(
+    data_schema: Type[Mixin], provider: str, legacy_db_name: str = None, chunk_size: int = 100000
+) -> int:
+    """
+    move the rows of the table from the db stored before partitioning to the partitions,
+    the table is dropped from the old db after moving, e.g.
+
+    migrate_to_partitions(Stock1mQuote, provider="qmt", legacy_db_name="stock_quote")
+
+    :param data_schema: data schema of the partitioned db
+    :param provider: data provider
+    :param legacy_db_name: the db name of the table before partitioning, default is the current one
+    :param chunk_size: rows moved in one batch
+    :return: moved rows count
+    """
+    db_name = _get_db_name(data_schema=data_schema)
+    assert is_partitioned_db(db_name)
+    if not legacy_db_name:
+        legacy_db_name = db_name
+
+    legacy_file = os.path.join(zvt_env["data_path"], provider, "{}_{}.db".format(provider, legacy_db_name))
+    if not os.path.exists(legacy_file):
+        return 0
+
+    table = data_schema.__table__
+    engine = _create_sqlite_engine(legacy_file)
+    try:
+        inspector = inspect(engine)
+        if not inspector.has_table(table.name):
+            return 0
+        legacy_columns = [col["name"] for col in inspector.get_columns(table.name)]
+        query = select(*[table.c[col] for col in legacy_columns if col in table.c])
+        count = 0
+        for df in pd.read_sql(query, engine, chunksize=chunk_size):
+            count = count + df_to_db(df=df, data_schema=data_schema, provider=provider, force_update=True)
+        with engine.begin() as con:
+            con.execute(text('DROP TABLE IF EXISTS "{}"'.format(table.name)))
+        logger.info(f"migrated {count} rows of {table.name} from {legacy_file} to the partitions")
+        return count
+    finally:
+        engine.dispose()
+
+
+def _to_read_only_key(key: str) -> str:
+    return "{}_ro".format(key)
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute("PRAGMA {}={};".format(name, value))
+    # journal mode is persistent in the db file, safe to use NORMAL synchronous in WAL mode
+    journal_mode = cursor.execute("PRAGMA journal_mode;").fetchone()[0]
+    if journal_mode == "wal":
+        cursor.execute("PRAGMA synchronous=NORMAL;")
+    cursor.close()
+
+
+def _set_sqlite_query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA query_only=1;")
+    cursor.close()
+
+
+def _create_sqlite_engine(db_file: str, read_only: bool = False) -> Engine:
+    if read_only:
+        url = "sqlite:///file:{}?mode=ro&uri=true".format(db_file)
+    else:
+        url = "sqlite:///{}".format(db_file)
+    engine = create_engine(
+        url,
+        echo=False,
+        json_serializer=lambda obj: json.dumps(obj, ensure_ascii=False),
+        connect_args={"check_same_thread": False, "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000},
+        pool_size=SQLITE_POOL_SIZE,
+        max_overflow=-1,
+    )
+    event.listen(engine, "connect", _set_sqlite_pragmas)
+    if read_only:
+        event.listen(engine, "connect", _set_sqlite_query_only)
+    return engine
+
+
 def get_db_engine(
-    provider: str, db_name: str = None, data_schema: object = None, data_path: str = zvt_env["data_path"]
+    provider: str,
+    db_name: str = None,
+    data_schema: object = None,
+    data_path: str = zvt_env["data_path"],
+    partition: str = None,
+    read_only: bool = False,
 ) -> Engine:
     """
     get db engine from (provider,db_name) or (provider,data_schema)
@@ -46,27 +276,127 @@ def get_db_engine(
     :param db_name: db name
     :param data_schema: data schema
     :param data_path: data path
+    :param partition: partition name for partitioned db, default is the latest one
+    :param read_only: True for the read only engine which is used by query paths
     :return: db engine
     """
     if data_schema:
         db_name = _get_db_name(data_schema=data_schema)
 
-    provider_path = os.path.join(data_path, provider)
-    if not os.path.exists(provider_path):
-        os.makedirs(provider_path)
-    db_path = os.path.join(provider_path, "{}_{}.db?check_same_thread=False".format(provider, db_name))
+    if is_partitioned_db(db_name):
+        if not partition:
+            partition = _get_default_partition(provider, db_name, data_path)
+        db_dir = _get_partition_dir(provider, db_name, data_path)
+        engine_key = "{}_{}_{}".format(provider, db_name, partition)
+    else:
+        partition = None
+        db_dir = os.path.join(data_path, provider)
+        engine_key = "{}_{}".format(provider, db_name)
+
+    if read_only:
+        db_engine = zvt_context.db_engine_map.get(_to_read_only_key(engine_key))
+        if not db_engine:
+            # make sure the db and tables created by the writable engine
+            get_db_engine(provider=provider, db_name=db_name, data_path=data_path, partition=partition)
+            db_engine = _create_sqlite_engine(os.path.join(db_dir, "{}.db".format(engine_key)), read_only=True)
+            zvt_context.db_engine_map[_to_read_only_key(engine_key)] = db_engine
+        return db_engine
+
+    if not os.path.exists(db_dir):
+        os.makedirs(db_dir)
 
-    engine_key = "{}_{}".format(provider, db_name)
     db_engine = zvt_context.db_engine_map.get(engine_key)
     if not db_engine:
-        db_engine = create_engine(
-            "sqlite:///" + db_path, echo=False, json_serializer=lambda obj: json.dumps(obj, ensure_ascii=False)
-        )
+        db_engine = _create_sqlite_engine(os.path.join(db_dir, "{}.db".format(engine_key)))
+        if db_name in zvt_context.dbname_map_base:
+            init_db_schema(db_engine, db_name=db_name, wal=SQLITE_WAL or bool(partition))
+        else:
+            # the schemas are registered lazily, init it in register_schema
+            zvt_context.dbname_map_pending_engines.setdefault(db_name, []).append((db_engine, partition))
         zvt_context.db_engine_map[engine_key] = db_engine
     return db_engine
 
 
+def init_pending_db_engines(db_name: str):
+    """
+    init the db schema of the engines created before the schemas of the db registered,
+    it's called by :func:`~zvt.contract.register.register_schema`
+
+    :param db_name: db name
+    """
+    for db_engine, partition in zvt_context.dbname_map_pending_engines.pop(db_name, []):
+        init_db_schema(db_engine, db_name=db_name, wal=SQLITE_WAL or bool(partition))
+
+
+#: db names which use WAL mode even if :data:`SQLITE_WAL` is False
+_wal_dbnames = ("zvt_info", "stock_news", "stock_tags", "stock_quote")
+
+
+def init_db_schema(engine: Engine, db_name: str, wal: bool = False):
+    """
+    create the tables, add the new columns and create the common indices of the db,
+    it's called when the engine of the db is created at first
+
+    :param engine: db engine
+    :param db_name: db name
+    :param wal: use WAL mode
+    """
+    schema_base = zvt_context.dbname_map_base[db_name]
+    schema_base.metadata.create_all(bind=engine)
+
+    db_meta = MetaData()
+    db_meta.reflect(bind=engine)
+    with engine.connect() as con:
+        if wal or db_name in _wal_dbnames:
+            con.execute(text("PRAGMA journal_mode=WAL;"))
+            # truncate the WAL file to 64M after checkpoint for saving space
+            con.execute(text("PRAGMA journal_size_limit=67108864;"))
+        else:
+            con.execute(text("PRAGMA journal_mode=DELETE;"))
+
+        for table_name, table in iter(schema_base.metadata.tables.items()):
+            index_list = [row[1] for row in con.execute(text("PRAGMA INDEX_LIST('{}')".format(table_name)))]
+            try:
+                # Using migration tool like Alembic is too complex
+                # So we just support add new column, for others just change the db manually
+                existing_columns = [c.name for c in db_meta.tables[table_name].columns]
+                added_columns = [c for c in table.columns if c.name not in existing_columns]
+                if added_columns:
+                    ddl_c = engine.dialect.ddl_compiler(engine.dialect, CreateTable(table))
+                    for added_column in added_columns:
+                        stmt = text(
+                            f"ALTER TABLE {table_name} ADD COLUMN {ddl_c.get_column_specification(added_column)}"
+                        )
+                        logger.info(f"{engine.url} migrations:\n {stmt}")
+                        con.execute(stmt)
+
+                logger.debug("engine:{},table:{},index:{}".format(engine, table_name, index_list))
+
+                # create index for 'timestamp','entity_id','code','report_period','updated_timestamp
+                for col in [
+                    "timestamp",
+                    "entity_id",
+                    "code",
+                    "report_period",
+                    "created_timestamp",
+                    "updated_timestamp",
+                ]:
+                    if col in table.c:
+                        index_name = "{}_{}_index".format(table_name, col)
+                        if index_name not in index_list:
+                            Index(index_name, table.c[col]).create(con)
+                for cols in [("timestamp", "entity_id"), ("timestamp", "code")]:
+                    if (cols[0] in table.c) and (cols[1] in table.c):
+                        index_name = "{}_{}_{}_index".format(table_name, cols[0], cols[1])
+                        if index_name not in index_list:
+                            Index(index_name, table.c[cols[0]], table.c[cols[1]]).create(con)
+            except Exception as e:
+                logger.error(e)
+        con.commit()
+
+
 def get_providers() -> List[str]:
+    registry_manifest.load_schemas()
     return zvt_context.providers
 
 
@@ -77,6 +407,7 @@ def get_schemas(provider: str) -> List[DeclarativeMeta]:
     :param provider: data provider
     :return: schemas provided by the provider
     """
+    registry_manifest.load_schemas()
     schemas = []
     for provider1, dbs in zvt_context.provider_map_dbnames.items():
         if provider == provider1:
@@ -87,49 +418,141 @@ def get_schemas(provider: str) -> List[DeclarativeMeta]:
     return schemas
 
 
-def get_db_session(provider: str, db_name: str = None, data_schema: object = None, force_new: bool = False) -> Session:
+def get_db_session(
+    provider: str,
+    db_name: str = None,
+    data_schema: object = None,
+    force_new: bool = False,
+    partition: str = None,
+    read_only: bool = False,
+) -> Session:
     """
-    get db session from (provider,db_name) or (provider,data_schema)
+    get db session from (provider,db_name) or (provider,data_schema),
+    the session is thread local, so it's safe to use it in multiple threads
 
     :param provider: data provider
     :param db_name: db name
     :param data_schema: data schema
-    :param force_new: True for new session, otherwise use global session
+    :param force_new: True for new session, otherwise use the thread local session
+    :param partition: partition name for partitioned db, default is the latest one
+    :param read_only: True for the session bound to the read only engine
     :return: db session
     """
     if data_schema:
         db_name = _get_db_name(data_schema=data_schema)
 
-    session_key = "{}_{}".format(provider, db_name)
+    session_key, partition = _get_session_key(provider, db_name, partition=partition, read_only=read_only)
 
     if force_new:
-        return get_db_session_factory(provider, db_name, data_schema)()
+        return get_db_session_factory(provider, db_name, data_schema, partition=partition, read_only=read_only)()
+
+    sessions = zvt_context.sessions.get(session_key)
+    if not sessions:
+        sessions = scoped_session(
+            get_db_session_factory(provider, db_name, data_schema, partition=partition, read_only=read_only)
+        )
+        sessions = zvt_context.sessions.setdefault(session_key, sessions)
+    return sessions()
+
+
+def _get_session_key(provider: str, db_name: str, partition: str = None, read_only: bool = False):
+    if is_partitioned_db(db_name):
+        if not partition:
+            partition = _get_default_partition(provider, db_name)
+        session_key = "{}_{}_{}".format(provider, db_name, partition)
+    else:
+        partition = None
+        session_key = "{}_{}".format(provider, db_name)
+    if read_only:
+        session_key = _to_read_only_key(session_key)
+    return session_key, partition
 
-    session = zvt_context.sessions.get(session_key)
-    # FIXME: should not maintain global session
-    if not session:
-        session = get_db_session_factory(provider, db_name, data_schema)()
-        zvt_context.sessions[session_key] = session
-    return session
 
+def _has_uncommitted_writes(provider: str, db_name: str, partition: str = None) -> bool:
+    # the writes not committed by the writable session of current thread are invisible to the read only engine
+    session_key, _ = _get_session_key(provider, db_name, partition=partition)
+    sessions = zvt_context.sessions.get(session_key)
+    if not sessions or not sessions.registry.has():
+        return False
+    return _session_has_writes(sessions())
 
-def get_db_session_factory(provider: str, db_name: str = None, data_schema: object = None):
+
+def _session_has_writes(session: Session) -> bool:
+    return bool(session.new or session.dirty or session.deleted or session.info.get("flushed"))
+
+
+def _get_query_session(provider: str, db_name: str, partition: str = None, return_type: str = "df") -> Session:
+    """
+    the df and dict are loaded by the read only session unless current thread has the writes not committed,
+    the domain objects may be modified and committed by the caller, so they're loaded by the writable session
+    """
+    read_only = return_type in ("df", "dict") and not _has_uncommitted_writes(provider, db_name, partition=partition)
+    return get_db_session(provider=provider, db_name=db_name, partition=partition, read_only=read_only)
+
+
+def remove_db_sessions():
+    """
+    close and remove the thread local sessions of current thread, call it when the thread finishes its job
+    """
+    for sessions in list(zvt_context.sessions.values()):
+        sessions.remove()
+
+
+def release_db_sessions(func):
+    """
+    decorator removing the thread local sessions of current thread after the func,
+    e.g. for the jobs run in the reused pool threads
+
+    :param func: the func run in the pool thread
+    :return: the wrapped func
+    """
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            remove_db_sessions()
+
+    return wrapper
+
+
+def _mark_flushed(session, flush_context):
+    session.info["flushed"] = True
+
+
+def _clear_flushed(session):
+    session.info.pop("flushed", None)
+
+
+def get_db_session_factory(
+    provider: str, db_name: str = None, data_schema: object = None, partition: str = None, read_only: bool = False
+):
     """
     get db session factory from (provider,db_name) or (provider,data_schema)
 
     :param provider: data provider
     :param db_name: db name
     :param data_schema: data schema
+    :param partition: partition name for partitioned db, default is the latest one
+    :param read_only: True for the session factory bound to the read only engine
     :return: db session factory
     """
     if data_schema:
         db_name = _get_db_name(data_schema=data_schema)
 
-    session_key = "{}_{}".format(provider, db_name)
+    session_key, partition = _get_session_key(provider, db_name, partition=partition, read_only=read_only)
+
     session = zvt_context.db_session_map.get(session_key)
     if not session:
-        session = sessionmaker()
-        zvt_context.db_session_map[session_key] = session
+        session = sessionmaker(info={"read_only": read_only})
+        session.configure(bind=get_db_engine(provider, db_name=db_name, partition=partition, read_only=read_only))
+        if not read_only:
+            # track the writes flushed but not committed, see :func:`_has_uncommitted_writes`
+            event.listen(session, "after_flush", _mark_flushed)
+            event.listen(session, "after_commit", _clear_flushed)
+            event.listen(session, "after_rollback", _clear_flushed)
+        session = zvt_context.db_session_map.setdefault(session_key, session)
     return session
 
 
@@ -143,6 +566,8 @@ def get_entity_schema(entity_type: str) -> Type[TradableEntity]:
     :param entity_type: entity type, e.g. stock, stockus.
     :return: the Schema of the entity
     """
+    if entity_type not in zvt_context.tradable_schema_map:
+        registry_manifest.load_entity_schema(entity_type)
     return zvt_context.tradable_schema_map[entity_type]
 
 
@@ -156,6 +581,9 @@ def get_schema_by_name(name: str) -> DeclarativeMeta:
     for schema in zvt_context.schemas:
         if schema.__name__ == name:
             return schema
+    # import the schema on first use
+    if registry_manifest.load_schema(name):
+        return get_schema_by_name(name)
 
 
 def get_schema_columns(schema: DeclarativeMeta) -> List[str]:
@@ -263,6 +691,139 @@ def _row2dict(row):
     return d
 
 
+def _can_use_analytic(data_schema: Type[Mixin]) -> bool:
+    # it logs why once if not available
+    if not is_analytic_available():
+        return False
+    # the partitions are queried one by one
+    return not is_partitioned_db(_get_db_name(data_schema))
+
+
+def _parse_order(order):
+    # (column name, ascending) of the order clause
+    modifier = getattr(order, "modifier", None)
+    column = order.element if modifier in (operators.asc_op, operators.desc_op) else order
+    name = getattr(column, "key", None) or getattr(column, "name", None)
+    if not isinstance(name, str):
+        raise ValueError(f"order {order} is not supported across the partitions")
+    return name, modifier is not operators.desc_op
+
+
+def _column_name(column) -> str:
+    return column if isinstance(column, str) else column.key
+
+
+def _distinct_key(item):
+    if isinstance(item, dict):
+        return tuple(item.values())
+    if hasattr(item, "_mapping"):
+        return tuple(item)
+    return item.id
+
+
+def _get_partitioned_data(
+    partitions: List[str],
+    db_name: str,
+    data_schema: Type[Mixin],
+    provider: str,
+    columns: List = None,
+    return_type: str = "df",
+    order=None,
+    limit: int = None,
+    distinct=None,
+    index: Union[str, list] = None,
+    drop_index_col=False,
+    time_field: str = "timestamp",
+    compact: Union[bool, dict] = False,
+    **kwargs,
+):
+    # the partitions are queried one by one and merged by the order
+    if order is None:
+        order_name, ascending = time_field, True
+    else:
+        order_name, ascending = _parse_order(order)
+    # the partitions are in time order, so the limit could stop early only if ordered by time
+    if order_name == time_field and not ascending:
+        partitions = partitions[::-1]
+    stop_early = order_name == time_field and not distinct
+
+    # the order column is needed for merging, the time column is always queried
+    extra_column = None
+    if columns:
+        columns = list(columns)
+        if (
+            return_type in ("df", "dict")
+            and order_name != time_field
+            and order_name not in [_column_name(col) for col in columns]
+        ):
+            extra_column = order_name
+            columns.append(extra_column)
+
+    results = []
+    for partition in partitions:
+        result = get_data(
+            data_schema=data_schema,
+            provider=provider,
+            columns=list(columns) if columns else None,
+            return_type=return_type,
+            session=_get_query_session(provider, db_name=db_name, partition=partition, return_type=return_type),
+            order=order,
+            limit=limit,
+            distinct=distinct,
+            time_field=time_field,
+            **kwargs,
+        )
+        if return_type == "df":
+            if pd_is_not_null(result):
+                results.append(result)
+            size = sum([len(df) for df in results])
+        else:
+            results += result
+            size = len(results)
+        if stop_early and limit and size >= limit:
+            break
+
+    if return_type == "df":
+        if not results:
+            return pd.DataFrame()
+        df = pd.concat(results, ignore_index=True)
+        df = df.sort_values(
+            order_name, ascending=ascending, kind="stable", na_position="first" if ascending else "last"
+        )
+        if extra_column:
+            df = df.drop(columns=[extra_column])
+        if distinct:
+            df = df.drop_duplicates()
+        df = df.reset_index(drop=True)
+        if limit:
+            df = df.iloc[:limit]
+        if index:
+            df = index_df(df, index=index, drop=drop_index_col, time_field=time_field)
+        if compact:
+            df = compact_df(df, **(compact if isinstance(compact, dict) else {}))
+        return df
+
+    def sort_key(item):
+        value = item[order_name] if isinstance(item, dict) else getattr(item, order_name)
+        # null first in ascending order as sqlite
+        return value is not None, value
+
+    results = sorted(results, key=sort_key, reverse=not ascending)
+    if extra_column:
+        for item in results:
+            item.pop(extra_column, None)
+    if distinct:
+        seen = set()
+        distinct_results = []
+        for item in results:
+            key = _distinct_key(item)
+            if key not in seen:
+                seen.add(key)
+                distinct_results.append(item)
+        results = distinct_results
+    return results[:limit] if limit else results
+
+
 def get_data(
     data_schema: Type[Mixin],
     ids: List[str] = None,
@@ -285,6 +846,8 @@ def get_data(
     index: Union[str, list] = None,
     drop_index_col=False,
     time_field: str = "timestamp",
+    engine: str = None,
+    compact: Union[bool, dict] = False,
 ):
     """
     query data by the arguments
@@ -309,6 +872,10 @@ def get_data(
     :param index: index field name, str for single index, str list for multiple index
     :param drop_index_col: whether drop the col if it's in index, default False
     :param time_field:
+    :param engine: "analytic" for running the df query in the analytic engine,
+        see :mod:`~zvt.contract.analytic`, default is sqlite
+    :param compact: down cast the df to compact dtypes, dict for the arguments of
+        :func:`~zvt.utils.pd_utils.compact_df`
     :return: results basing on return_type.
     """
     if "providers" not in data_schema.__dict__:
@@ -317,7 +884,46 @@ def get_data(
         provider = data_schema.providers[0]
 
     if not session:
-        session = get_db_session(provider=provider, data_schema=data_schema)
+        db_name = _get_db_name(data_schema=data_schema)
+        partition = None
+        if is_partitioned_db(db_name):
+            partitions = get_db_partitions(
+                provider=provider, db_name=db_name, start_timestamp=start_timestamp, end_timestamp=end_timestamp
+            )
+            if len(partitions) > 1:
+                if return_type == "select":
+                    raise ValueError(
+                        f"select could not span the partitions {partitions} of {db_name}, query them one by one"
+                    )
+                return _get_partitioned_data(
+                    partitions,
+                    db_name=db_name,
+                    data_schema=data_schema,
+                    ids=ids,
+                    entity_ids=entity_ids,
+                    entity_id=entity_id,
+                    codes=codes,
+                    code=code,
+                    level=level,
+                    provider=provider,
+                    columns=columns,
+                    col_label=col_label,
+                    return_type=return_type,
+                    start_timestamp=start_timestamp,
+                    end_timestamp=end_timestamp,
+                    filters=filters,
+                    order=order,
+                    limit=limit,
+                    distinct=distinct,
+                    index=index,
+                    drop_index_col=drop_index_col,
+                    time_field=time_field,
+                    engine=engine,
+                    compact=compact,
+                )
+            if partitions:
+                partition = partitions[0]
+        session = _get_query_session(provider, db_name=db_name, partition=partition, return_type=return_type)
 
     time_col = eval("data_schema.{}".format(time_field))
 
@@ -379,16 +985,29 @@ def get_data(
     )
 
     if return_type == "df":
-        df = pd.read_sql(query.statement, query.session.bind)
+        if engine == "analytic" and _can_use_analytic(data_schema):
+            df = read_sql_analytic(query.statement, data_schema=data_schema, provider=provider, time_field=time_field)
+        elif _session_has_writes(query.session):
+            # the writes not committed are only visible in the connection of the session
+            query.session.flush()
+            df = pd.read_sql(query.statement, query.session.connection())
+        else:
+            df = pd.read_sql(query.statement, query.session.bind)
         if pd_is_not_null(df):
             if index:
                 df = index_df(df, index=index, drop=drop_index_col, time_field=time_field)
+            if compact:
+                df = compact_df(df, **(compact if isinstance(compact, dict) else {}))
         return df
     elif return_type == "domain":
         return query.all()
     elif return_type == "dict":
         domains = query.all()
-        return [_row2dict(item) for item in domains]
+        result = [_row2dict(item) for item in domains]
+        if session.info.get("read_only"):
+            # release the connection
+            session.close()
+        return result
     elif return_type == "select":
         return query.selectable
 
@@ -427,13 +1046,15 @@ def get_data_count(data_schema, filters=None, provider=None, session=None):
     return count
 
 
-def get_group(provider, data_schema, column, group_func=func.count, session=None):
+def get_group(provider, data_schema, column, group_func=func.count, session=None, engine: str = None):
     if not session:
-        session = get_db_session(provider=provider, data_schema=data_schema)
+        session = _get_query_session(provider, db_name=_get_db_name(data_schema=data_schema))
     if group_func:
         query = session.query(column, group_func(column)).group_by(column)
     else:
         query = session.query(column).group_by(column)
+    if engine == "analytic" and _can_use_analytic(data_schema):
+        return read_sql_analytic(query.statement, data_schema=data_schema, provider=provider, time_field=None)
     df = pd.read_sql(query.statement, query.session.bind)
     return df
 
@@ -510,6 +1131,24 @@ def df_to_db(
     if not pd_is_not_null(df):
         return 0
 
+    if not session and is_partitioned_db(_get_db_name(data_schema=data_schema)):
+        # route the rows to the partition of their timestamp
+        saved = 0
+        partitions = pd.to_datetime(df[data_schema.time_field()]).dt.strftime("%Y%m%d")
+        for partition, partition_df in df.groupby(partitions):
+            saved = saved + df_to_db(
+                df=partition_df,
+                data_schema=data_schema,
+                provider=provider,
+                force_update=force_update,
+                sub_size=sub_size,
+                drop_duplicates=drop_duplicates,
+                dtype=dtype,
+                session=get_db_session(provider=provider, data_schema=data_schema, partition=partition),
+                need_check=need_check,
+            )
+        return saved
+
     if drop_duplicates and df.duplicated(subset="id").any():
         logger.warning(f"remove duplicated:{df[df.duplicated()]}")
         df = df.drop_duplicates(subset="id", keep="last")
@@ -570,6 +1209,9 @@ def df_to_db(
                 data_schema.__tablename__, session.connection(), index=False, if_exists="append", dtype=dtype
             )
         session.commit()
+
+    if saved:
+        publish_data_event(data_schema, provider=provider, df=df)
     return saved
 
 
@@ -619,7 +1261,7 @@ def get_entities(
     :return:
     """
     if not entity_schema:
-        entity_schema = zvt_context.tradable_schema_map[entity_type]
+        entity_schema = get_entity_schema(entity_type)
 
     if not provider:
         provider = entity_schema.providers[0]
@@ -696,10 +1338,18 @@ if __name__ == "__main__":
 
 # the __all__ is generated
 __all__ = [
+    "is_partitioned_db",
+    "to_db_partition",
+    "get_db_partitions",
+    "drop_db_partitions",
+    "migrate_to_partitions",
     "get_db_engine",
+    "init_pending_db_engines",
     "get_providers",
     "get_schemas",
     "get_db_session",
+    "remove_db_sessions",
+    "release_db_sessions",
     "get_db_session_factory",
     "get_entity_schema",
     "get_schema_by_name",
@@ -28,6 +28,9 @@ class Registry(object):
         #: provider_dbname -> engine
         self.db_engine_map = {}
 
+        #: db_name -> [(engine, partition)], the engines created before the schemas of the db registered
+        self.dbname_map_pending_engines = {}
+
         #: provider_dbname -> session
         self.db_session_map = {}
 
@@ -40,6 +43,9 @@ class Registry(object):
         #: db_name -> [declarative_meta1,declarative_meta2...]
         self.dbname_map_schemas = {}
 
+        #: db names partitioned by trading day
+        self.partitioned_dbnames = []
+
         #: entity_type -> related schemas
         self.entity_map_schemas = {}
 
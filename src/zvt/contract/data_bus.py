@@ -0,0 +1,411 @@
+# -*- coding: utf-8 -*-
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import time
+from typing import Callable, List, Optional, Tuple, Type, Union
+
+import pandas as pd
+
+from zvt import zvt_env
+from zvt.contract.data_event import DataEvent, DataEventCenter, DataTopic, data_event_center
+from zvt.contract.reader import DataListener
+from zvt.contract.schema import Mixin
+from zvt.utils.pd_utils import pd_is_not_null, index_df
+
+logger = logging.getLogger(__name__)
+
+#: the tcp port used if unix socket is not supported, e.g. windows
+DATA_BUS_PORT = 15899
+#: the topics whose df is forwarded as the delta, the others only notify the timestamp and entities
+DF_TOPICS = (DataTopic.quote, DataTopic.kdata)
+#: the max messages queued for one peer, the peer can't keep up would be disconnected
+PEER_QUEUE_SIZE = 1000
+
+
+def get_data_bus_address() -> Union[str, Tuple[str, int]]:
+    """
+    the default address of the bus, unix socket in tmp path or localhost tcp if unix socket is not supported
+
+    :return: socket path or (host, port)
+    """
+    if hasattr(socket, "AF_UNIX"):
+        return os.path.join(zvt_env["tmp_path"], "data_bus.sock")
+    return "127.0.0.1", DATA_BUS_PORT
+
+
+def _create_socket(address) -> socket.socket:
+    if isinstance(address, str):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    return socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+
+def _close_socket(sock: socket.socket):
+    # shutdown wakes up the threads blocked in accept or recv
+    try:
+        sock.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass
+    sock.close()
+
+
+def _json_default(obj):
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    return str(obj)
+
+
+def encode_event(event: DataEvent, with_df: bool = True) -> bytes:
+    """
+    encode the event with its df to one json line
+
+    :param event: the event
+    :param with_df: whether encode the df
+    """
+    msg = event.to_dict()
+    if with_df and pd_is_not_null(event.df):
+        df = event.df
+        msg["dates"] = [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])]
+        msg["df"] = df.to_dict(orient="split", index=False)
+    return (json.dumps(msg, default=_json_default) + "\n").encode("utf-8")
+
+
+def decode_event(line: bytes) -> DataEvent:
+    msg = json.loads(line)
+    event = DataEvent.from_dict(msg)
+    if msg.get("df"):
+        df = pd.DataFrame(msg["df"]["data"], columns=msg["df"]["columns"])
+        for col in msg.get("dates", []):
+            df[col] = pd.to_datetime(df[col])
+        event.df = df
+    return event
+
+
+class _Peer(object):
+    """
+    the connection to another process, the messages are sent by its writer thread from the bounded queue,
+    so the publishing thread is not blocked by the socket
+    """
+
+    def __init__(self, sock: socket.socket, on_error: Callable[["_Peer"], None]) -> None:
+        self.sock = sock
+        self.on_error = on_error
+        self.queue = queue.Queue(maxsize=PEER_QUEUE_SIZE)
+        self.closed = False
+        threading.Thread(target=self._write_loop, name="data_bus_writer", daemon=True).start()
+
+    def send(self, data: bytes) -> bool:
+        """
+        queue the data to send
+
+        :param data: the data
+        :return: False if the queue is full
+        """
+        try:
+            self.queue.put_nowait(data)
+            return True
+        except queue.Full:
+            return False
+
+    def _write_loop(self):
+        while True:
+            data = self.queue.get()
+            if data is None:
+                return
+            try:
+                self.sock.sendall(data)
+            except OSError as e:
+                if not self.closed:
+                    logger.warning(f"data bus peer disconnected: {e}")
+                    self.on_error(self)
+                return
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        _close_socket(self.sock)
+        # the writer blocked in sendall fails on the closed socket if the queue is full
+        try:
+            self.queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+class DataBus(object):
+    """
+    Local pub/sub of the data events between the processes without broker, e.g. the quote recorder serves the bus,
+    the trader and the rest server connect to it and receive the recorded data with sub-second latency.
+
+    The events published to the :class:`~zvt.contract.data_event.DataEventCenter` of one process, e.g. by
+    :func:`~zvt.contract.api.df_to_db`, are forwarded to the others and published to their centers, so
+    :meth:`~zvt.contract.data_event.DataEventCenter.wait_for` works across processes.
+
+    The subscribers are called in the publishing thread or the receiving thread, they should return quickly.
+    The events are sent to the peers in their writer threads, only the df of :data:`DF_TOPICS` is forwarded.
+    """
+
+    def __init__(self, event_center: DataEventCenter = None) -> None:
+        self.event_center = event_center if event_center is not None else data_event_center
+        self._lock = threading.RLock()
+        #: (callback, topic, schema name, provider)
+        self._subscribers: List[Tuple[Callable[[DataEvent], None], Optional[DataTopic], str, str]] = []
+        self._peers: List[_Peer] = []
+        self._disconnect_listeners: List[Callable[[object], None]] = []
+        self._server: Optional[socket.socket] = None
+        self._running = False
+        self.event_center.register_listener(self._on_event)
+
+    def subscribe(
+        self,
+        callback: Callable[[DataEvent], None],
+        topic: Union[str, DataTopic] = None,
+        data_schema: Union[str, Type[Mixin]] = None,
+        provider: str = None,
+    ):
+        """
+        subscribe the events
+
+        :param callback: called with the event
+        :param topic: the topic, None means all
+        :param data_schema: the data schema or its name, None means all
+        :param provider: data provider, None means all
+        """
+        if topic is not None:
+            topic = DataTopic(topic)
+        if data_schema is not None and not isinstance(data_schema, str):
+            data_schema = data_schema.__name__
+        with self._lock:
+            self._subscribers.append((callback, topic, data_schema, provider))
+
+    def unsubscribe(self, callback: Callable[[DataEvent], None]):
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if s[0] != callback]
+
+    def register_disconnect_listener(self, listener: Callable[[object], None]):
+        """
+        register the listener called with the peer disconnected, which is the origin of the events received from it
+
+        :param listener: called with the peer
+        """
+        with self._lock:
+            if listener not in self._disconnect_listeners:
+                self._disconnect_listeners.append(listener)
+
+    def is_connected(self) -> bool:
+        with self._lock:
+            return bool(self._peers)
+
+    def serve(self, address: Union[str, Tuple[str, int]] = None):
+        """
+        serve the bus at the address, the others connect to it
+
+        :param address: socket path or (host, port), default :func:`get_data_bus_address`
+        """
+        with self._lock:
+            if self._server is not None:
+                return
+        if address is None:
+            address = get_data_bus_address()
+        server = _create_socket(address)
+        if isinstance(address, str):
+            if os.path.exists(address):
+                os.remove(address)
+        else:
+            server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(address)
+        if isinstance(address, str):
+            os.chmod(address, 0o600)
+        server.listen()
+
+        with self._lock:
+            self._server = server
+            self._running = True
+        threading.Thread(target=self._accept_loop, args=(server,), name="data_bus_server", daemon=True).start()
+        logger.info(f"data bus served at {address}")
+
+    def connect(
+        self, address: Union[str, Tuple[str, int]] = None, reconnect: bool = True, retry_interval: float = 3
+    ) -> bool:
+        """
+        connect to the bus served by another process
+
+        :param address: socket path or (host, port), default :func:`get_data_bus_address`
+        :param reconnect: whether retry in background if not connected or disconnected
+        :param retry_interval: seconds between the retries
+        :return: whether connected now
+        """
+        if address is None:
+            address = get_data_bus_address()
+        with self._lock:
+            self._running = True
+        peer = self._try_connect(address)
+        if peer is None and not reconnect:
+            return False
+        threading.Thread(
+            target=self._connect_loop,
+            args=(address, peer, reconnect, retry_interval),
+            name="data_bus_client",
+            daemon=True,
+        ).start()
+        return peer is not None
+
+    def stop(self):
+        with self._lock:
+            self._running = False
+            server, self._server = self._server, None
+            peers, self._peers = self._peers, []
+        if server:
+            address = server.getsockname()
+            _close_socket(server)
+            if isinstance(address, str) and os.path.exists(address):
+                os.remove(address)
+        for peer in peers:
+            peer.close()
+
+    def _try_connect(self, address) -> Optional[_Peer]:
+        sock = _create_socket(address)
+        try:
+            sock.connect(address)
+        except OSError as e:
+            sock.close()
+            logger.debug(f"data bus at {address} not connected: {e}")
+            return None
+        return self._add_peer(sock)
+
+    def _connect_loop(self, address, peer: Optional[_Peer], reconnect: bool, retry_interval: float):
+        while True:
+            if peer is not None:
+                self._read_loop(peer)
+            if not reconnect or not self._running:
+                return
+            time.sleep(retry_interval)
+            if not self._running:
+                return
+            peer = self._try_connect(address)
+
+    def _accept_loop(self, server: socket.socket):
+        while self._running:
+            try:
+                sock, _ = server.accept()
+            except OSError:
+                return
+            peer = self._add_peer(sock)
+            threading.Thread(target=self._read_loop, args=(peer,), name="data_bus_peer", daemon=True).start()
+
+    def _add_peer(self, sock: socket.socket) -> _Peer:
+        peer = _Peer(sock, on_error=self._remove_peer)
+        with self._lock:
+            self._peers.append(peer)
+        return peer
+
+    def _remove_peer(self, peer: _Peer):
+        with self._lock:
+            removed = peer in self._peers
+            if removed:
+                self._peers.remove(peer)
+            listeners = list(self._disconnect_listeners)
+        peer.close()
+        if removed:
+            for listener in listeners:
+                try:
+                    listener(peer)
+                except Exception as e:
+                    logger.exception(f"data bus disconnect listener:{listener} error:{e}")
+
+    def _read_loop(self, peer: _Peer):
+        try:
+            with peer.sock.makefile("rb") as f:
+                for line in f:
+                    try:
+                        event = decode_event(line)
+                    except Exception as e:
+                        logger.warning(f"wrong data bus message: {e}")
+                        continue
+                    event.origin = peer
+                    self.event_center.publish(event)
+        except OSError:
+            pass
+        finally:
+            self._remove_peer(peer)
+
+    def _on_event(self, event: DataEvent):
+        with self._lock:
+            subscribers = [
+                callback
+                for callback, topic, schema_name, provider in self._subscribers
+                if (topic is None or topic == event.topic)
+                and (schema_name is None or schema_name == event.schema_name)
+                and (provider is None or provider == event.provider)
+            ]
+            # the events from a peer are relayed to the others
+            peers = [peer for peer in self._peers if peer is not event.origin]
+
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.exception(f"data bus subscriber:{callback} error:{e}")
+
+        if peers:
+            data = encode_event(event, with_df=event.topic in DF_TOPICS)
+            for peer in peers:
+                if not peer.send(data):
+                    # the peer reloads the db after reconnecting instead of missing the deltas silently
+                    logger.warning("data bus peer can't keep up, disconnect it")
+                    self._remove_peer(peer)
+
+
+class DataListenerSubscriber(object):
+    """
+    subscriber feeding the data of the events to the :class:`~zvt.contract.reader.DataListener` as the deltas,
+    e.g. the online factors, so they don't poll the db, e.g.
+
+    data_bus.subscribe(DataListenerSubscriber(factor), data_schema=Stock1mKdata)
+    """
+
+    def __init__(
+        self,
+        listener: DataListener,
+        entity_ids: List[str] = None,
+        category_field: str = "entity_id",
+        time_field: str = "timestamp",
+    ) -> None:
+        self.listener = listener
+        self.entity_ids = set(entity_ids) if entity_ids else None
+        self.category_field = category_field
+        self.time_field = time_field
+
+    def __call__(self, event: DataEvent):
+        df = event.df
+        if not pd_is_not_null(df):
+            return
+        if self.entity_ids is not None:
+            df = df[df[self.category_field].isin(self.entity_ids)]
+            if not pd_is_not_null(df):
+                return
+        df = index_df(df.copy(), index=[self.category_field, self.time_field], time_field=self.time_field)
+        for entity_id, entity_df in df.groupby(level=0):
+            self.listener.on_entity_data_changed(entity=entity_id, added_data=entity_df)
+        self.listener.on_data_changed(df)
+
+
+#: the data bus of the process
+data_bus = DataBus()
+
+
+# the __all__ is generated
+__all__ = [
+    "get_data_bus_address",
+    "encode_event",
+    "decode_event",
+    "DataBus",
+    "DataListenerSubscriber",
+]
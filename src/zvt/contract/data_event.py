@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+from enum import Enum
+from typing import Dict, List, Tuple, Type, Union, Callable
+
+import pandas as pd
+
+from zvt.contract.context import zvt_context
+from zvt.contract.schema import Mixin
+from zvt.utils.time_utils import to_pd_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class DataTopic(Enum):
+    """
+    the topic of the data events
+    """
+
+    #: the quote snapshots, e.g. StockQuote
+    quote = "quote"
+    #: the kdata bars
+    kdata = "kdata"
+    #: the factor results
+    factor = "factor"
+    #: other data
+    data = "data"
+
+
+def get_data_topic(data_schema: Type[Mixin]) -> DataTopic:
+    """
+    get the topic of the data schema by its db name
+
+    :param data_schema: data schema
+    :return: the topic
+    """
+    for db_name, base in zvt_context.dbname_map_base.items():
+        if issubclass(data_schema, base):
+            if "quote" in db_name:
+                return DataTopic.quote
+            if db_name.endswith("_kdata"):
+                return DataTopic.kdata
+            if db_name.endswith("_factor"):
+                return DataTopic.factor
+            break
+    return DataTopic.data
+
+
+class DataEvent(object):
+    """
+    the data of the schema recorded up to the timestamp
+    """
+
+    def __init__(
+        self,
+        schema_name: str,
+        provider: str,
+        timestamp: pd.Timestamp,
+        entity_ids: List[str] = None,
+        topic: DataTopic = DataTopic.data,
+        df: pd.DataFrame = None,
+    ) -> None:
+        #: the name of the data schema, e.g. Stock1mKdata
+        self.schema_name = schema_name
+        self.provider = provider
+        #: the max timestamp of the recorded data
+        self.timestamp = timestamp
+        #: the entities of the recorded data, None means unknown
+        self.entity_ids = entity_ids
+        self.topic = DataTopic(topic)
+        #: the recorded data, it's shared by the consumers and should not be modified
+        self.df = df
+        #: where the event comes from, None means this process
+        self.origin = None
+
+    def to_dict(self) -> dict:
+        return {
+            "schema_name": self.schema_name,
+            "provider": self.provider,
+            "timestamp": self.timestamp.isoformat() if self.timestamp is not None else None,
+            "entity_ids": self.entity_ids,
+            "topic": self.topic.value,
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "DataEvent":
+        return cls(
+            schema_name=d["schema_name"],
+            provider=d.get("provider"),
+            timestamp=to_pd_timestamp(d["timestamp"]) if d.get("timestamp") else None,
+            entity_ids=d.get("entity_ids"),
+            topic=d.get("topic", DataTopic.data.value),
+        )
+
+    def __repr__(self) -> str:
+        return f"DataEvent({self.to_dict()})"
+
+
+def _schema_name(data_schema: Union[str, Type[Mixin]]) -> str:
+    return data_schema if isinstance(data_schema, str) else data_schema.__name__
+
+
+class DataEventCenter(object):
+    """
+    The recorders publish the data events after persisting, the consumers, e.g. the real time trader, wait for them
+    instead of sleeping and polling the db.
+    """
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        #: (schema name, provider) -> latest timestamp
+        self._latest: Dict[Tuple[str, str], pd.Timestamp] = {}
+        #: (schema name, provider) -> entity_id -> latest timestamp, None key for the events without entities
+        self._entity_latest: Dict[Tuple[str, str], Dict[str, pd.Timestamp]] = {}
+        self._listeners: List[Callable[[DataEvent], None]] = []
+
+    def publish(self, event: DataEvent):
+        with self._cond:
+            if event.timestamp is not None:
+                key = (event.schema_name, event.provider)
+                latest = self._latest.get(key)
+                if latest is None or event.timestamp > latest:
+                    self._latest[key] = event.timestamp
+                entity_latest = self._entity_latest.setdefault(key, {})
+                for entity_id in event.entity_ids if event.entity_ids is not None else [None]:
+                    latest = entity_latest.get(entity_id)
+                    if latest is None or event.timestamp > latest:
+                        entity_latest[entity_id] = event.timestamp
+            self._cond.notify_all()
+            listeners = list(self._listeners)
+
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.exception(f"data event listener:{listener} error:{e}")
+
+    def latest_timestamp(self, data_schema: Union[str, Type[Mixin]], provider: str = None) -> pd.Timestamp:
+        """
+        the latest timestamp of the data published
+
+        :param data_schema: data schema or its name
+        :param provider: data provider, None means any
+        :return: the latest timestamp or None
+        """
+        with self._cond:
+            return self._latest_no_lock(_schema_name(data_schema), provider)
+
+    def wait_for(
+        self,
+        data_schemas: List[Union[Type[Mixin], Tuple[Type[Mixin], str]]],
+        timestamp: Union[str, pd.Timestamp],
+        timeout: float = None,
+        entity_ids: List[str] = None,
+    ) -> bool:
+        """
+        wait until the data of all the schemas recorded up to the timestamp
+
+        :param data_schemas: data schemas or (data schema, provider)
+        :param timestamp: the timestamp
+        :param timeout: timeout in seconds, None means forever
+        :param entity_ids: wait until the data of all the entities recorded, None means any entity
+        :return: False if timeout
+        """
+        timestamp = to_pd_timestamp(timestamp)
+        keys = [key if isinstance(key, tuple) else (key, None) for key in data_schemas]
+        deadline = None if timeout is None else time.time() + timeout
+
+        def ready():
+            for data_schema, provider in keys:
+                name = _schema_name(data_schema)
+                if entity_ids is None:
+                    latest = self._latest_no_lock(name, provider)
+                    if latest is None or latest < timestamp:
+                        return False
+                    continue
+                for entity_id in entity_ids:
+                    latest = self._entity_latest_no_lock(name, provider, entity_id)
+                    if latest is None or latest < timestamp:
+                        return False
+            return True
+
+        with self._cond:
+            while not ready():
+                if deadline is None:
+                    self._cond.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+        return True
+
+    def _latest_no_lock(self, name: str, provider: str = None) -> pd.Timestamp:
+        timestamps = [
+            timestamp
+            for (schema_name, schema_provider), timestamp in self._latest.items()
+            if schema_name == name and (provider is None or schema_provider == provider)
+        ]
+        return max(timestamps) if timestamps else None
+
+    def _entity_latest_no_lock(self, name: str, provider: str, entity_id: str) -> pd.Timestamp:
+        timestamps = [
+            timestamp
+            for (schema_name, schema_provider), entity_latest in self._entity_latest.items()
+            if schema_name == name and (provider is None or schema_provider == provider)
+            for timestamp in (entity_latest.get(entity_id), entity_latest.get(None))
+            if timestamp is not None
+        ]
+        return max(timestamps) if timestamps else None
+
+    def register_listener(self, listener: Callable[[DataEvent], None]):
+        with self._cond:
+            if listener not in self._listeners:
+                self._listeners.append(listener)
+
+    def deregister_listener(self, listener: Callable[[DataEvent], None]):
+        with self._cond:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def clear(self):
+        with self._cond:
+            self._latest.clear()
+            self._entity_latest.clear()
+
+
+#: the data event center of the process
+data_event_center = DataEventCenter()
+
+
+def publish_data_event(
+    data_schema: Union[str, Type[Mixin]],
+    provider: str,
+    timestamp: Union[str, pd.Timestamp] = None,
+    entity_ids: List[str] = None,
+    df: pd.DataFrame = None,
+):
+    """
+    publish the data event, the timestamp and entity_ids could be got from the recorded df
+
+    :param data_schema: data schema or its name
+    :param provider: data provider
+    :param timestamp: the max timestamp of the recorded data
+    :param entity_ids: the entities of the recorded data
+    :param df: the recorded df, it's passed to the consumers as the delta
+    """
+    topic = DataTopic.data
+    if not isinstance(data_schema, str):
+        topic = get_data_topic(data_schema)
+    if df is not None:
+        time_field = "timestamp" if isinstance(data_schema, str) else data_schema.time_field()
+        if timestamp is None and time_field in df.columns:
+            timestamp = pd.to_datetime(df[time_field]).max()
+        if entity_ids is None and "entity_id" in df.columns:
+            entity_ids = df["entity_id"].unique().tolist()
+    event = DataEvent(
+        schema_name=_schema_name(data_schema),
+        provider=provider,
+        timestamp=to_pd_timestamp(timestamp) if timestamp is not None and not pd.isna(timestamp) else None,
+        entity_ids=entity_ids,
+        topic=topic,
+        df=df,
+    )
+    data_event_center.publish(event)
+
+
+# the __all__ is generated
+__all__ = ["DataTopic", "get_data_topic", "DataEvent", "DataEventCenter", "publish_data_event"]
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import logging
+import threading
+from typing import Optional, Tuple, Type
+
+import pandas as pd
+
+from zvt.contract.schema import Mixin
+from zvt.utils.pd_utils import pd_is_not_null
+
+logger = logging.getLogger(__name__)
+
+
+def _expr_key(expr) -> str:
+    if expr is None:
+        return None
+    return str(expr.compile(compile_kwargs={"literal_binds": True}))
+
+
+def _transformer_key(transformer) -> str:
+    config = {k: v for k, v in vars(transformer).items() if k not in ("logger", "indicators")}
+    return "{}.{}{}".format(type(transformer).__module__, type(transformer).__qualname__, sorted(config.items()))
+
+
+class DataHub(object):
+    """
+    Share the loaded data and the transformer results between the factors in one run, e.g. the factors of a trader,
+    the factors subscribe to it in the :meth:`sharing` scope.
+
+    The factors get shallow copies, adding columns to them doesn't affect others, but the values should not be
+    modified in place.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._depth = 0
+        #: data key -> (columns, df)
+        self._data = {}
+        #: (transformer key, data key) -> (indicators, df)
+        self._transformed = {}
+
+    def is_sharing(self) -> bool:
+        return self._depth > 0
+
+    @contextlib.contextmanager
+    def sharing(self):
+        """
+        share the data in the scope, the cache is cleared after leaving the outermost scope
+        """
+        with self._lock:
+            self._depth = self._depth + 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._depth = self._depth - 1
+                if self._depth == 0:
+                    self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._data = {}
+            self._transformed = {}
+
+    def evict(self, data_key: tuple):
+        """
+        drop the data and the transformer results of the data key, e.g. the chunk which is processed
+
+        :param data_key: the data key returned by :meth:`query_data`
+        """
+        if data_key is None:
+            return
+        with self._lock:
+            self._data.pop(data_key, None)
+            self._transformed = {k: v for k, v in self._transformed.items() if k[1] != data_key}
+
+    @staticmethod
+    def make_data_key(data_schema: Type[Mixin], provider: str, **kwargs) -> Optional[tuple]:
+        """
+        the key of the query, the query arguments except columns
+
+        :return: the key, None if the query could not be shared
+        """
+        try:
+            items = [data_schema.__name__, provider]
+            for name, value in sorted(kwargs.items()):
+                if name == "entity_ids" and value is not None:
+                    value = tuple(sorted(value))
+                elif name == "filters" and value is not None:
+                    value = tuple(_expr_key(f) for f in value)
+                elif name == "order" and value is not None:
+                    value = _expr_key(value)
+                elif name == "index" and isinstance(value, list):
+                    value = tuple(value)
+                elif isinstance(value, dict):
+                    value = tuple(sorted(value.items()))
+                items.append((name, value))
+            key = tuple(items)
+            hash(key)
+            return key
+        except Exception as e:
+            logger.debug(f"could not share the query: {e}")
+            return None
+
+    def query_data(self, data_schema: Type[Mixin], provider: str, columns=None, **kwargs) -> Tuple[pd.DataFrame, tuple]:
+        """
+        query data with :meth:`~zvt.contract.schema.Mixin.query_data`, the same query in the sharing scope is
+        loaded once, the query with columns is served by the loaded one which has all the columns
+
+        :return: the shallow copied df and the data key
+        """
+        key = self.make_data_key(data_schema, provider, **kwargs)
+        if not self.is_sharing() or key is None:
+            return data_schema.query_data(provider=provider, columns=columns, **kwargs), None
+
+        col_names = None
+        if columns:
+            col_names = {col if isinstance(col, str) else col.name for col in columns}
+        requested = col_names
+
+        with self._lock:
+            cached = self._data.get(key)
+            if cached:
+                cached_names, df = cached
+                if cached_names is None or (col_names and col_names <= cached_names):
+                    logger.info(f"share the data of {data_schema.__name__}")
+                    return self._select(df, col_names), key
+                # load the union of the columns
+                if col_names is not None:
+                    columns = list(columns) + [name for name in cached_names if name not in col_names]
+                    col_names = col_names | cached_names
+
+            df = data_schema.query_data(provider=provider, columns=columns, **kwargs)
+            self._data[key] = (col_names, df)
+            # the transformer results of the old data are not valid
+            self._transformed = {k: v for k, v in self._transformed.items() if k[1] != key}
+            return self._select(df, requested), key
+
+    @staticmethod
+    def _select(df: pd.DataFrame, col_names) -> pd.DataFrame:
+        if not pd_is_not_null(df):
+            return df
+        if col_names:
+            return df[[col for col in df.columns if col in col_names]].copy(deep=False)
+        return df.copy(deep=False)
+
+    def transform(self, transformer, data_key: tuple, data_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        transform the data with the transformer, the result of the same transformer config and data is computed once
+
+        :param transformer: the transformer
+        :param data_key: the data key returned by :meth:`query_data`
+        :param data_df: the data
+        :return: the shallow copied result
+        """
+        if not self.is_sharing() or data_key is None:
+            return transformer.transform(data_df)
+
+        key = (_transformer_key(transformer), data_key)
+        with self._lock:
+            cached = self._transformed.get(key)
+            if cached:
+                logger.info(f"share the result of {type(transformer).__name__}")
+                indicators, df = cached
+                transformer.indicators = list(indicators)
+                return df.copy(deep=False)
+
+            df = transformer.transform(data_df)
+            self._transformed[key] = (list(transformer.indicators), df)
+            return df.copy(deep=False)
+
+
+#: the process local data hub
+data_hub = DataHub()
+
+
+# the __all__ is generated
+__all__ = ["DataHub", "data_hub"]
@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 import json
 import logging
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
-from typing import List, Union, Optional, Type
+from typing import List, Union, Optional, Type, Dict
 
 import pandas as pd
 
@@ -11,10 +13,17 @@ from zvt.contract import IntervalLevel
 from zvt.contract import zvt_context
 from zvt.contract.api import get_data, df_to_db, del_data
 from zvt.contract.base_service import EntityStateService
+from zvt.contract.data_hub import data_hub
 from zvt.contract.reader import DataReader, DataListener
 from zvt.contract.schema import Mixin, TradableEntity
 from zvt.contract.zvt_info import FactorState
-from zvt.utils.pd_utils import pd_is_not_null, drop_continue_duplicate, is_filter_result_df, is_score_result_df
+from zvt.utils.pd_utils import (
+    pd_is_not_null,
+    drop_continue_duplicate,
+    is_filter_result_df,
+    is_score_result_df,
+    fill_asof,
+)
 from zvt.utils.str_utils import to_snake_str
 from zvt.utils.time_utils import to_pd_timestamp
 
@@ -160,6 +169,102 @@ class Accumulator(Indicator):
         return acc_df, state
 
 
+class OnlineIndicator(object):
+    """
+    Indicator updated bar by bar with O(1) cost, its state is json serializable for persisting in
+    :class:`~zvt.contract.base_service.EntityStateService`
+    """
+
+    def __init__(self) -> None:
+        #: current value, None if not enough bars
+        self.value = None
+
+    def update(self, x: float):
+        """
+        update with the new bar
+
+        :param x: value of the new bar
+        :return: current value
+        """
+        raise NotImplementedError
+
+    def get_state(self) -> dict:
+        return {"value": self.value}
+
+    def set_state(self, state: dict):
+        self.value = state["value"]
+
+
+class OnlineAccumulator(Accumulator):
+    """
+    Accumulator computing the new bars with the online indicators, the indicator states and the last timestamp of
+    the entity are kept in the factor state, so the new bars from move_on are computed without the history.
+
+    Subclass should implement :meth:`create_indicators` and :meth:`update_indicators`.
+    """
+
+    def create_indicators(self) -> Dict[str, OnlineIndicator]:
+        """
+        create the indicators of one entity
+
+        :return: name -> indicator
+        """
+        raise NotImplementedError
+
+    def update_indicators(self, indicators: Dict[str, OnlineIndicator], row) -> dict:
+        """
+        update the indicators with the new bar
+
+        :param indicators: the indicators of the entity
+        :param row: the new bar, a namedtuple of :meth:`pd.DataFrame.itertuples`
+        :return: column -> value of the bar
+        """
+        raise NotImplementedError
+
+    def acc_new(self, entity_id, df: pd.DataFrame, state: Optional[dict]) -> (pd.DataFrame, dict):
+        """
+        compute the new bars of the entity
+
+        :param entity_id: entity id
+        :param df: the new bars with timestamp index
+        :param state: current state of the entity
+        :return: result of the new bars and the new state
+        """
+        indicators = self.create_indicators()
+        if state:
+            timestamp = state.get("timestamp")
+            if timestamp:
+                df = df[df.index > to_pd_timestamp(timestamp)]
+            for name, indicator_state in state.get("indicators", {}).items():
+                indicators[name].set_state(indicator_state)
+
+        if not pd_is_not_null(df):
+            return None, state
+
+        results = [self.update_indicators(indicators, row) for row in df.itertuples()]
+        result_df = pd.DataFrame(results, index=df.index)
+        # the value is None if not enough bars
+        result_df = result_df.astype({col: float for col in result_df.columns if result_df[col].dtype == object})
+        for col in result_df.columns:
+            if col not in self.indicators:
+                self.indicators.append(col)
+        result_df = pd.concat([df, result_df], axis=1)
+
+        state = {
+            "timestamp": str(df.index[-1]),
+            "indicators": {name: indicator.get_state() for name, indicator in indicators.items()},
+        }
+        return result_df, state
+
+    def acc_one(self, entity_id, df: pd.DataFrame, acc_df: pd.DataFrame, state: dict) -> (pd.DataFrame, dict):
+        new_df, state = self.acc_new(entity_id=entity_id, df=df, state=state)
+        if not pd_is_not_null(new_df):
+            return acc_df, state
+        if pd_is_not_null(acc_df):
+            return pd.concat([acc_df, new_df]), state
+        return new_df, state
+
+
 class Scorer(object):
     def __init__(self) -> None:
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -173,6 +278,73 @@ class Scorer(object):
         return input_df
 
 
+def _compute_factor(transformer: Transformer, accumulator: Accumulator, data_df, factor_df, states):
+    #: 无状态的转换运算
+    if pd_is_not_null(data_df) and transformer:
+        pipe_df = transformer.transform(data_df)
+    else:
+        pipe_df = data_df
+
+    #: 有状态的累加运算
+    if pd_is_not_null(pipe_df) and accumulator:
+        factor_df, states = accumulator.acc(pipe_df, factor_df, states)
+    else:
+        factor_df = pipe_df
+    return pipe_df, factor_df, states
+
+
+def _compute_factor_shard(transformer: Transformer, accumulator: Accumulator, data_df, factor_df, states):
+    # run in the worker process
+    pipe_df, factor_df, states = _compute_factor(transformer, accumulator, data_df, factor_df, states)
+    indicators = (
+        transformer.indicators if transformer is not None else None,
+        accumulator.indicators if accumulator is not None else None,
+    )
+    return pipe_df, factor_df, states, indicators
+
+
+#: the process pool shared by the factors, see :func:`get_factor_executor`
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def get_factor_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    the process pool shared by the factors in the process, so the factors of a trader don't hold workers processes
+    each, it's enlarged if more workers are requested
+
+    :param workers: the process count at least
+    :return: the process pool
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers < workers:
+            if _executor is not None:
+                #: the submitted shards are still finished
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=workers)
+            _executor_workers = workers
+        return _executor
+
+
+def shutdown_factor_executor():
+    global _executor, _executor_workers
+    with _executor_lock:
+        executor, _executor, _executor_workers = _executor, None, 0
+    if executor is not None:
+        executor.shutdown()
+
+
+def _union_indicators(indicators_list):
+    indicators = []
+    for shard_indicators in indicators_list:
+        for indicator in shard_indicators or []:
+            if indicator not in indicators:
+                indicators.append(indicator)
+    return indicators
+
+
 def _register_class(target_class):
     if target_class.__name__ not in ("Factor", "FilterFactor", "ScoreFactor", "StateFactor"):
         zvt_context.factor_cls_registry[target_class.__name__] = target_class
@@ -196,6 +368,17 @@ class Factor(DataReader, EntityStateService, DataListener):
     #: accumulator for this factor if not passed as __init__ argument
     accumulator: Accumulator = None
 
+    #: compute the entities chunk by chunk with the size if not passed as __init__ argument, None means all at once
+    chunk_size: int = None
+    #: whether keep result_df of all the chunks in chunk mode
+    keep_result: bool = True
+    #: compute the transformer and accumulator in the process pool with the size if not passed as __init__ argument
+    workers: int = None
+    #: compute in the current process if the new rows since the last computing are less than it, e.g. move_on
+    process_min_rows: int = 1000
+    #: compute only the new bars of move_on with the online accumulator if not passed as __init__ argument
+    online: bool = False
+
     def __init__(
         self,
         data_schema: Type[Mixin],
@@ -225,11 +408,17 @@ class Factor(DataReader, EntityStateService, DataListener):
         factor_name: str = None,
         clear_state: bool = False,
         only_load_factor: bool = False,
+        compact: Union[bool, dict] = None,
+        chunk_size: int = None,
+        keep_result: bool = None,
+        workers: int = None,
+        online: bool = None,
     ) -> None:
         """
-        :param keep_all_timestamp:
-        :param fill_method:
-        :param effective_number:
+        :param keep_all_timestamp: keep the result of the entity effective until the next one, e.g. the fundamentals,
+            result_df is kept sparse and resolved as-of at the requested timestamps, see :meth:`get_result_df_asof`
+        :param fill_method: ffill or bfill for keep_all_timestamp
+        :param effective_number: the max days the value is effective for keep_all_timestamp, None means no limit
         :param transformer:
         :param accumulator:
         :param need_persist: whether persist factor
@@ -237,9 +426,28 @@ class Factor(DataReader, EntityStateService, DataListener):
         :param factor_name:
         :param clear_state:
         :param only_load_factor: only load factor and compute result
+        :param compact: load data_df with compact dtypes, see :class:`~zvt.contract.reader.DataReader`
+        :param chunk_size: compute the entities chunk by chunk with the size for bounded memory,
+            see :meth:`compute_in_chunks`
+        :param keep_result: whether keep result_df of all the chunks in chunk mode
+        :param workers: shard the entities across the process pool with the size for computing the transformer and
+            accumulator, see :meth:`compute_factor_in_processes`
+        :param online: compute only the new bars of move_on with the states of :class:`OnlineAccumulator`,
+            see :meth:`compute_online`
         """
         self.only_load_factor = only_load_factor
 
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        if keep_result is not None:
+            self.keep_result = keep_result
+        if workers is not None:
+            self.workers = workers
+        if online is not None:
+            self.online = online
+        #: the new bars computed in on_entity_data_changed of online mode
+        self.online_dfs: List[pd.DataFrame] = []
+
         #: define unique name of your factor if you want to keep factor state
         #: the factor state is defined by factor_name and entity_id
         if not factor_name:
@@ -266,6 +474,7 @@ class Factor(DataReader, EntityStateService, DataListener):
             category_field,
             time_field,
             keep_window,
+            compact=compact,
         )
 
         EntityStateService.__init__(self, entity_ids=entity_ids)
@@ -303,6 +512,9 @@ class Factor(DataReader, EntityStateService, DataListener):
 
         if self.clear_state:
             self.clear_state_data()
+        elif self.chunk_size:
+            #: the factor is loaded chunk by chunk
+            pass
         elif self.need_persist or self.only_load_factor:
             self.load_factor()
 
@@ -322,25 +534,71 @@ class Factor(DataReader, EntityStateService, DataListener):
                         return_type="domain",
                     )
                     if latest_laved:
-                        df1 = df[df.timestamp < latest_laved[0].timestamp].iloc[-self.computing_window :]
+                        timestamps = df.index.get_level_values(1)
+                        df1 = df[timestamps < latest_laved[0].timestamp].iloc[-self.computing_window :]
                         if pd_is_not_null(df1):
-                            df = df[df.timestamp >= df1.iloc[0].timestamp]
+                            df = df[timestamps >= df1.index[0][1]]
                     dfs.append(df)
 
                 self.data_df = pd.concat(dfs)
+                self.data_key = None
 
         self.register_data_listener(self)
 
+        if self.chunk_size:
+            self.compute_in_chunks()
         #: the compute logic is not triggered from load data
         #: for the case:1)load factor from db 2)compute the result
-        if self.only_load_factor:
+        elif self.only_load_factor:
             self.compute()
 
     def load_data(self):
-        if self.only_load_factor:
+        if self.only_load_factor or self.chunk_size:
             return
         super().load_data()
 
+    def compute_in_chunks(self):
+        """
+        compute the entities chunk by chunk, data_df, pipe_df and factor_df only hold the current chunk,
+        the factor of the chunk is persisted at once if need_persist, result_df of all the chunks is kept if
+        keep_result, so the peak memory depends on chunk_size instead of the size of all the entities
+        """
+        all_entity_ids = self.entity_ids or []
+        all_states = self.states
+        result_dfs = []
+        for i in range(0, len(all_entity_ids), self.chunk_size):
+            self.entity_ids = all_entity_ids[i : i + self.chunk_size]
+            self.logger.info(f"compute chunk {i // self.chunk_size}: {len(self.entity_ids)} entities")
+
+            self.states = {entity_id: all_states[entity_id] for entity_id in self.entity_ids if entity_id in all_states}
+            self.data_df = None
+            self.pipe_df = None
+            self.factor_df = None
+            self.result_df = None
+
+            if self.need_persist or self.only_load_factor:
+                self.load_factor()
+            if self.only_load_factor:
+                self.compute()
+            else:
+                #: compute is triggered by on_data_loaded
+                DataReader.load_data(self)
+
+            #: the chunk is not shared with others, keep the memory of the hub bounded too
+            data_hub.evict(self.data_key)
+            self.data_key = None
+
+            all_states.update(self.states)
+            if self.keep_result and pd_is_not_null(self.result_df):
+                result_dfs.append(self.result_df)
+
+        self.entity_ids = all_entity_ids
+        self.states = all_states
+        self.data_df = None
+        self.pipe_df = None
+        self.factor_df = None
+        self.result_df = pd.concat(result_dfs) if result_dfs else None
+
     def load_factor(self):
         if self.only_compute_factor:
             #: 如果只是为了计算因子，只需要读取acc_window的factor_df
@@ -399,17 +657,80 @@ class Factor(DataReader, EntityStateService, DataListener):
     def compute_factor(self):
         if self.only_load_factor:
             return
-        #: 无状态的转换运算
-        if pd_is_not_null(self.data_df) and self.transformer:
-            self.pipe_df = self.transformer.transform(self.data_df)
+        if self.workers and self.workers > 1 and (self.transformer or self.accumulator) and not self.is_small_update():
+            entity_ids = self.data_df.index.get_level_values(0).unique() if pd_is_not_null(self.data_df) else []
+            if len(entity_ids) > 1:
+                self.compute_factor_in_processes(entity_ids)
+                return
+
+        if self.transformer and self.data_key and pd_is_not_null(self.data_df):
+            #: the same transformer on the same data is computed once in the sharing scope
+            pipe_df = data_hub.transform(self.transformer, self.data_key, self.data_df)
+            self.pipe_df, self.factor_df, self.states = _compute_factor(
+                None, self.accumulator, pipe_df, self.factor_df, self.states
+            )
         else:
-            self.pipe_df = self.data_df
+            self.pipe_df, self.factor_df, self.states = _compute_factor(
+                self.transformer, self.accumulator, self.data_df, self.factor_df, self.states
+            )
 
-        #: 有状态的累加运算
-        if pd_is_not_null(self.pipe_df) and self.accumulator:
-            self.factor_df, self.states = self.accumulator.acc(self.pipe_df, self.factor_df, self.states)
-        else:
-            self.factor_df = self.pipe_df
+    def is_small_update(self) -> bool:
+        """
+        whether the new rows of data_df since the last computing are less than process_min_rows, they are computed
+        in the current process instead of pickling the shards to the process pool
+
+        :return: True if small update
+        """
+        if not pd_is_not_null(self.factor_df) or not pd_is_not_null(self.data_df):
+            return False
+        latest_timestamp = self.factor_df.index.get_level_values(1).max()
+        return (self.data_df.index.get_level_values(1) > latest_timestamp).sum() < self.process_min_rows
+
+    def get_executor(self) -> ProcessPoolExecutor:
+        """
+        the process pool of :meth:`compute_factor_in_processes`, it's shared by the factors and kept,
+        so move_on doesn't pay the startup of the worker processes again
+
+        :return: the process pool with the size of workers at least
+        """
+        return get_factor_executor(self.workers)
+
+    def compute_factor_in_processes(self, entity_ids):
+        """
+        shard the entities across the process pool, the transformer and accumulator are computed in the shards,
+        and the results and states are merged back
+
+        :param entity_ids: entity ids of data_df
+        """
+        shard_count = min(self.workers, len(entity_ids))
+        shards = [entity_ids[i::shard_count] for i in range(shard_count)]
+        executor = self.get_executor()
+        futures = []
+        for shard in shards:
+            data_df = self.data_df[self.data_df.index.get_level_values(0).isin(shard)]
+            factor_df = None
+            if pd_is_not_null(self.factor_df):
+                factor_df = self.factor_df[self.factor_df.index.get_level_values(0).isin(shard)]
+            states = {entity_id: self.states[entity_id] for entity_id in shard if entity_id in self.states}
+            futures.append(
+                executor.submit(_compute_factor_shard, self.transformer, self.accumulator, data_df, factor_df, states)
+            )
+        results = [future.result() for future in futures]
+
+        pipe_dfs = [pipe_df for pipe_df, _, _, _ in results if pd_is_not_null(pipe_df)]
+        self.pipe_df = pd.concat(pipe_dfs).sort_index(level=[0, 1]) if pipe_dfs else None
+        factor_dfs = [factor_df for _, factor_df, _, _ in results if pd_is_not_null(factor_df)]
+        self.factor_df = pd.concat(factor_dfs).sort_index(level=[0, 1]) if factor_dfs else None
+        if self.accumulator is not None:
+            #: the states of the entities not in this round are kept
+            for _, _, states, _ in results:
+                self.states.update(states)
+
+        #: the indicators are collected in the shards
+        if self.transformer is not None:
+            self.transformer.indicators = _union_indicators(indicators[0] for _, _, _, indicators in results)
+        if self.accumulator is not None:
+            self.accumulator.indicators = _union_indicators(indicators[1] for _, _, _, indicators in results)
 
     def compute_result(self):
         if pd_is_not_null(self.factor_df):
@@ -425,8 +746,6 @@ class Factor(DataReader, EntityStateService, DataListener):
     def after_compute(self):
         if self.only_load_factor:
             return
-        if self.keep_all_timestamp:
-            self.fill_gap()
 
         if self.need_persist and pd_is_not_null(self.factor_df):
             self.persist_factor()
@@ -497,14 +816,41 @@ class Factor(DataReader, EntityStateService, DataListener):
             return annotation_df
 
     def fill_gap(self):
-        #: 该操作较慢，只适合做基本面的运算
-        idx = pd.date_range(self.start_timestamp, self.end_timestamp)
-        new_index = pd.MultiIndex.from_product(
-            [self.result_df.index.levels[0], idx], names=[self.category_field, self.time_field]
-        )
-        self.result_df = self.result_df.loc[~self.result_df.index.duplicated(keep="first")]
-        self.result_df = self.result_df.reindex(new_index)
-        self.result_df = self.result_df.groupby(level=0).fillna(method=self.fill_method, limit=self.effective_number)
+        """
+        fill result_df to every day between start_timestamp and end_timestamp.
+        The result is resolved as-of at the requested timestamps if keep_all_timestamp, see :meth:`get_result_df_asof`,
+        so it's not needed unless the dense result_df is wanted
+        """
+        self.result_df = self.get_result_df_asof(pd.date_range(self.start_timestamp, self.end_timestamp))
+
+    def get_result_df_asof(self, timestamps) -> Optional[pd.DataFrame]:
+        """
+        get result_df at the timestamps. If keep_all_timestamp, the value of the entity at the timestamp is the latest
+        one at or before it(fill_method ffill) within effective_number days, otherwise only the exact timestamps are
+        selected
+
+        :param timestamps: the requested timestamps
+        :return: normal result df at the timestamps
+        """
+        if not pd_is_not_null(self.result_df):
+            return self.result_df
+        if self.keep_all_timestamp:
+            return fill_asof(
+                self.result_df,
+                timestamps,
+                fill_method=self.fill_method,
+                limit=self.effective_number,
+                category_field=self.category_field,
+                time_field=self.time_field,
+            )
+        timestamps = pd.DatetimeIndex(pd.to_datetime(timestamps))
+        return self.result_df[self.result_df.index.get_level_values(1).isin(timestamps)]
+
+    def move_on(self, to_timestamp: Union[str, pd.Timestamp] = None, timeout: int = 20) -> object:
+        if self.chunk_size:
+            self.compute_in_chunks()
+            return
+        return super().move_on(to_timestamp=to_timestamp, timeout=timeout)
 
     def add_entities(self, entity_ids):
         if (self.entity_ids and entity_ids) and (set(self.entity_ids) == set(entity_ids)):
@@ -530,10 +876,13 @@ class Factor(DataReader, EntityStateService, DataListener):
                     limit=self.limit,
                     level=self.level,
                     index=[self.category_field, self.time_field],
+                    drop_index_col=self.drop_index_col,
                     time_field=self.time_field,
+                    compact=self.compact,
                 )
                 self.data_df = pd.concat([self.data_df, new_data_df], sort=False)
                 self.data_df.sort_index(level=[0, 1], inplace=True)
+                self.data_key = None
 
             new_factor_df = get_data(
                 provider="zvt",
@@ -557,7 +906,10 @@ class Factor(DataReader, EntityStateService, DataListener):
 
         :param data:
         """
-        self.compute()
+        if self.is_online():
+            self.compute_online()
+        else:
+            self.compute()
 
     def on_entity_data_changed(self, entity, added_data: pd.DataFrame):
         """
@@ -566,10 +918,55 @@ class Factor(DataReader, EntityStateService, DataListener):
         :param entity:
         :param added_data:
         """
-        pass
+        if self.is_online():
+            df = added_data.reset_index(level=0, drop=True)
+            new_df, self.states[entity] = self.accumulator.acc_new(
+                entity_id=entity, df=df, state=self.states.get(entity)
+            )
+            if pd_is_not_null(new_df):
+                self.online_dfs.append(pd.concat([new_df], keys=[entity], names=[self.category_field]))
+
+    def is_online(self) -> bool:
+        """
+        whether the new bars are computed online, it needs :class:`OnlineAccumulator` without transformer
+        """
+        return (
+            bool(self.online)
+            and not self.only_load_factor
+            and self.transformer is None
+            and isinstance(self.accumulator, OnlineAccumulator)
+        )
+
+    def compute_online(self):
+        """
+        merge the new bars computed in :meth:`on_entity_data_changed` into factor_df and compute the result,
+        only the new bars are accumulated and persisted, factor_df is cut to keep_window if set
+        """
+        if not self.online_dfs:
+            return
+        new_df = pd.concat(self.online_dfs, sort=False)
+        self.online_dfs = []
 
-    def persist_factor(self):
-        df = self.factor_df.copy()
+        if pd_is_not_null(self.factor_df):
+            self.factor_df = pd.concat([self.factor_df, new_df], sort=False)
+            self.factor_df.sort_index(level=[0, 1], inplace=True)
+        else:
+            self.factor_df = new_df
+        if self.computing_window:
+            self.factor_df = self.factor_df.groupby(level=0).tail(self.computing_window)
+        self.pipe_df = self.factor_df
+
+        self.compute_result()
+        if self.need_persist:
+            self.persist_factor(df=new_df)
+
+    def persist_factor(self, df: pd.DataFrame = None):
+        """
+        persist the factor and the states
+
+        :param df: the factor to persist, default factor_df
+        """
+        df = (self.factor_df if df is None else df).copy()
         #: encode json columns
         if pd_is_not_null(df) and self.factor_col_map_object_hook():
             for col in self.factor_col_map_object_hook():
@@ -595,13 +992,17 @@ class Factor(DataReader, EntityStateService, DataListener):
         else:
             df_to_db(df=df, data_schema=self.factor_schema, provider="zvt", force_update=False)
 
-    def get_filter_df(self):
-        if is_filter_result_df(self.result_df):
-            return self.result_df[["filter_result"]]
+    def get_filter_df(self, result_df: pd.DataFrame = None):
+        if result_df is None:
+            result_df = self.result_df
+        if is_filter_result_df(result_df):
+            return result_df[["filter_result"]]
 
-    def get_score_df(self):
-        if is_score_result_df(self.result_df):
-            return self.result_df[["score_result"]]
+    def get_score_df(self, result_df: pd.DataFrame = None):
+        if result_df is None:
+            result_df = self.result_df
+        if is_score_result_df(result_df):
+            return result_df[["score_result"]]
 
     def get_trading_signal_df(self):
         df = self.result_df[["filter_result"]].copy()
@@ -620,8 +1021,21 @@ class Factor(DataReader, EntityStateService, DataListener):
     ):
         if timestamp and (start_timestamp or end_timestamp):
             raise ValueError("Use timestamp or (start_timestamp, end_timestamp)")
+        result_df = self.result_df
+        if self.keep_all_timestamp and pd_is_not_null(result_df):
+            #: only the requested timestamps are resolved from the sparse result
+            if timestamp:
+                timestamps = [to_pd_timestamp(timestamp)]
+            else:
+                result_timestamps = result_df.index.get_level_values(1)
+                timestamps = pd.date_range(
+                    to_pd_timestamp(start_timestamp) if start_timestamp else result_timestamps.min(),
+                    to_pd_timestamp(end_timestamp) if end_timestamp else result_timestamps.max(),
+                )
+            result_df = self.get_result_df_asof(timestamps)
+
         # select by filter
-        filter_df = self.get_filter_df()
+        filter_df = self.get_filter_df(result_df)
         selected_df = None
         target_df = None
         if pd_is_not_null(filter_df):
@@ -633,7 +1047,7 @@ class Factor(DataReader, EntityStateService, DataListener):
                 selected_df = filter_df[filter_df["filter_result"].isna()]
 
         # select by score
-        score_df = self.get_score_df()
+        score_df = self.get_score_df(result_df)
         if pd_is_not_null(score_df):
             if pd_is_not_null(selected_df):
                 # filter at first
@@ -674,4 +1088,17 @@ class ScoreFactor(Factor):
 
 
 # the __all__ is generated
-__all__ = ["TargetType", "Indicator", "Transformer", "Accumulator", "Scorer", "FactorMeta", "Factor", "ScoreFactor"]
+__all__ = [
+    "TargetType",
+    "Indicator",
+    "Transformer",
+    "Accumulator",
+    "OnlineIndicator",
+    "OnlineAccumulator",
+    "Scorer",
+    "get_factor_executor",
+    "shutdown_factor_executor",
+    "FactorMeta",
+    "Factor",
+    "ScoreFactor",
+]
@@ -7,9 +7,10 @@ import pandas as pd
 
 from zvt.contract import IntervalLevel
 from zvt.contract.api import get_entities
+from zvt.contract.data_hub import data_hub
 from zvt.contract.drawer import Drawable
 from zvt.contract.schema import Mixin, TradableEntity
-from zvt.utils.pd_utils import pd_is_not_null
+from zvt.utils.pd_utils import pd_is_not_null, compact_df, df_memory_usage
 from zvt.utils.time_utils import to_pd_timestamp, now_pd_timestamp
 
 
@@ -40,6 +41,10 @@ class DataListener(object):
 class DataReader(Drawable):
     logger = logging.getLogger(__name__)
 
+    #: load data_df with compact dtypes if not passed as __init__ argument,
+    #: dict for the arguments of :func:`~zvt.utils.pd_utils.compact_df` and drop_index_col(default True)
+    compact: Union[bool, dict] = False
+
     def __init__(
         self,
         data_schema: Type[Mixin],
@@ -59,9 +64,20 @@ class DataReader(Drawable):
         category_field: str = "entity_id",
         time_field: str = "timestamp",
         keep_window: int = None,
+        compact: Union[bool, dict] = None,
     ) -> None:
         self.logger = logging.getLogger(self.__class__.__name__)
 
+        if compact is None:
+            compact = self.__class__.compact
+        #: drop the columns in index, e.g. entity_id and timestamp
+        self.drop_index_col = False
+        if compact:
+            compact_kwargs = dict(compact) if isinstance(compact, dict) else {}
+            self.drop_index_col = compact_kwargs.pop("drop_index_col", True)
+            compact = compact_kwargs or True
+        self.compact = compact
+
         self.data_schema = data_schema
         self.entity_schema = entity_schema
         self.provider = provider
@@ -107,6 +123,8 @@ class DataReader(Drawable):
         self.data_listeners: List[DataListener] = []
 
         self.data_df: pd.DataFrame = None
+        #: the key of data_df in the shared data hub, None if data_df is not shared
+        self.data_key = None
 
         self.load_data()
 
@@ -144,10 +162,12 @@ class DataReader(Drawable):
             level=self.level,
             index=[self.category_field, self.time_field],
             time_field=self.time_field,
+            compact=self.compact,
         )
         self.logger.info(f"query_data params:{params}")
 
-        self.data_df = self.data_schema.query_data(
+        self.data_df, self.data_key = data_hub.query_data(
+            self.data_schema,
             entity_ids=self.entity_ids,
             provider=self.provider,
             columns=self.columns,
@@ -158,11 +178,15 @@ class DataReader(Drawable):
             limit=self.limit,
             level=self.level,
             index=[self.category_field, self.time_field],
+            drop_index_col=self.drop_index_col,
             time_field=self.time_field,
+            compact=self.compact,
         )
 
         cost_time = time.time() - start_time
-        self.logger.info("load_data finished, cost_time:{}".format(cost_time))
+        self.logger.info(
+            "load_data finished, cost_time:{}, memory usage:{:.2f}M".format(cost_time, self.memory_usage() / 2**20)
+        )
 
         for listener in self.data_listeners:
             listener.on_data_loaded(self.data_df)
@@ -215,6 +239,7 @@ class DataReader(Drawable):
                     filters=filters,
                     level=self.level,
                     index=[self.category_field, self.time_field],
+                    drop_index_col=self.drop_index_col,
                 )
 
                 if pd_is_not_null(added_df):
@@ -247,6 +272,9 @@ class DataReader(Drawable):
         if dfs:
             self.data_df = pd.concat(dfs, sort=False)
             self.data_df.sort_index(level=[0, 1], inplace=True)
+            self.data_key = None
+            if self.compact:
+                self.data_df = compact_df(self.data_df, **(self.compact if isinstance(self.compact, dict) else {}))
 
             if changed:
                 for listener in self.data_listeners:
@@ -267,6 +295,12 @@ class DataReader(Drawable):
     def empty(self):
         return not pd_is_not_null(self.data_df)
 
+    def memory_usage(self) -> int:
+        """
+        memory usage of data_df in bytes
+        """
+        return df_memory_usage(self.data_df)
+
     def drawer_main_df(self) -> Optional[pd.DataFrame]:
         return self.data_df
 
@@ -12,6 +12,7 @@ from zvt.contract import IntervalLevel
 from zvt.contract.api import get_db_session, get_schema_columns
 from zvt.contract.api import get_entities, get_data
 from zvt.contract.base_service import OneStateService
+from zvt.contract.data_event import publish_data_event
 from zvt.contract.schema import Mixin, TradableEntity
 from zvt.contract.utils import is_in_same_interval, evaluate_size_from_timestamp
 from zvt.contract.zvt_info import RecorderState
@@ -395,6 +396,9 @@ class TimeSeriesDataRecorder(EntityEventRecorder):
 
             self.session.add_all(domain_list)
             self.session.commit()
+            publish_data_event(
+                self.data_schema, provider=self.provider, timestamp=last_timestamp, entity_ids=[entity.id]
+            )
 
     def on_finish(self):
         try:
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import importlib
+import json
+import logging
+import os
+
+from zvt.contract.context import zvt_context
+
+logger = logging.getLogger(__name__)
+
+#: the generated manifest, see :func:`gen_registry_manifest`
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "registry_manifest.json")
+
+#: the modules which register all the schemas, entities, recorders and factors
+REGISTRY_MODULES = ["zvt.domain", "zvt.recorders", "zvt.factors"]
+
+_manifest = None
+_all_loaded = False
+
+
+def gen_registry_manifest(manifest_path: str = MANIFEST_PATH) -> dict:
+    """
+    import all the registry modules and save the modules of the schemas, entities, recorders and factors,
+    run it after adding new schema, recorder or factor
+
+    :param manifest_path: path of the manifest
+    :return: the manifest
+    """
+    load_all()
+
+    manifest = {
+        "schemas": {schema.__name__: schema.__module__ for schema in zvt_context.schemas},
+        "entities": {entity_type: schema.__module__ for entity_type, schema in zvt_context.tradable_schema_map.items()},
+        "recorders": {},
+        "factors": {name: factor_cls.__module__ for name, factor_cls in zvt_context.factor_cls_registry.items()},
+    }
+    for schema in zvt_context.schemas:
+        provider_map_recorder = getattr(schema, "provider_map_recorder", None)
+        if provider_map_recorder:
+            manifest["recorders"][schema.__name__] = {
+                provider: recorder_cls.__module__
+                for provider, recorder_cls in provider_map_recorder.items()
+                # recorder without provider could not be selected by record_data
+                if provider
+            }
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def get_registry_manifest() -> dict:
+    global _manifest
+    if _manifest is None:
+        _manifest = {}
+        if os.path.exists(MANIFEST_PATH):
+            with open(MANIFEST_PATH) as f:
+                _manifest = json.load(f)
+        else:
+            logger.warning(f"registry manifest not found: {MANIFEST_PATH}")
+    return _manifest
+
+
+def load_all():
+    """
+    import all the registry modules, the same as the eager registry before
+    """
+    global _all_loaded
+    if not _all_loaded:
+        for module in REGISTRY_MODULES:
+            importlib.import_module(module)
+        _all_loaded = True
+
+
+def _import_modules(modules) -> bool:
+    if not modules:
+        # not in the manifest, e.g. new schema without regenerating the manifest
+        if not _all_loaded:
+            load_all()
+            return True
+        return False
+    for module in modules:
+        importlib.import_module(module)
+    return True
+
+
+def load_schema(name: str) -> bool:
+    """
+    import the module of the schema
+
+    :param name: schema name
+    :return: True if any module imported
+    """
+    module = get_registry_manifest().get("schemas", {}).get(name)
+    return _import_modules([module] if module else None)
+
+
+def load_entity_schema(entity_type: str) -> bool:
+    """
+    import the module of the entity schema
+
+    :param entity_type: entity type
+    :return: True if any module imported
+    """
+    module = get_registry_manifest().get("entities", {}).get(entity_type)
+    return _import_modules([module] if module else None)
+
+
+def load_recorders(schema_name: str) -> bool:
+    """
+    import the recorder modules of the schema
+
+    :param schema_name: schema name
+    :return: True if any module imported
+    """
+    provider_map_module = get_registry_manifest().get("recorders", {}).get(schema_name)
+    return _import_modules(list(provider_map_module.values()) if provider_map_module else None)
+
+
+def load_schemas():
+    """
+    import all the schema modules
+    """
+    _import_modules(set(get_registry_manifest().get("schemas", {}).values()))
+
+
+def load_factors():
+    """
+    import all the factor modules
+    """
+    _import_modules(set(get_registry_manifest().get("factors", {}).values()))
+
+
+# the __all__ is generated
+__all__ = [
+    "gen_registry_manifest",
+    "get_registry_manifest",
+    "load_all",
+    "load_schema",
+    "load_entity_schema",
+    "load_recorders",
+    "load_schemas",
+    "load_factors",
+]
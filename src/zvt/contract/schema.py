@@ -122,6 +122,8 @@ class Mixin(object):
         index: Union[str, list] = None,
         drop_index_col=False,
         time_field: str = "timestamp",
+        engine: str = None,
+        compact: Union[bool, dict] = False,
     ):
         """
         query data by the arguments
@@ -147,6 +149,8 @@ class Mixin(object):
         :param index: index field name, str for single index, str list for multiple index
         :param drop_index_col: whether drop the col if it's in index, default False
         :param time_field:
+        :param engine: "analytic" for running the df query in the analytic engine, default is sqlite
+        :param compact: down cast the df to compact dtypes, dict for the arguments of compact_df
         :return: results basing on return_type.
         """
         from .api import get_data
@@ -175,6 +179,8 @@ class Mixin(object):
             distinct=distinct,
             drop_index_col=drop_index_col,
             time_field=time_field,
+            engine=engine,
+            compact=compact,
         )
 
     @classmethod
@@ -238,7 +244,13 @@ class Mixin(object):
         :param kwargs:
         :return:
         """
-        if cls.provider_map_recorder:
+        # import the recorders on first use
+        from zvt.contract.registry_manifest import load_recorders
+
+        if not getattr(cls, "provider_map_recorder", None) or (provider and provider not in cls.provider_map_recorder):
+            load_recorders(cls.__name__)
+
+        if getattr(cls, "provider_map_recorder", None):
             print(f"{cls.__name__} registered recorders:{cls.provider_map_recorder}")
 
             if provider:
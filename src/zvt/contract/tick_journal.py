@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import struct
+import zlib
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+from zvt import zvt_env
+from zvt.contract.reader import DataListener
+from zvt.utils.pd_utils import pd_is_not_null
+from zvt.utils.time_utils import to_date_time_str, TIME_FORMAT_DAY1, to_timestamp_ms, get_local_timezone
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+#: fixed width tick record, time is unix timestamp in ms
+TICK_DTYPE = np.dtype(
+    [
+        ("time", "<i8"),
+        ("entity_id", "S24"),
+        ("price", "<f8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("volume", "<f8"),
+        ("turnover", "<f8"),
+        ("change_pct", "<f8"),
+        ("turnover_rate", "<f8"),
+        ("is_limit_up", "?"),
+        ("is_limit_down", "?"),
+    ]
+)
+
+#: block header: magic, compression, record count, payload size, min time, max time
+_BLOCK_HEADER = struct.Struct("<4sBIIqq")
+_BLOCK_MAGIC = b"ZTJ1"
+
+_COMPRESSION_NONE = 0
+_COMPRESSION_ZLIB = 1
+_COMPRESSION_ZSTD = 2
+
+_compression_map = {None: _COMPRESSION_NONE, "zlib": _COMPRESSION_ZLIB, "zstd": _COMPRESSION_ZSTD}
+
+
+def get_journal_dir(journal_name: str = "stock_tick", provider: str = "qmt", data_path: str = zvt_env["data_path"]):
+    return os.path.join(data_path, provider, "{}_{}_journal".format(provider, journal_name))
+
+
+def _to_local_timestamp(time_ms: np.ndarray) -> pd.DatetimeIndex:
+    # same as to_pd_timestamp(int), local time without tz
+    return (
+        pd.DatetimeIndex(pd.to_datetime(time_ms, unit="ms", utc=True))
+        .tz_convert(get_local_timezone())
+        .tz_localize(None)
+    )
+
+
+def to_tick_records(df: pd.DataFrame) -> np.ndarray:
+    """
+    convert the quote df to fixed width tick records
+
+    :param df: quote df with entity_id and time(ms) columns, or timestamp column
+    :return: records with :data:`TICK_DTYPE`
+    """
+    records = np.zeros(len(df), dtype=TICK_DTYPE)
+    if "time" in df.columns:
+        records["time"] = df["time"].to_numpy(dtype="int64")
+    else:
+        records["time"] = df["timestamp"].apply(to_timestamp_ms).to_numpy(dtype="int64")
+    records["entity_id"] = df["entity_id"].to_numpy(dtype="S24")
+    for name in TICK_DTYPE.names[2:]:
+        if name in df.columns:
+            records[name] = df[name].to_numpy(dtype=TICK_DTYPE[name])
+        elif TICK_DTYPE[name] != np.bool_:
+            records[name] = np.nan
+    return records
+
+
+class TickJournalWriter(object):
+    """
+    append only tick journal, one file per trading day and one compressed block per write
+    """
+
+    def __init__(
+        self,
+        journal_name: str = "stock_tick",
+        provider: str = "qmt",
+        compression: str = "zstd",
+        data_path: str = zvt_env["data_path"],
+    ) -> None:
+        self.journal_dir = get_journal_dir(journal_name=journal_name, provider=provider, data_path=data_path)
+        if not os.path.exists(self.journal_dir):
+            os.makedirs(self.journal_dir)
+
+        if compression == "zstd" and zstandard is None:
+            logger.warning("zstandard is not installed, use zlib for tick journal")
+            compression = "zlib"
+        self.compression = _compression_map[compression]
+        if self.compression == _COMPRESSION_ZSTD:
+            self.compressor = zstandard.ZstdCompressor(level=1)
+
+        self.current_date = None
+        self.fp = None
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.compression == _COMPRESSION_ZLIB:
+            return zlib.compress(payload, 1)
+        if self.compression == _COMPRESSION_ZSTD:
+            return self.compressor.compress(payload)
+        return payload
+
+    def _get_fp(self, date: str):
+        if date != self.current_date:
+            self.close()
+            self.fp = open(os.path.join(self.journal_dir, "{}.tick".format(date)), "ab")
+            self.current_date = date
+        return self.fp
+
+    def write(self, df: pd.DataFrame) -> int:
+        """
+        append the quotes to the journal
+
+        :param df: quote df with entity_id and time(ms) columns
+        :return: written record count
+        """
+        if not pd_is_not_null(df):
+            return 0
+        records = to_tick_records(df)
+        dates = _to_local_timestamp(records["time"]).strftime("%Y%m%d")
+
+        for date in pd.unique(dates):
+            block = records[dates == date]
+            payload = self._compress(block.tobytes())
+            header = _BLOCK_HEADER.pack(
+                _BLOCK_MAGIC,
+                self.compression,
+                len(block),
+                len(payload),
+                int(block["time"].min()),
+                int(block["time"].max()),
+            )
+            fp = self._get_fp(date)
+            fp.write(header + payload)
+            fp.flush()
+        return len(records)
+
+    def close(self):
+        if self.fp:
+            self.fp.close()
+            self.fp = None
+            self.current_date = None
+
+
+class TickJournalReader(object):
+    """
+    read and replay the tick journal written by :class:`TickJournalWriter`
+    """
+
+    def __init__(self, journal_name: str = "stock_tick", provider: str = "qmt", data_path: str = zvt_env["data_path"]):
+        self.journal_dir = get_journal_dir(journal_name=journal_name, provider=provider, data_path=data_path)
+        #: date -> (file size, block index)
+        self._index_cache = {}
+
+    def get_dates(self) -> List[str]:
+        if not os.path.exists(self.journal_dir):
+            return []
+        return sorted(
+            [file_name[: -len(".tick")] for file_name in os.listdir(self.journal_dir) if file_name.endswith(".tick")]
+        )
+
+    def _get_file(self, date) -> str:
+        return os.path.join(self.journal_dir, "{}.tick".format(to_date_time_str(date, fmt=TIME_FORMAT_DAY1)))
+
+    def get_block_index(self, date) -> pd.DataFrame:
+        """
+        the block index of the date, built by scanning the block headers
+
+        :param date: trading date
+        :return: df with offset, compression, count, size, min_time and max_time of the blocks
+        """
+        file_path = self._get_file(date)
+        if not os.path.exists(file_path):
+            return None
+        file_size = os.path.getsize(file_path)
+        cached = self._index_cache.get(file_path)
+        if cached and cached[0] == file_size:
+            return cached[1]
+
+        blocks = []
+        with open(file_path, "rb") as fp:
+            offset = 0
+            while offset + _BLOCK_HEADER.size <= file_size:
+                fp.seek(offset)
+                magic, compression, count, size, min_time, max_time = _BLOCK_HEADER.unpack(fp.read(_BLOCK_HEADER.size))
+                if magic != _BLOCK_MAGIC:
+                    logger.warning(f"broken block at {offset} of {file_path}")
+                    break
+                # the last block may be partial written
+                if offset + _BLOCK_HEADER.size + size > file_size:
+                    break
+                blocks.append((offset + _BLOCK_HEADER.size, compression, count, size, min_time, max_time))
+                offset = offset + _BLOCK_HEADER.size + size
+
+        index = pd.DataFrame(blocks, columns=["offset", "compression", "count", "size", "min_time", "max_time"])
+        self._index_cache[file_path] = (file_size, index)
+        return index
+
+    @staticmethod
+    def _decompress(payload: bytes, compression: int) -> bytes:
+        if compression == _COMPRESSION_ZLIB:
+            return zlib.decompress(payload)
+        if compression == _COMPRESSION_ZSTD:
+            assert zstandard is not None, "zstandard is needed to read the journal"
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return payload
+
+    def read(
+        self, date, entity_ids: List[str] = None, start_timestamp=None, end_timestamp=None
+    ) -> Union[pd.DataFrame, None]:
+        """
+        read the ticks of the date in time order
+
+        :param date: trading date
+        :param entity_ids: entity ids, None means all
+        :param start_timestamp: start timestamp
+        :param end_timestamp: end timestamp
+        :return: tick df with timestamp column
+        """
+        index = self.get_block_index(date)
+        if not pd_is_not_null(index):
+            return None
+
+        start_time = to_timestamp_ms(start_timestamp) if start_timestamp else None
+        end_time = to_timestamp_ms(end_timestamp) if end_timestamp else None
+        if start_time:
+            index = index[index["max_time"] >= start_time]
+        if end_time:
+            index = index[index["min_time"] <= end_time]
+
+        the_ids = np.array(entity_ids, dtype="S24") if entity_ids else None
+
+        blocks = []
+        with open(self._get_file(date), "rb") as fp:
+            for offset, compression, size in index[["offset", "compression", "size"]].itertuples(index=False):
+                fp.seek(offset)
+                block = np.frombuffer(self._decompress(fp.read(size), compression), dtype=TICK_DTYPE)
+                mask = np.ones(len(block), dtype=bool)
+                if the_ids is not None:
+                    mask &= np.isin(block["entity_id"], the_ids)
+                if start_time:
+                    mask &= block["time"] >= start_time
+                if end_time:
+                    mask &= block["time"] <= end_time
+                if mask.any():
+                    blocks.append(block[mask])
+
+        if not blocks:
+            return None
+
+        records = np.concatenate(blocks)
+        records = records[np.argsort(records["time"], kind="stable")]
+        df = pd.DataFrame(records)
+        df["entity_id"] = df["entity_id"].str.decode("utf-8")
+        df["timestamp"] = _to_local_timestamp(df["time"].to_numpy())
+        return df
+
+    def iter_batches(self, date, entity_ids: List[str] = None, start_timestamp=None, end_timestamp=None, freq=None):
+        """
+        iterate the ticks of the date by time
+
+        :param freq: group the ticks by the pandas freq, e.g. 1min, None means by every tick time
+        :return: generator of (timestamp, df indexed by entity_id and timestamp)
+        """
+        df = self.read(date, entity_ids=entity_ids, start_timestamp=start_timestamp, end_timestamp=end_timestamp)
+        if not pd_is_not_null(df):
+            return
+        keys = df["timestamp"].dt.floor(freq) if freq else df["timestamp"]
+        for timestamp, batch_df in df.groupby(keys, sort=True):
+            yield timestamp, batch_df.set_index(["entity_id", "timestamp"], drop=False)
+
+    def replay(
+        self,
+        date,
+        listeners: List[DataListener],
+        entity_ids: List[str] = None,
+        start_timestamp=None,
+        end_timestamp=None,
+        freq=None,
+    ) -> int:
+        """
+        replay the ticks of the date to the listeners in time order, the first batch is notified by on_data_loaded,
+        the others are notified by on_entity_data_changed for every entity and then on_data_changed with the batch
+
+        The batches are the raw ticks with the columns of :data:`TICK_DTYPE` instead of the schema of the listener,
+        so the listeners should be the :class:`~zvt.contract.reader.DataListener` handling the ticks, e.g. the tick
+        strategies. :class:`~zvt.contract.factor.Factor` and its online accumulators handle the kdata columns and
+        compute nothing from the ticks, aggregate the ticks to the kdata for them.
+
+        :param date: the date of the journal
+        :param listeners: the listeners handling the ticks
+        :return: replayed batch count
+        """
+        count = 0
+        for _, batch_df in self.iter_batches(
+            date, entity_ids=entity_ids, start_timestamp=start_timestamp, end_timestamp=end_timestamp, freq=freq
+        ):
+            for listener in listeners:
+                if count == 0:
+                    listener.on_data_loaded(batch_df)
+                else:
+                    for entity_id, added_df in batch_df.groupby(level=0):
+                        listener.on_entity_data_changed(entity=entity_id, added_data=added_df)
+                    listener.on_data_changed(batch_df)
+            count = count + 1
+        return count
+
+
+# the __all__ is generated
+__all__ = ["TICK_DTYPE", "get_journal_dir", "to_tick_records", "TickJournalWriter", "TickJournalReader"]
@@ -206,3 +206,9 @@ from .block import *
 from .block import __all__ as _block_all
 
 __all__ += _block_all
+
+# import all from submodule adjust_factor
+from .adjust_factor import *
+from .adjust_factor import __all__ as _adjust_factor_all
+
+__all__ += _adjust_factor_all
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from sqlalchemy import Column, String, Float
+from sqlalchemy.orm import declarative_base
+
+from zvt.contract import Mixin
+from zvt.contract.register import register_schema
+
+AdjustFactorBase = declarative_base()
+
+
+class AdjustFactor(AdjustFactorBase, Mixin):
+    """
+    复权因子, 只在除权除息日记录一条, timestamp为生效日
+
+    hfq price = bfq price * hfq_factor
+    qfq price = bfq price * hfq_factor / latest hfq_factor
+    """
+
+    __tablename__ = "adjust_factor"
+
+    provider = Column(String(length=32))
+    code = Column(String(length=32))
+    #: 后复权因子(累计)
+    hfq_factor = Column(Float)
+
+
+register_schema(providers=["em"], db_name="adjust_factor", schema_base=AdjustFactorBase)
+
+
+# the __all__ is generated
+__all__ = ["AdjustFactor"]
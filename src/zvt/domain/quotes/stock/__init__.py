@@ -128,3 +128,57 @@ from .stock_quote_log import *
 from .stock_quote_log import __all__ as _stock_quote_log_all
 
 __all__ += _stock_quote_log_all
+
+# import all from submodule stock_15m_bfq_kdata
+from .stock_15m_bfq_kdata import *
+from .stock_15m_bfq_kdata import __all__ as _stock_15m_bfq_kdata_all
+
+__all__ += _stock_15m_bfq_kdata_all
+
+# import all from submodule stock_1d_bfq_kdata
+from .stock_1d_bfq_kdata import *
+from .stock_1d_bfq_kdata import __all__ as _stock_1d_bfq_kdata_all
+
+__all__ += _stock_1d_bfq_kdata_all
+
+# import all from submodule stock_1h_bfq_kdata
+from .stock_1h_bfq_kdata import *
+from .stock_1h_bfq_kdata import __all__ as _stock_1h_bfq_kdata_all
+
+__all__ += _stock_1h_bfq_kdata_all
+
+# import all from submodule stock_1m_bfq_kdata
+from .stock_1m_bfq_kdata import *
+from .stock_1m_bfq_kdata import __all__ as _stock_1m_bfq_kdata_all
+
+__all__ += _stock_1m_bfq_kdata_all
+
+# import all from submodule stock_1mon_bfq_kdata
+from .stock_1mon_bfq_kdata import *
+from .stock_1mon_bfq_kdata import __all__ as _stock_1mon_bfq_kdata_all
+
+__all__ += _stock_1mon_bfq_kdata_all
+
+# import all from submodule stock_1wk_bfq_kdata
+from .stock_1wk_bfq_kdata import *
+from .stock_1wk_bfq_kdata import __all__ as _stock_1wk_bfq_kdata_all
+
+__all__ += _stock_1wk_bfq_kdata_all
+
+# import all from submodule stock_30m_bfq_kdata
+from .stock_30m_bfq_kdata import *
+from .stock_30m_bfq_kdata import __all__ as _stock_30m_bfq_kdata_all
+
+__all__ += _stock_30m_bfq_kdata_all
+
+# import all from submodule stock_4h_bfq_kdata
+from .stock_4h_bfq_kdata import *
+from .stock_4h_bfq_kdata import __all__ as _stock_4h_bfq_kdata_all
+
+__all__ += _stock_4h_bfq_kdata_all
+
+# import all from submodule stock_5m_bfq_kdata
+from .stock_5m_bfq_kdata import *
+from .stock_5m_bfq_kdata import __all__ as _stock_5m_bfq_kdata_all
+
+__all__ += _stock_5m_bfq_kdata_all
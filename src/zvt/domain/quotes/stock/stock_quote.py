@@ -7,6 +7,7 @@ from zvt.contract.register import register_schema
 from zvt.domain.quotes import StockKdataCommon
 
 StockQuoteBase = declarative_base()
+Stock1mQuoteBase = declarative_base()
 
 
 class StockQuote(StockQuoteBase, StockKdataCommon):
@@ -29,7 +30,7 @@ class StockQuote(StockQuoteBase, StockKdataCommon):
     total_cap = Column(Float)
 
 
-class Stock1mQuote(StockQuoteBase, Mixin):
+class Stock1mQuote(Stock1mQuoteBase, Mixin):
     __tablename__ = "stock_1m_quote"
     code = Column(String(length=32))
     name = Column(String(length=32))
@@ -56,7 +57,16 @@ class Stock1mQuote(StockQuoteBase, Mixin):
     is_limit_down = Column(Boolean)
 
 
-register_schema(providers=["qmt"], db_name="stock_quote", schema_base=StockQuoteBase, entity_type="stock")
+register_schema(
+    providers=["qmt"], db_name="stock_quote", schema_base=StockQuoteBase, entity_type="stock", partition_by_day=True
+)
+register_schema(
+    providers=["qmt"],
+    db_name="stock_1m_quote",
+    schema_base=Stock1mQuoteBase,
+    entity_type="stock",
+    partition_by_day=True,
+)
 
 
 # the __all__ is generated
@@ -25,3 +25,9 @@ from .stockhk_quote import *
 from .stockhk_quote import __all__ as _stockhk_quote_all
 
 __all__ += _stockhk_quote_all
+
+# import all from submodule stockhk_1d_bfq_kdata
+from .stockhk_1d_bfq_kdata import *
+from .stockhk_1d_bfq_kdata import __all__ as _stockhk_1d_bfq_kdata_all
+
+__all__ += _stockhk_1d_bfq_kdata_all
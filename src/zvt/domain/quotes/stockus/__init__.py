@@ -25,3 +25,9 @@ from .stockus_1d_hfq_kdata import *
 from .stockus_1d_hfq_kdata import __all__ as _stockus_1d_hfq_kdata_all
 
 __all__ += _stockus_1d_hfq_kdata_all
+
+# import all from submodule stockus_1d_bfq_kdata
+from .stockus_1d_bfq_kdata import *
+from .stockus_1d_bfq_kdata import __all__ as _stockus_1d_bfq_kdata_all
+
+__all__ += _stockus_1d_bfq_kdata_all
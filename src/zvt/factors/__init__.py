@@ -78,3 +78,15 @@ from .shape import *
 from .shape import __all__ as _shape_all
 
 __all__ += _shape_all
+
+# import all from submodule online
+from .online import *
+from .online import __all__ as _online_all
+
+__all__ += _online_all
+
+# import all from submodule cross_section
+from .cross_section import *
+from .cross_section import __all__ as _cross_section_all
+
+__all__ += _cross_section_all
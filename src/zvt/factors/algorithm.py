@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
 
+import numpy as np
 import pandas as pd
 
 from zvt.contract.factor import Scorer, Transformer
-from zvt.utils.pd_utils import normal_index_df, group_by_entity_id, normalize_group_compute_result
+from zvt.factors.cross_section import cs_rank, cs_quantile
+from zvt.utils.pd_utils import group_by_entity_id, normalize_group_compute_result
 
 
 def ma(s: pd.Series, window: int = 5) -> pd.Series:
@@ -138,12 +140,45 @@ def intersect(range_a, range_b):
     return None
 
 
+def rolling_overlap(input_df: pd.DataFrame, window: int) -> pd.DataFrame:
+    """
+    the overlap of the (low, high) ranges of the last window bars, which is (rolling max of low, rolling min of high)
+
+    :param input_df: normal df with columns low and high
+    :param window: bar count
+    :return: df with columns overlap_low and overlap_high, NaN if no overlap or not enough bars
+    """
+    low = normalize_group_compute_result(
+        group_by_entity_id(input_df["low"]).rolling(window=window, min_periods=window).max()
+    )
+    high = normalize_group_compute_result(
+        group_by_entity_id(input_df["high"]).rolling(window=window, min_periods=window).min()
+    )
+    has_overlap = low <= high
+    return pd.DataFrame({"overlap_low": low.where(has_overlap), "overlap_high": high.where(has_overlap)})
+
+
+def get_overlap(df: pd.DataFrame) -> pd.Series:
+    """
+    the overlap in tuple form (low, high) from the columns overlap_low and overlap_high, (0, 0) if no overlap
+
+    :param df: df with columns overlap_low and overlap_high
+    :return: series of the tuples
+    """
+    has_overlap = df["overlap_low"].notna()
+    tuples = [
+        (low, high) if valid else (0, 0)
+        for low, high, valid in zip(df["overlap_low"].to_list(), df["overlap_high"].to_list(), has_overlap.to_list())
+    ]
+    return pd.Series(tuples, index=df.index, name="overlap")
+
+
 class RankScorer(Scorer):
     def __init__(self, ascending=True) -> None:
         self.ascending = ascending
 
     def score(self, input_df) -> pd.DataFrame:
-        result_df = input_df.groupby(level=1).rank(ascending=self.ascending, pct=True)
+        result_df = cs_rank(input_df, ascending=self.ascending, pct=True)
         return result_df
 
 
@@ -202,21 +237,10 @@ class IntersectTransformer(Transformer):
         :return:
         """
         if self.kdata_overlap > 0:
-            # 没有重叠，区间就是(0,0)
-            input_df["overlap"] = [(0, 0)] * len(input_df.index)
-
-            def cal_overlap(s):
-                high = input_df.loc[s.index, "high"]
-                low = input_df.loc[s.index, "low"]
-                intersection = intersect_ranges(list(zip(low.to_list(), high.to_list())))
-                if intersection:
-                    # 设置column overlap为intersection,即重叠区间
-                    input_df.at[s.index[-1], "overlap"] = intersection
-                return 0
-
-            input_df[["high", "low"]].groupby(level=0).rolling(
-                window=self.kdata_overlap, min_periods=self.kdata_overlap
-            ).apply(cal_overlap, raw=False)
+            #: 没有重叠，区间就是NaN, get_overlap could get the tuple form
+            overlap_df = rolling_overlap(input_df, window=self.kdata_overlap)
+            input_df["overlap_low"] = overlap_df["overlap_low"]
+            input_df["overlap_high"] = overlap_df["overlap_high"]
 
         return input_df
 
@@ -249,19 +273,10 @@ class MaAndVolumeTransformer(Transformer):
             input_df[col] = vol_ma_df
 
         if self.kdata_overlap > 0:
-            input_df["overlap"] = [(0, 0)] * len(input_df.index)
-
-            def cal_overlap(s):
-                high = input_df.loc[s.index, "high"]
-                low = input_df.loc[s.index, "low"]
-                intersection = intersect_ranges(list(zip(low.to_list(), high.to_list())))
-                if intersection:
-                    input_df.at[s.index[-1], "overlap"] = intersection
-                return 0
-
-            input_df[["high", "low"]].groupby(level=0).rolling(
-                window=self.kdata_overlap, min_periods=self.kdata_overlap
-            ).apply(cal_overlap, raw=False)
+            #: 没有重叠，区间就是NaN, get_overlap could get the tuple form
+            overlap_df = rolling_overlap(input_df, window=self.kdata_overlap)
+            input_df["overlap_low"] = overlap_df["overlap_low"]
+            input_df["overlap_high"] = overlap_df["overlap_high"]
 
         return input_df
 
@@ -310,52 +325,29 @@ class MacdTransformer(Transformer):
 
 class QuantileScorer(Scorer):
     def __init__(self, score_levels=[0, 0.1, 0.3, 0.5, 0.7, 0.9, 1.0]) -> None:
-        self.score_levels = score_levels
-
-    def score(self, input_df):
-        self.score_levels.sort(reverse=True)
-
-        quantile_df = input_df.groupby(level=1).quantile(self.score_levels)
-        quantile_df.index.names = [self.time_field, "score_result"]
-
-        self.logger.info("factor:{},quantile:\n{}".format(self.factor_name, quantile_df))
-
-        result_df = input_df.copy()
-        result_df.reset_index(inplace=True, level="entity_id")
-        result_df["quantile"] = None
-        for timestamp in quantile_df.index.levels[0]:
-            length = len(result_df.loc[result_df.index == timestamp, "quantile"])
-            result_df.loc[result_df.index == timestamp, "quantile"] = [quantile_df.loc[timestamp].to_dict()] * length
-
-        self.logger.info("factor:{},df with quantile:\n{}".format(self.factor_name, result_df))
-
-        # result_df = result_df.set_index(['entity_id'], append=True)
-        # result_df = result_df.sort_index(level=[0, 1])
-        #
-        # self.logger.info(result_df)
-        #
-        def calculate_score(df, factor_name, quantile):
-            original_value = df[factor_name]
-            score_map = quantile.get(factor_name)
-            min_score = self.score_levels[-1]
-
-            if original_value < score_map.get(min_score):
-                return 0
-
-            for score in self.score_levels[:-1]:
-                if original_value >= score_map.get(score):
-                    return score
+        super().__init__()
+        self.score_levels = sorted(score_levels)
 
-        for factor in input_df.columns.to_list():
-            result_df[factor] = result_df.apply(lambda x: calculate_score(x, factor, x["quantile"]), axis=1)
+    def score(self, input_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        score every column by the quantiles in the cross section of every timestamp,
+        the score is the max level whose quantile <= the value, the values under the second lowest quantile are NaN
 
-        result_df = result_df.reset_index()
-        result_df = normal_index_df(result_df)
-        result_df = result_df.loc[:, self.factors]
+        :param input_df: normal df
+        :return: df with the same index and columns
+        """
+        input_df = input_df.loc[~input_df.index.duplicated(keep="first")]
+        levels = np.array(self.score_levels)
 
-        result_df = result_df.loc[~result_df.index.duplicated(keep="first")]
+        quantile_df = cs_quantile(input_df, levels=self.score_levels)
+        self.logger.info("quantile:\n{}".format(quantile_df.drop_duplicates()))
 
-        self.logger.info("factor:{},df:\n{}".format(self.factor_name, result_df))
+        result_df = pd.DataFrame(index=input_df.index)
+        for col in input_df.columns:
+            values = input_df[col].to_numpy(dtype=float)
+            # the quantiles are non-decreasing with the level, so the count of passed levels is the bucket
+            bucket = (values[:, None] >= quantile_df[col].to_numpy()[:, 1:]).sum(axis=1)
+            result_df[col] = np.where(bucket > 0, levels[bucket], np.nan)
 
         return result_df
 
@@ -371,6 +363,8 @@ __all__ = [
     "combine",
     "distance",
     "intersect",
+    "rolling_overlap",
+    "get_overlap",
     "RankScorer",
     "MaTransformer",
     "IntersectTransformer",
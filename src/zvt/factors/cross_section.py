@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+from typing import List, Union
+
+import numpy as np
+import pandas as pd
+
+from zvt.domain import Block, BlockCategory, BlockStock
+from zvt.utils.pd_utils import pd_is_not_null
+
+#: the cross-sectional utils work on the normal df with index (entity_id, timestamp) and group by the timestamp level
+
+
+def cs_rank(df: Union[pd.DataFrame, pd.Series], ascending: bool = True, pct: bool = True):
+    """
+    rank in the cross section of every timestamp
+
+    :param df: normal df or series
+    :param ascending: ascending
+    :param pct: rank in percentile
+    :return: the ranks with the same index
+    """
+    return df.groupby(level=1).rank(ascending=ascending, pct=pct)
+
+
+def cs_zscore(df: Union[pd.DataFrame, pd.Series], ddof: int = 1):
+    """
+    (value - mean) / std in the cross section of every timestamp
+
+    :param df: normal df or series
+    :param ddof: delta degrees of freedom of std
+    :return: the z-scores with the same index
+    """
+    g = df.groupby(level=1)
+    return (df - g.transform("mean")) / g.transform("std", ddof=ddof)
+
+
+def cs_winsorize(df: Union[pd.DataFrame, pd.Series], lower: float = 0.01, upper: float = 0.99):
+    """
+    clip the values to the quantiles in the cross section of every timestamp
+
+    :param df: normal df or series
+    :param lower: lower quantile
+    :param upper: upper quantile
+    :return: the clipped values with the same index
+    """
+    g = df.groupby(level=1)
+    return df.clip(lower=g.transform("quantile", lower), upper=g.transform("quantile", upper), axis=0)
+
+
+def cs_quantile(df: pd.DataFrame, levels: List[float]) -> pd.DataFrame:
+    """
+    the quantiles of every column in the cross section of every timestamp, aligned to the rows of df
+
+    :param df: normal df
+    :param levels: quantile levels
+    :return: df with columns (column, level), its rows are aligned to the rows of df by timestamp
+    """
+    quantile_df = df.groupby(level=1).quantile(levels)
+    quantile_df.index.names = [quantile_df.index.names[0], "level"]
+    # timestamp x (column, level), then align to the rows
+    quantile_df = quantile_df.unstack(level="level")
+    return quantile_df.reindex(df.index.get_level_values(1))
+
+
+def get_industry_map(
+    entity_ids: List[str] = None, provider: str = "em", category: str = BlockCategory.industry.value
+) -> pd.Series:
+    """
+    get the industry of the stocks by :class:`~zvt.domain.meta.block_meta.BlockStock` membership,
+    the first one is used if the stock belongs to more than one block of the category
+
+    :param entity_ids: stock ids, None means all
+    :param provider: the provider of the blocks
+    :param category: block category
+    :return: series of stock_id -> block id
+    """
+    block_ids = Block.query_data(
+        provider=provider, columns=[Block.entity_id], filters=[Block.category == category], return_type="df"
+    )
+    if not pd_is_not_null(block_ids):
+        return pd.Series(dtype=object)
+
+    filters = []
+    if entity_ids is not None:
+        filters.append(BlockStock.stock_id.in_(entity_ids))
+    df = BlockStock.query_data(
+        provider=provider,
+        entity_ids=block_ids["entity_id"].tolist(),
+        columns=[BlockStock.entity_id, BlockStock.stock_id],
+        filters=filters,
+        order=BlockStock.entity_id.asc(),
+    )
+    if not pd_is_not_null(df):
+        return pd.Series(dtype=object)
+    df = df.drop_duplicates(subset=["stock_id"], keep="first")
+    return df.set_index("stock_id")["entity_id"].rename("industry")
+
+
+def cs_neutralize(df: Union[pd.DataFrame, pd.Series], groups: pd.Series):
+    """
+    subtract the mean of the group in the cross section of every timestamp, e.g. industry neutralize
+
+    :param df: normal df or series
+    :param groups: entity_id -> group, the entities not in groups are kept as they are
+    :return: the neutralized values with the same index
+    """
+    group_values = df.index.get_level_values(0).map(groups)
+    keys = [df.index.get_level_values(1), np.asarray(group_values, dtype=object)]
+    group_mean = df.groupby(keys, dropna=False).transform("mean")
+    has_group = np.asarray(pd.notna(group_values))
+    if isinstance(df, pd.DataFrame):
+        return df - group_mean.mul(has_group, axis=0)
+    return df - group_mean * has_group
+
+
+def industry_neutralize(df: Union[pd.DataFrame, pd.Series], provider: str = "em"):
+    """
+    neutralize by the industry blocks, see :func:`get_industry_map` and :func:`cs_neutralize`
+
+    :param df: normal df or series
+    :param provider: the provider of the blocks
+    :return: the neutralized values with the same index
+    """
+    industry_map = get_industry_map(entity_ids=df.index.get_level_values(0).unique().tolist(), provider=provider)
+    return cs_neutralize(df, industry_map)
+
+
+# the __all__ is generated
+__all__ = [
+    "cs_rank",
+    "cs_zscore",
+    "cs_winsorize",
+    "cs_quantile",
+    "get_industry_map",
+    "cs_neutralize",
+    "industry_neutralize",
+]
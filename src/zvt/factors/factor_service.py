@@ -2,6 +2,7 @@
 import pandas as pd
 
 from zvt.contract import zvt_context
+from zvt.contract.registry_manifest import load_factors
 from zvt.domain import Stock
 from zvt.factors.factor_models import FactorRequestModel
 from zvt.factors.technical_factor import TechnicalFactor
@@ -13,6 +14,7 @@ def query_factor_result(factor_request_model: FactorRequestModel):
     entity_ids = factor_request_model.entity_ids
     level = factor_request_model.level
 
+    load_factors()
     factor: TechnicalFactor = zvt_context.factor_cls_registry[factor_name](
         provider="em",
         entity_provider="em",
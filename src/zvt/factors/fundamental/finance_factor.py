@@ -1,6 +1,4 @@
 # -*- coding: utf-8 -*-
-import operator
-from itertools import accumulate
 from typing import List, Union, Type
 
 import pandas as pd
@@ -9,6 +7,25 @@ from zvt.contract import IntervalLevel, Mixin, TradableEntity
 from zvt.contract.factor import Factor, Transformer, Accumulator
 from zvt.domain import FinanceFactor, BalanceSheet, Stock
 
+#: the multiplier of the threshold of the indicators accumulated in the year, e.g. roe
+REPORT_PERIOD_MULTIPLIER = {"year": 4, "season3": 3, "half_year": 2}
+
+
+def period_threshold_filter(df: pd.DataFrame, col_period_threshold: dict) -> pd.Series:
+    """
+    whether the reports pass the thresholds, the threshold is the quarter value and multiplied by the report period,
+    e.g. roe >= 0.02 for season1, roe >= 0.04 for half_year, roe >= 0.08 for year
+
+    :param df: df with column report_period and the columns of col_period_threshold
+    :param col_period_threshold: column -> quarter threshold
+    :return: bool series with the same index
+    """
+    mul = df["report_period"].map(REPORT_PERIOD_MULTIPLIER).fillna(1)
+    passed = pd.Series(True, index=df.index)
+    for col, threshold in col_period_threshold.items():
+        passed &= df[col] >= mul * threshold
+    return passed
+
 
 class FinanceBaseFactor(Factor):
     def __init__(
@@ -167,35 +184,17 @@ class GoodCompanyFactor(FinanceBaseFactor):
         )
 
     def compute_factor(self):
-        def filter_df(df):
-            se = pd.Series(index=df.index)
-            for index, row in df.iterrows():
-
-                if row.report_period == "year":
-                    mul = 4
-                elif row.report_period == "season3":
-                    mul = 3
-                elif row.report_period == "half_year":
-                    mul = 2
-                else:
-                    mul = 1
-
-                filters = []
-                for col in self.col_period_threshold:
-                    col_se = eval(f"row.{col}")
-                    filters.append(col_se >= mul * self.col_period_threshold[col])
-                se[index] = list(accumulate(filters, func=operator.__and__))[-1]
-
-            return se
-
         if self.col_period_threshold:
-            self.factor_df = self.data_df.loc[lambda df: filter_df(df), :]
+            passed = period_threshold_filter(self.data_df, self.col_period_threshold)
+        else:
+            passed = pd.Series(True, index=self.data_df.index)
 
-        self.factor_df = pd.DataFrame(index=self.data_df.index, columns=["count"], data=1)
+        # count the passed reports in the window
+        self.factor_df = pd.DataFrame(index=self.data_df.index, columns=["count"], data=passed.astype(float).values)
 
         self.factor_df = self.factor_df.reset_index(level=1)
 
-        self.factor_df = self.factor_df.groupby(level=0).rolling(window=self.window, on=self.time_field).count()
+        self.factor_df = self.factor_df.groupby(level=0).rolling(window=self.window, on=self.time_field).sum()
 
         self.factor_df = self.factor_df.reset_index(level=0, drop=True)
         self.factor_df = self.factor_df.set_index(self.time_field, append=True)
@@ -227,4 +226,4 @@ if __name__ == "__main__":
 
 
 # the __all__ is generated
-__all__ = ["FinanceBaseFactor", "GoodCompanyFactor"]
+__all__ = ["period_threshold_filter", "FinanceBaseFactor", "GoodCompanyFactor"]
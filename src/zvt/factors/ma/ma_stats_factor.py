@@ -32,7 +32,7 @@ class MaStatsAccumulator(Accumulator):
         if pd_is_not_null(acc_df):
             df = df[df.index > acc_df.index[-1]]
             if pd_is_not_null(df):
-                self.logger.info(f'compute from {df.iloc[0]["timestamp"]}')
+                self.logger.info(f"compute from {df.index[0]}")
                 acc_df = pd.concat([acc_df, df])
             else:
                 self.logger.info("no need to compute")
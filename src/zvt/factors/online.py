@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+import math
+from collections import deque
+from typing import Dict
+
+from zvt.contract.factor import OnlineIndicator, OnlineAccumulator
+
+
+def _is_nan(value) -> bool:
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+class OnlineSma(OnlineIndicator):
+    """
+    the same as s.rolling(window=window, min_periods=window).mean(), the value is None if any NaN in the window
+    """
+
+    def __init__(self, window: int) -> None:
+        super().__init__()
+        self.window = window
+        self.values = deque(maxlen=window)
+        #: the sum of the valid values in the window
+        self.total = 0.0
+        #: the NaN count in the window
+        self.nan_count = 0
+        #: the updates since total recomputed
+        self.update_count = 0
+
+    def _recompute(self):
+        # drop the float error accumulated by the incremental total
+        self.total = math.fsum(value for value in self.values if not _is_nan(value))
+        self.nan_count = sum(1 for value in self.values if _is_nan(value))
+        self.update_count = 0
+
+    def update(self, x: float):
+        if len(self.values) == self.window:
+            if _is_nan(self.values[0]):
+                self.nan_count -= 1
+            else:
+                self.total -= self.values[0]
+        self.values.append(x)
+        if _is_nan(x):
+            self.nan_count += 1
+        else:
+            self.total += x
+
+        self.update_count += 1
+        if self.update_count >= self.window:
+            self._recompute()
+
+        if len(self.values) == self.window and self.nan_count == 0:
+            self.value = self.total / self.window
+        else:
+            self.value = None
+        return self.value
+
+    def get_state(self) -> dict:
+        return {"value": self.value, "values": list(self.values), "total": self.total}
+
+    def set_state(self, state: dict):
+        super().set_state(state)
+        self.values = deque(state["values"], maxlen=self.window)
+        self._recompute()
+
+
+class OnlineEma(OnlineIndicator):
+    """
+    the same as s.ewm(span=window, adjust=False, min_periods=min_periods).mean()
+    """
+
+    def __init__(self, window: int, min_periods: int = None) -> None:
+        super().__init__()
+        self.window = window
+        self.alpha = 2 / (window + 1)
+        self.min_periods = window if min_periods is None else min_periods
+        self.count = 0
+        self.mean = None
+
+    def update(self, x: float):
+        if _is_nan(x):
+            # keep the mean as pandas with ignore_na=False does before the first valid value
+            return self.value
+        self.count += 1
+        if self.mean is None:
+            self.mean = x
+        else:
+            self.mean = self.alpha * x + (1 - self.alpha) * self.mean
+        self.value = self.mean if self.count >= self.min_periods else None
+        return self.value
+
+    def get_state(self) -> dict:
+        return {"value": self.value, "count": self.count, "mean": self.mean}
+
+    def set_state(self, state: dict):
+        super().set_state(state)
+        self.count = state["count"]
+        self.mean = state["mean"]
+
+
+class LiveDeadCounter(OnlineIndicator):
+    """
+    count the continuous live(1) or dead(-1) bars, positive for live and negative for dead
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.value = 0
+
+    def update(self, live: bool):
+        if live:
+            self.value = self.value + 1 if self.value > 0 else 1
+        else:
+            self.value = self.value - 1 if self.value < 0 else -1
+        return self.value
+
+
+class OnlineMacd(OnlineIndicator):
+    """
+    the same as :func:`~zvt.factors.algorithm.macd`, value is (diff, dea, macd)
+    """
+
+    def __init__(self, slow: int = 26, fast: int = 12, n: int = 9) -> None:
+        super().__init__()
+        self.ema_slow = OnlineEma(window=slow)
+        self.ema_fast = OnlineEma(window=fast)
+        self.ema_diff = OnlineEma(window=n, min_periods=0)
+        self.live_counter = LiveDeadCounter()
+
+    def update(self, x: float):
+        slow = self.ema_slow.update(x)
+        fast = self.ema_fast.update(x)
+        diff = None if slow is None or fast is None else fast - slow
+        dea = self.ema_diff.update(diff)
+        m = None if diff is None or dea is None else (diff - dea) * 2
+        self.live_counter.update(diff is not None and dea is not None and diff > dea)
+        self.value = (diff, dea, m)
+        return self.value
+
+    @property
+    def live_count(self) -> int:
+        return self.live_counter.value
+
+    def get_state(self) -> dict:
+        return {
+            "value": self.value,
+            "slow": self.ema_slow.get_state(),
+            "fast": self.ema_fast.get_state(),
+            "dea": self.ema_diff.get_state(),
+            "live_count": self.live_counter.get_state(),
+        }
+
+    def set_state(self, state: dict):
+        super().set_state(state)
+        self.ema_slow.set_state(state["slow"])
+        self.ema_fast.set_state(state["fast"])
+        self.ema_diff.set_state(state["dea"])
+        self.live_counter.set_state(state["live_count"])
+
+
+class OnlineMaAccumulator(OnlineAccumulator):
+    """
+    ma of close, ma of volume and the live/dead count of the fastest two ma
+    """
+
+    def __init__(self, windows=None, vol_windows=None) -> None:
+        super().__init__()
+        if windows is None:
+            windows = [5, 10]
+        if vol_windows is None:
+            vol_windows = [30]
+        self.windows = windows
+        self.vol_windows = vol_windows
+
+    def create_indicators(self) -> Dict[str, OnlineIndicator]:
+        indicators = {f"ma{window}": OnlineSma(window) for window in self.windows}
+        indicators.update({f"vol_ma{window}": OnlineSma(window) for window in self.vol_windows})
+        if len(self.windows) >= 2:
+            indicators["live_count"] = LiveDeadCounter()
+        return indicators
+
+    def update_indicators(self, indicators: Dict[str, OnlineIndicator], row) -> dict:
+        result = {f"ma{window}": indicators[f"ma{window}"].update(row.close) for window in self.windows}
+        for window in self.vol_windows:
+            result[f"vol_ma{window}"] = indicators[f"vol_ma{window}"].update(row.volume)
+        if len(self.windows) >= 2:
+            fast, slow = result[f"ma{self.windows[0]}"], result[f"ma{self.windows[1]}"]
+            live = fast is not None and slow is not None and fast > slow
+            result["live"] = 1 if live else -1
+            result["live_count"] = indicators["live_count"].update(live)
+        return result
+
+
+class OnlineMacdAccumulator(OnlineAccumulator):
+    """
+    the same as :func:`~zvt.factors.algorithm.macd` with count_live_dead
+    """
+
+    def __init__(self, slow=26, fast=12, n=9) -> None:
+        super().__init__()
+        self.slow = slow
+        self.fast = fast
+        self.n = n
+
+    def create_indicators(self) -> Dict[str, OnlineIndicator]:
+        return {"macd": OnlineMacd(slow=self.slow, fast=self.fast, n=self.n)}
+
+    def update_indicators(self, indicators: Dict[str, OnlineIndicator], row) -> dict:
+        online_macd: OnlineMacd = indicators["macd"]
+        diff, dea, m = online_macd.update(row.close)
+        return {
+            "diff": diff,
+            "dea": dea,
+            "macd": m,
+            "live": 1 if online_macd.live_count > 0 else -1,
+            "bull": diff is not None and dea is not None and diff > 0 and dea > 0,
+            "live_count": online_macd.live_count,
+        }
+
+
+# the __all__ is generated
+__all__ = [
+    "OnlineSma",
+    "OnlineEma",
+    "LiveDeadCounter",
+    "OnlineMacd",
+    "OnlineMaAccumulator",
+    "OnlineMacdAccumulator",
+]
@@ -3,10 +3,12 @@ from enum import Enum
 from itertools import accumulate
 from typing import List, Optional
 
+import numpy as np
 import pandas as pd
 from pandas import DataFrame
 
 from zvt.contract import IntervalLevel
+from zvt.contract.data_hub import data_hub
 from zvt.contract.factor import Factor
 from zvt.domain.meta.stock_meta import Stock
 from zvt.utils.pd_utils import index_df, pd_is_not_null, is_filter_result_df, is_score_result_df
@@ -68,15 +70,16 @@ class TargetSelector(object):
         self.open_short_df: Optional[DataFrame] = None
         self.keep_df: Optional[DataFrame] = None
 
-        self.init_factors(
-            entity_ids=entity_ids,
-            entity_schema=entity_schema,
-            exchanges=exchanges,
-            codes=codes,
-            start_timestamp=start_timestamp,
-            end_timestamp=end_timestamp,
-            level=self.level,
-        )
+        with data_hub.sharing():
+            self.init_factors(
+                entity_ids=entity_ids,
+                entity_schema=entity_schema,
+                exchanges=exchanges,
+                codes=codes,
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                level=self.level,
+            )
 
     def init_factors(self, entity_ids, entity_schema, exchanges, codes, start_timestamp, end_timestamp, level):
         pass
@@ -101,16 +104,20 @@ class TargetSelector(object):
         if self.factors:
             filters = []
             scores = []
+            timestamps = self.get_result_timestamps()
             for factor in self.factors:
-                if is_filter_result_df(factor.result_df):
-                    df = factor.result_df[["filter_result"]]
+                result_df = factor.result_df
+                if factor.keep_all_timestamp:
+                    result_df = factor.get_result_df_asof(timestamps)
+                if is_filter_result_df(result_df):
+                    df = result_df[["filter_result"]]
                     if pd_is_not_null(df):
                         df.columns = ["score"]
                         filters.append(df)
                     else:
                         raise Exception("no data for factor:{},{}".format(factor.name, factor))
-                if is_score_result_df(factor.result_df):
-                    df = factor.result_df[["score_result"]]
+                if is_score_result_df(result_df):
+                    df = result_df[["score_result"]]
                     if pd_is_not_null(df):
                         df.columns = ["score"]
                         scores.append(df)
@@ -128,6 +135,27 @@ class TargetSelector(object):
 
         self.generate_targets()
 
+    def get_result_timestamps(self) -> pd.DatetimeIndex:
+        """
+        the timestamps the results of keep_all_timestamp factors resolved at, which are the timestamps of the other
+        factors, or every period of the level if all the factors keep all timestamp
+        """
+        timestamps = [
+            factor.result_df.index.get_level_values(1)
+            for factor in self.factors
+            if not factor.keep_all_timestamp and pd_is_not_null(factor.result_df)
+        ]
+        if timestamps:
+            return pd.DatetimeIndex(np.concatenate([t.to_numpy() for t in timestamps])).unique().sort_values()
+
+        starts = [
+            factor.result_df.index.get_level_values(1).min()
+            for factor in self.factors
+            if pd_is_not_null(factor.result_df)
+        ]
+        start_timestamp = getattr(self, "start_timestamp", None) or (min(starts) if starts else self.end_timestamp)
+        return pd.date_range(start_timestamp, self.end_timestamp, freq=self.level.to_pd_freq())
+
     def get_targets(self, timestamp, trade_type: TradeType = TradeType.open_long) -> List[str]:
         if trade_type == TradeType.open_long:
             df = self.open_long_df
@@ -38,6 +38,11 @@ class TechnicalFactor(Factor, metaclass=FactorMeta):
         clear_state: bool = False,
         only_load_factor: bool = False,
         adjust_type: Union[AdjustType, str] = None,
+        compact: Union[bool, dict] = None,
+        chunk_size: int = None,
+        keep_result: bool = None,
+        workers: int = None,
+        online: bool = None,
     ) -> None:
         if columns is None:
             columns = [
@@ -95,6 +100,11 @@ class TechnicalFactor(Factor, metaclass=FactorMeta):
             factor_name,
             clear_state,
             only_load_factor,
+            compact=compact,
+            chunk_size=chunk_size,
+            keep_result=keep_result,
+            workers=workers,
+            online=online,
         )
 
     def drawer_sub_df_list(self) -> Optional[List[pd.DataFrame]]:
@@ -83,7 +83,7 @@ def compute_vol_up_stocks(target_date, provider="em", adjust_type=AdjustType.qfq
         kdata_schema.turnover_rate >= turnover_rate_threshold,
     ]
     kdata_df = kdata_schema.query_data(
-        provider=provider, filters=filters, columns=["entity_id", "timestamp"], index="entity_id"
+        provider=provider, filters=filters, columns=["entity_id", "timestamp"], index="entity_id", engine="analytic"
     )
     if current_entity_pool:
         current_entity_pool = set(current_entity_pool) & set(kdata_df.index.tolist())
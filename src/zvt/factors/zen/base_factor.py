@@ -188,7 +188,7 @@ class ZenAccumulator(Accumulator):
         if pd_is_not_null(acc_df):
             df = df[df.index > acc_df.index[-1]]
             if pd_is_not_null(df):
-                self.logger.info(f'compute from {df.iloc[0]["timestamp"]}')
+                self.logger.info(f"compute from {df.index[0]}")
                 # 遍历的开始位置
                 start_index = len(acc_df)
 
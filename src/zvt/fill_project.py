@@ -17,7 +17,7 @@ def gen_kdata_schemas():
         levels=[
             level for level in IntervalLevel if level not in (IntervalLevel.LEVEL_L2_QUOTE, IntervalLevel.LEVEL_TICK)
         ],
-        adjust_types=[None, AdjustType.hfq],
+        adjust_types=[None, AdjustType.hfq, AdjustType.bfq],
         entity_in_submodule=True,
     )
     # 中国期货
@@ -35,7 +35,7 @@ def gen_kdata_schemas():
         providers=["em"],
         entity_type="stockus",
         levels=[IntervalLevel.LEVEL_1DAY],
-        adjust_types=[None, AdjustType.hfq],
+        adjust_types=[None, AdjustType.hfq, AdjustType.bfq],
         entity_in_submodule=True,
     )
     # 美指
@@ -53,7 +53,7 @@ def gen_kdata_schemas():
         providers=["em"],
         entity_type="stockhk",
         levels=[IntervalLevel.LEVEL_1DAY],
-        adjust_types=[None, AdjustType.hfq],
+        adjust_types=[None, AdjustType.hfq, AdjustType.bfq],
         entity_in_submodule=True,
     )
 
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 
-from zvt.api.kdata import get_kdata_schema, get_kdata
+from zvt.api.kdata import get_kdata_schema, get_kdata, to_adjust_factor_df, has_adjust_change, has_adjust_factors
 from zvt.api.selector import get_entity_ids_by_filter
 from zvt.contract import IntervalLevel, AdjustType
 from zvt.contract.api import df_to_db
@@ -21,6 +21,7 @@ from zvt.domain import (
     Currency,
     CurrencyKdataCommon,
     IndexhkKdataCommon,
+    AdjustFactor,
 )
 from zvt.domain.meta.indexhk_meta import Indexhk
 from zvt.domain.meta.stockhk_meta import Stockhk
@@ -86,13 +87,19 @@ class BaseEMStockKdataRecorder(FixedCycleDataRecorder):
         )
 
     def need_redownload_qfq(self, entity_id, df):
-        if self.adjust_type == AdjustType.qfq and pd_is_not_null(df):
+        # get_kdata computes qfq from bfq kdata and the adjust factors once they're recorded
+        if (
+            self.adjust_type == AdjustType.qfq
+            and pd_is_not_null(df)
+            and not has_adjust_factors(entity_id, self.provider)
+        ):
             datas = get_kdata(
                 entity_id=entity_id,
                 provider=self.provider,
                 limit=1,
                 level=self.level,
                 adjust_type=self.adjust_type,
+                adjust_on_read=False,
                 order=self.data_schema.timestamp.desc(),
                 return_type="domain",
             )
@@ -113,11 +120,49 @@ class BaseEMStockKdataRecorder(FixedCycleDataRecorder):
                     self.logger.warning(f"no data found for {entity_id} at {latest_kdata.timestamp}, 前复权检查失败")
         return False
 
+    def record_adjust_factor(self, entity_id, bfq_df, size):
+        """
+        record the adjust factor changes along with bfq kdata, so qfq/hfq could be computed on read
+        and no need to redownload the whole qfq kdata after ex-dividend date.
+        The hfq kdata is requested only for the first factor or the ex-dividend date found in bfq kdata
+        """
+        if self.adjust_type != AdjustType.bfq or self.level != IntervalLevel.LEVEL_1DAY or not pd_is_not_null(bfq_df):
+            return
+        start = bfq_df["timestamp"].min()
+        latest_factors = AdjustFactor.query_data(
+            provider=self.provider,
+            entity_id=entity_id,
+            filters=[AdjustFactor.timestamp < start],
+            order=AdjustFactor.timestamp.desc(),
+            limit=1,
+            return_type="domain",
+        )
+        if latest_factors:
+            pre_kdatas = self.data_schema.query_data(
+                provider=self.provider,
+                entity_id=entity_id,
+                filters=[self.data_schema.timestamp < start],
+                order=self.data_schema.timestamp.desc(),
+                limit=1,
+                return_type="domain",
+            )
+            if pre_kdatas and not has_adjust_change(bfq_df, pre_close=pre_kdatas[0].close):
+                return
+        hfq_df = em_api.get_kdata(
+            session=self.http_session, entity_id=entity_id, limit=size, adjust_type=AdjustType.hfq, level=self.level
+        )
+        latest_hfq_factor = latest_factors[0].hfq_factor if latest_factors else None
+        factor_df = to_adjust_factor_df(bfq_df=bfq_df, hfq_df=hfq_df, latest_hfq_factor=latest_hfq_factor)
+        if pd_is_not_null(factor_df):
+            df_to_db(df=factor_df, data_schema=AdjustFactor, provider=self.provider, force_update=False)
+
     def record(self, entity, start, end, size, timestamps):
         df = em_api.get_kdata(
             session=self.http_session, entity_id=entity.id, limit=size, adjust_type=self.adjust_type, level=self.level
         )
 
+        self.record_adjust_factor(entity.id, df, size)
+
         if self.need_redownload_qfq(entity.id, df):
             df = em_api.get_kdata(
                 session=self.http_session,
@@ -4,8 +4,10 @@ from fastapi.encoders import jsonable_encoder
 
 import zvt.contract as contract
 import zvt.contract.api as contract_api
+from zvt.rest.route import DbSessionRoute
 
 data_router = APIRouter(
+    route_class=DbSessionRoute,
     prefix="/api/data",
     tags=["data"],
     responses={404: {"description": "Not found"}},
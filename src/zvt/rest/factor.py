@@ -4,10 +4,13 @@ from typing import List
 from fastapi import APIRouter
 
 from zvt.contract import zvt_context
+from zvt.contract.registry_manifest import load_factors
 from zvt.factors import factor_service
 from zvt.factors.factor_models import FactorRequestModel, TradingSignalModel
+from zvt.rest.route import DbSessionRoute
 
 factor_router = APIRouter(
+    route_class=DbSessionRoute,
     prefix="/api/factor",
     tags=["factor"],
     responses={404: {"description": "Not found"}},
@@ -16,6 +19,7 @@ factor_router = APIRouter(
 
 @factor_router.get("/get_factors", response_model=List[str])
 def get_factors():
+    load_factors()
     return [name for name in zvt_context.factor_cls_registry.keys()]
 
 
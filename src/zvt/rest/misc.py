@@ -3,8 +3,10 @@ from fastapi import APIRouter
 
 from zvt.misc import misc_service
 from zvt.misc.misc_models import TimeMessage
+from zvt.rest.route import DbSessionRoute
 
 misc_router = APIRouter(
+    route_class=DbSessionRoute,
     prefix="/api/misc",
     tags=["misc"],
     responses={404: {"description": "Not found"}},
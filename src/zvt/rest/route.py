@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+import asyncio
+
+from fastapi.routing import APIRoute
+
+from zvt.contract.api import release_db_sessions
+
+
+class DbSessionRoute(APIRoute):
+    """
+    The sync endpoints are run in the reused threads of the pool, the thread local db sessions are removed after
+    every request in the same thread, so they don't keep the connections and the read transactions open.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs) -> None:
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = release_db_sessions(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+# the __all__ is generated
+__all__ = ["DbSessionRoute"]
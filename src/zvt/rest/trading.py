@@ -1,13 +1,15 @@
 import platform
 from typing import List, Optional
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, WebSocket
 from fastapi_pagination import Page
 
 import zvt.contract.api as contract_api
 import zvt.trading.trading_service as trading_service
 from zvt.common.trading_models import BuyParameter, SellParameter, TradingResult
+from zvt.rest.route import DbSessionRoute
 from zvt.tag.tag_schemas import MainTagInfo
+from zvt.trading.quote_stream import quote_stream_hub
 from zvt.trading.trading_models import (
     BuildTradingPlanModel,
     TradingPlanModel,
@@ -27,6 +29,7 @@ from zvt.trading.trading_models import (
 from zvt.trading.trading_schemas import QueryStockQuoteSetting
 
 trading_router = APIRouter(
+    route_class=DbSessionRoute,
     prefix="/api/trading",
     tags=["trading"],
     # dependencies=[Depends(get_current_user)],
@@ -49,6 +52,15 @@ def get_quote_stats():
     return trading_service.query_quote_stats()
 
 
+@trading_router.websocket("/ws_quotes")
+async def ws_quotes(websocket: WebSocket):
+    """
+    push the quote diffs, tag stats and limit up/down counts when the quotes change,
+    send json of QueryStockQuoteModel to subscribe
+    """
+    await quote_stream_hub.serve(websocket)
+
+
 @trading_router.get("/get_query_stock_quote_setting", response_model=Optional[QueryStockQuoteSettingModel])
 def get_query_stock_quote_setting():
     with contract_api.DBSession(provider="zvt", data_schema=QueryStockQuoteSetting)() as session:
@@ -1,11 +1,14 @@
 # -*- coding: utf-8 -*-
+from datetime import date
 from typing import List, Optional
 
+import pandas as pd
 from fastapi import APIRouter
 
 import zvt.contract.api as contract_api
 import zvt.tag.tag_service as tag_service
 from zvt.domain import Stock
+from zvt.rest.route import DbSessionRoute
 from zvt.tag.common import TagType
 from zvt.tag.tag_models import (
     TagInfoModel,
@@ -17,6 +20,7 @@ from zvt.tag.tag_models import (
     StockPoolInfoModel,
     CreateStockPoolsModel,
     StockPoolsModel,
+    StockPoolDiffModel,
     QueryStockTagStatsModel,
     StockTagStatsModel,
     QueryStockTagsModel,
@@ -44,6 +48,7 @@ from zvt.tag.tag_schemas import (
 from zvt.utils.time_utils import current_date
 
 work_router = APIRouter(
+    route_class=DbSessionRoute,
     prefix="/api/work",
     tags=["work"],
     # dependencies=[Depends(get_current_user)],
@@ -88,6 +93,21 @@ def get_stock_pools(stock_pool_name: str):
         return None
 
 
+@work_router.get("/get_entity_stock_pools", response_model=List[str])
+def get_entity_stock_pools(entity_id: str, target_date: Optional[date] = None):
+    return tag_service.get_entity_stock_pools(entity_id=entity_id, target_date=target_date)
+
+
+@work_router.get("/diff_stock_pool", response_model=StockPoolDiffModel)
+def diff_stock_pool(stock_pool_name: str, pre_date: date, target_date: Optional[date] = None):
+    added_entity_ids, removed_entity_ids = tag_service.diff_stock_pool(
+        stock_pool_name=stock_pool_name, pre_date=pre_date, target_date=target_date
+    )
+    return StockPoolDiffModel(
+        stock_pool_name=stock_pool_name, added_entity_ids=added_entity_ids, removed_entity_ids=removed_entity_ids
+    )
+
+
 @work_router.get("/get_main_tag_info", response_model=List[TagInfoModel])
 def get_main_tag_info():
     """
@@ -241,12 +261,10 @@ def build_stock_tags(set_stock_tags_model_list: List[SetStockTagsModel]):
     """
     Set stock tags in batch
     """
-    return [
-        tag_service.build_stock_tags(
-            set_stock_tags_model=set_stock_tags_model, timestamp=current_date(), set_by_user=True
-        )
-        for set_stock_tags_model in set_stock_tags_model_list
-    ]
+    tags_df = pd.DataFrame.from_records(
+        [set_stock_tags_model.model_dump() for set_stock_tags_model in set_stock_tags_model_list]
+    )
+    return tag_service.bulk_build_stock_tags(tags_df=tags_df, timestamp=current_date(), set_by_user=True)
 
 
 @work_router.post("/query_stock_tag_stats", response_model=List[StockTagStatsModel])
@@ -1,21 +1,37 @@
 # -*- coding: utf-8 -*-
+import concurrent.futures
 import logging
 import os
 
-from apscheduler.executors.pool import ThreadPoolExecutor, ProcessPoolExecutor
+from apscheduler.executors.pool import BasePoolExecutor, ProcessPoolExecutor
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from zvt import ZVT_HOME
+from zvt.contract.api import release_db_sessions
 
 logger = logging.getLogger(__name__)
 
 jobs_db_path = os.path.join(ZVT_HOME, "jobs.db")
 
 
+class _ReleasingThreadPool(concurrent.futures.ThreadPoolExecutor):
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(release_db_sessions(fn), *args, **kwargs)
+
+
+class DbSessionThreadPoolExecutor(BasePoolExecutor):
+    """
+    the thread pool executor of the jobs, the thread local db sessions are removed after every job
+    """
+
+    def __init__(self, max_workers=10):
+        super().__init__(_ReleasingThreadPool(int(max_workers)))
+
+
 jobstores = {"default": SQLAlchemyJobStore(url=f"sqlite:///{jobs_db_path}")}
 
-executors = {"default": ThreadPoolExecutor(20), "processpool": ProcessPoolExecutor(5)}
+executors = {"default": DbSessionThreadPoolExecutor(20), "processpool": ProcessPoolExecutor(5)}
 job_defaults = {"coalesce": False, "max_instances": 1}
 
 zvt_scheduler = BackgroundScheduler(jobstores=jobstores, executors=executors, job_defaults=job_defaults)
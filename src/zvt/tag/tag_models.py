@@ -175,6 +175,12 @@ class StockPoolsModel(MixinModel):
     entity_ids: List[str]
 
 
+class StockPoolDiffModel(CustomModel):
+    stock_pool_name: str
+    added_entity_ids: List[str]
+    removed_entity_ids: List[str]
+
+
 class CreateStockPoolsModel(CustomModel):
     entity_type: str = Field(default="stock")
     stock_pool_name: str
@@ -290,6 +296,7 @@ __all__ = [
     "StockPoolInfoModel",
     "CreateStockPoolInfoModel",
     "StockPoolsModel",
+    "StockPoolDiffModel",
     "CreateStockPoolsModel",
     "QueryStockTagStatsModel",
     "StockTagDetailsModel",
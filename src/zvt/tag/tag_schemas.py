@@ -112,6 +112,21 @@ class StockPools(StockTagsBase, Mixin):
     entity_ids = Column(JSON)
 
 
+class StockPoolMember(StockTagsBase, Mixin):
+    """
+    Normalized membership of :class:`StockPools`, one row per stock of the pool snapshot,
+    entity_id is the stock and timestamp is the snapshot date
+    """
+
+    __tablename__ = "stock_pool_member"
+
+    entity_type = Column(String(length=64))
+
+    stock_pool_name = Column(String, index=True)
+    #: id of the StockPools snapshot
+    stock_pool_id = Column(String, index=True)
+
+
 class TagStats(StockTagsBase, Mixin):
     __tablename__ = "tag_stats"
 
@@ -140,5 +155,6 @@ __all__ = [
     "StockSystemTags",
     "StockPoolInfo",
     "StockPools",
+    "StockPoolMember",
     "TagStats",
 ]
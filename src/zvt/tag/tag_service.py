@@ -1,10 +1,11 @@
 # -*- coding: utf-8 -*-
 import logging
-from typing import List
+from typing import List, Dict
 
 import pandas as pd
 from fastapi import HTTPException
 from sqlalchemy import func, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 import zvt.contract.api as contract_api
 from zvt.api.selector import get_entity_ids_by_filter
@@ -27,6 +28,7 @@ from zvt.tag.tag_models import (
 from zvt.tag.tag_schemas import (
     StockTags,
     StockPools,
+    StockPoolMember,
     StockPoolInfo,
     TagStats,
     StockSystemTags,
@@ -39,8 +41,9 @@ from zvt.tag.tag_utils import (
     get_sub_tags,
     get_stock_pool_names,
     get_main_tag_by_sub_tag,
-    get_main_tag_by_industry,
+    get_main_tags_by_industries,
 )
+from zvt.utils.pd_utils import pd_is_not_null
 from zvt.utils.time_utils import to_pd_timestamp, to_date_time_str, current_date, now_pd_timestamp
 from zvt.utils.utils import fill_dict, compare_dicts, flatten_list
 
@@ -48,12 +51,16 @@ logger = logging.getLogger(__name__)
 
 
 def _stock_tags_need_update(stock_tags: StockTags, set_stock_tags_model: SetStockTagsModel):
+    return _stock_tags_changed(stock_tags, set_stock_tags_model.model_dump())
+
+
+def _stock_tags_changed(stock_tags: StockTags, tags: dict):
     if (
-        stock_tags.main_tag != set_stock_tags_model.main_tag
-        or stock_tags.main_tag_reason != set_stock_tags_model.main_tag_reason
-        or stock_tags.sub_tag != set_stock_tags_model.sub_tag
-        or stock_tags.sub_tag_reason != set_stock_tags_model.sub_tag_reason
-        or not compare_dicts(stock_tags.active_hidden_tags, set_stock_tags_model.active_hidden_tags)
+        stock_tags.main_tag != tags["main_tag"]
+        or stock_tags.main_tag_reason != tags["main_tag_reason"]
+        or stock_tags.sub_tag != tags["sub_tag"]
+        or stock_tags.sub_tag_reason != tags["sub_tag_reason"]
+        or not compare_dicts(stock_tags.active_hidden_tags, tags["active_hidden_tags"])
     ):
         return True
     return False
@@ -227,6 +234,152 @@ def build_stock_tags(
         return current_stock_tags
 
 
+def _build_missing_tag_infos(session, tags_df: pd.DataFrame):
+    tag_infos = {
+        TagType.main_tag: tags_df[["main_tag", "main_tag_reason"]].itertuples(index=False),
+        TagType.sub_tag: tags_df[["sub_tag", "sub_tag_reason"]].itertuples(index=False),
+        TagType.hidden_tag: [
+            (tag, tag_reason)
+            for hidden_tags in tags_df["active_hidden_tags"]
+            if hidden_tags
+            for tag, tag_reason in hidden_tags.items()
+        ],
+    }
+    timestamp = current_date()
+    for tag_type, items in tag_infos.items():
+        # the first reason is used for the new tag
+        tag_reasons = {}
+        for tag, tag_reason in items:
+            if tag and tag not in tag_reasons:
+                tag_reasons[tag] = tag_reason
+        if not tag_reasons:
+            continue
+
+        data_schema = get_tag_info_schema(tag_type=tag_type)
+        df = data_schema.query_data(
+            session=session,
+            filters=[data_schema.tag.in_(list(tag_reasons.keys()))],
+            columns=[data_schema.tag],
+            return_type="df",
+        )
+        existed = set(df["tag"].tolist()) if pd_is_not_null(df) else set()
+        session.add_all(
+            [
+                data_schema(id=f"admin_{tag}", entity_id="admin", timestamp=timestamp, tag=tag, tag_reason=tag_reason)
+                for tag, tag_reason in tag_reasons.items()
+                if tag not in existed
+            ]
+        )
+
+
+def bulk_build_stock_tags(
+    tags_df: pd.DataFrame, timestamp: pd.Timestamp, set_by_user: bool, keep_current=False
+) -> List[StockTags]:
+    """
+    set the tags of the stocks in one transaction, the same as calling :func:`build_stock_tags` for every row.
+
+    :param tags_df: df with columns entity_id, main_tag, main_tag_reason, sub_tag, sub_tag_reason, active_hidden_tags,
+        the missing columns are treated as None
+    :param timestamp: timestamp for the new stock tags
+    :param set_by_user: set by user or not
+    :param keep_current: only update the tags history if True
+    :return: the stock tags of the entities in order of tags_df
+    """
+    if not pd_is_not_null(tags_df):
+        return []
+
+    tags_df = tags_df.drop_duplicates(subset=["entity_id"], keep="last").reindex(
+        columns=["entity_id", "main_tag", "main_tag_reason", "sub_tag", "sub_tag_reason", "active_hidden_tags"]
+    )
+    tags_df = tags_df.astype(object).where(tags_df.notna(), None)
+    entity_ids = tags_df["entity_id"].tolist()
+
+    with contract_api.DBSession(provider="zvt", data_schema=StockTags)() as session:
+        _build_missing_tag_infos(session, tags_df)
+
+        current_stock_tags_list: List[StockTags] = StockTags.query_data(
+            session=session, entity_ids=entity_ids, return_type="domain"
+        )
+        current_stock_tags_map = {item.entity_id: item for item in current_stock_tags_list}
+
+        rows = []
+        for tags in tags_df.to_dict(orient="records"):
+            entity_id = tags["entity_id"]
+            current_stock_tags = current_stock_tags_map.get(entity_id)
+            if current_stock_tags:
+                # nothing change
+                if not _stock_tags_changed(current_stock_tags, tags):
+                    continue
+                row = {
+                    "id": current_stock_tags.id,
+                    "entity_id": entity_id,
+                    "entity_type": current_stock_tags.entity_type,
+                    "timestamp": current_stock_tags.timestamp,
+                    "main_tag": current_stock_tags.main_tag,
+                    "main_tag_reason": current_stock_tags.main_tag_reason,
+                    "sub_tag": current_stock_tags.sub_tag,
+                    "sub_tag_reason": current_stock_tags.sub_tag_reason,
+                    "active_hidden_tags": current_stock_tags.active_hidden_tags,
+                }
+                main_tags = dict(current_stock_tags.main_tags or {})
+                sub_tags = dict(current_stock_tags.sub_tags or {})
+                hidden_tags = dict(current_stock_tags.hidden_tags or {})
+            else:
+                entity_type, _, _ = decode_entity_id(entity_id)
+                row = {
+                    "id": f"{entity_id}_tags",
+                    "entity_id": entity_id,
+                    "entity_type": entity_type,
+                    "timestamp": timestamp,
+                    "main_tag": None,
+                    "main_tag_reason": None,
+                    "sub_tag": None,
+                    "sub_tag_reason": None,
+                    "active_hidden_tags": None,
+                }
+                main_tags = {}
+                sub_tags = {}
+                hidden_tags = {}
+
+            # update tag
+            if not keep_current:
+                row["main_tag"] = tags["main_tag"]
+                row["main_tag_reason"] = tags["main_tag_reason"]
+                if tags["sub_tag"]:
+                    row["sub_tag"] = tags["sub_tag"]
+                if tags["sub_tag_reason"]:
+                    row["sub_tag_reason"] = tags["sub_tag_reason"]
+                # could update to None
+                row["active_hidden_tags"] = tags["active_hidden_tags"]
+            # update tags
+            main_tags[tags["main_tag"]] = tags["main_tag_reason"]
+            if tags["sub_tag"]:
+                sub_tags[tags["sub_tag"]] = tags["sub_tag_reason"]
+            if tags["active_hidden_tags"]:
+                hidden_tags.update(tags["active_hidden_tags"])
+            row["main_tags"] = main_tags
+            row["sub_tags"] = sub_tags
+            row["hidden_tags"] = hidden_tags
+            row["set_by_user"] = set_by_user
+            rows.append(row)
+
+        if rows:
+            logger.info(f"bulk update {len(rows)} stock tags")
+            stmt = sqlite_insert(StockTags)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[StockTags.id],
+                set_={key: stmt.excluded[key] for key in rows[0].keys() if key not in ("id", "timestamp")},
+            )
+            session.execute(stmt, rows)
+        session.commit()
+
+        stock_tags_list: List[StockTags] = StockTags.query_data(
+            session=session, entity_ids=entity_ids, return_type="domain"
+        )
+        stock_tags_map = {item.entity_id: item for item in stock_tags_list}
+        return [stock_tags_map[entity_id] for entity_id in entity_ids if entity_id in stock_tags_map]
+
+
 def build_tag_parameter(tag_type: TagType, tag, tag_reason, stock_tag: StockTags):
     hidden_tag = None
     hidden_tag_reason = None
@@ -309,6 +462,7 @@ def batch_set_stock_tags(batch_set_stock_tags_model: BatchSetStockTagsModel):
                 return_type="domain",
             )
 
+        datas = []
         for stock_tag in stock_tags:
             tag_parameter: TagParameter = build_tag_parameter(
                 tag_type=tag_type,
@@ -321,23 +475,23 @@ def batch_set_stock_tags(batch_set_stock_tags_model: BatchSetStockTagsModel):
             else:
                 active_hidden_tags = stock_tag.active_hidden_tags
 
-            set_stock_tags_model = SetStockTagsModel(
-                entity_id=stock_tag.entity_id,
-                main_tag=tag_parameter.main_tag,
-                main_tag_reason=tag_parameter.main_tag_reason,
-                sub_tag=tag_parameter.sub_tag,
-                sub_tag_reason=tag_parameter.sub_tag_reason,
-                active_hidden_tags=active_hidden_tags,
+            datas.append(
+                {
+                    "entity_id": stock_tag.entity_id,
+                    "main_tag": tag_parameter.main_tag,
+                    "main_tag_reason": tag_parameter.main_tag_reason,
+                    "sub_tag": tag_parameter.sub_tag,
+                    "sub_tag_reason": tag_parameter.sub_tag_reason,
+                    "active_hidden_tags": active_hidden_tags,
+                }
             )
 
-            build_stock_tags(
-                set_stock_tags_model=set_stock_tags_model,
-                timestamp=now_pd_timestamp(),
-                set_by_user=True,
-                keep_current=False,
-            )
-            session.refresh(stock_tag)
-        return stock_tags
+    return bulk_build_stock_tags(
+        tags_df=pd.DataFrame.from_records(datas),
+        timestamp=now_pd_timestamp(),
+        set_by_user=True,
+        keep_current=False,
+    )
 
 
 def build_default_main_tag(entity_type="stock", entity_ids=None, force_rebuild=False):
@@ -371,35 +525,26 @@ def build_default_main_tag(entity_type="stock", entity_ids=None, force_rebuild=F
     else:
         raise ValueError(f"Unsupported entity_type: {entity_type}")
 
-    for entity_id in entity_ids:
-        stock_tags: List[StockTags] = StockTags.query_data(entity_id=entity_id, return_type="domain")
-        if not force_rebuild and stock_tags:
-            logger.info(f"{entity_id} main tag has been set.")
-            continue
-
-        logger.info(f"build main tag for: {entity_id}")
+    if not force_rebuild:
+        df = StockTags.query_data(entity_ids=entity_ids, columns=[StockTags.entity_id], return_type="df")
+        if pd_is_not_null(df):
+            existed = set(df["entity_id"].tolist())
+            logger.info(f"{len(existed)} main tags have been set.")
+            entity_ids = [entity_id for entity_id in entity_ids if entity_id not in existed]
+    if not entity_ids:
+        return
 
-        industry = entity_industry_mapping.get(entity_id)
-        if industry:
-            main_tag = get_main_tag_by_industry(industry_name=industry)
-            main_tag_reason = f"来自行业:{industry}"
-        else:
-            main_tag = "其他"
-            main_tag_reason = "其他"
+    logger.info(f"build main tag for: {len(entity_ids)} entities")
+    tags_df = pd.DataFrame({"entity_id": entity_ids})
+    industries = tags_df["entity_id"].map(entity_industry_mapping)
+    no_industry = industries.isna() | (industries == "")
+    industry_main_tag_mapping = get_main_tags_by_industries(industries[~no_industry].tolist())
+    tags_df["main_tag"] = industries.map(industry_main_tag_mapping)
+    tags_df["main_tag_reason"] = "来自行业:" + industries
+    tags_df.loc[no_industry, "main_tag"] = "其他"
+    tags_df.loc[no_industry, "main_tag_reason"] = "其他"
 
-        build_stock_tags(
-            set_stock_tags_model=SetStockTagsModel(
-                entity_id=entity_id,
-                main_tag=main_tag,
-                main_tag_reason=main_tag_reason,
-                sub_tag=None,
-                sub_tag_reason=None,
-                active_hidden_tags=None,
-            ),
-            timestamp=now_pd_timestamp(),
-            set_by_user=False,
-            keep_current=False,
-        )
+    bulk_build_stock_tags(tags_df=tags_df, timestamp=now_pd_timestamp(), set_by_user=False, keep_current=False)
 
 
 def build_default_sub_tags(entity_ids=None):
@@ -566,11 +711,151 @@ def build_stock_pool(create_stock_pools_model: CreateStockPoolsModel, target_dat
                 entity_ids=create_stock_pools_model.entity_ids,
             )
         session.add(stock_pool)
+        _build_stock_pool_members(session, stock_pool)
         session.commit()
         session.refresh(stock_pool)
         return stock_pool
 
 
+def _build_stock_pool_members(session, stock_pool: StockPools):
+    session.query(StockPoolMember).filter(StockPoolMember.stock_pool_id == stock_pool.id).delete()
+    session.add_all(
+        [
+            StockPoolMember(
+                id=f"{stock_pool.id}_{entity_id}",
+                entity_id=entity_id,
+                timestamp=stock_pool.timestamp,
+                entity_type=stock_pool.entity_type,
+                stock_pool_name=stock_pool.stock_pool_name,
+                stock_pool_id=stock_pool.id,
+            )
+            for entity_id in set(stock_pool.entity_ids or [])
+        ]
+    )
+
+
+def _sync_stock_pool_members(session, stock_pool_name: str = None):
+    pool_filters = None
+    member_filters = None
+    if stock_pool_name:
+        pool_filters = [StockPools.stock_pool_name == stock_pool_name]
+        member_filters = [StockPoolMember.stock_pool_name == stock_pool_name]
+    stock_pools: List[StockPools] = StockPools.query_data(session=session, filters=pool_filters, return_type="domain")
+    df = StockPoolMember.query_data(session=session, filters=member_filters, columns=[StockPoolMember.stock_pool_id])
+    existed = set(df["stock_pool_id"].tolist()) if pd_is_not_null(df) else set()
+    for stock_pool in stock_pools:
+        # the empty snapshot has no member
+        if stock_pool.entity_ids and stock_pool.id not in existed:
+            logger.info(f"sync stock pool members for {stock_pool.id}")
+            _build_stock_pool_members(session, stock_pool)
+    session.commit()
+
+
+def sync_stock_pool_members(stock_pool_name: str = None):
+    """
+    build the membership for the stock pools created before the membership table
+
+    :param stock_pool_name: stock pool name, None means all
+    """
+    with contract_api.DBSession(provider="zvt", data_schema=StockPools)() as session:
+        _sync_stock_pool_members(session, stock_pool_name=stock_pool_name)
+
+
+#: the stock pools whose membership is backfilled in this process, None means all
+_synced_stock_pool_names = set()
+
+
+def _ensure_stock_pool_members(session, stock_pool_name: str = None):
+    # the pools created before the membership table are backfilled on first access
+    if stock_pool_name in _synced_stock_pool_names:
+        return
+    _sync_stock_pool_members(session, stock_pool_name=stock_pool_name)
+    _synced_stock_pool_names.add(stock_pool_name)
+
+
+def _get_stock_pool_ids(session, entity_type: str, target_date=None, stock_pool_name: str = None) -> Dict[str, str]:
+    # the snapshot is resolved from StockPools, so the empty one is seen too
+    query = session.query(StockPools.stock_pool_name, StockPools.id, StockPools.timestamp).filter(
+        StockPools.entity_type == entity_type
+    )
+    if stock_pool_name:
+        query = query.filter(StockPools.stock_pool_name == stock_pool_name)
+    if target_date:
+        query = query.filter(StockPools.timestamp <= to_pd_timestamp(target_date))
+    stock_pool_ids = {}
+    for name, stock_pool_id, _ in sorted(query.all(), key=lambda row: row[2]):
+        stock_pool_ids[name] = stock_pool_id
+    return stock_pool_ids
+
+
+def get_stock_pool_entity_ids(stock_pool_name: str, target_date=None, entity_type: str = "stock") -> List[str]:
+    """
+    get the entity ids of the stock pool snapshot at the date
+
+    :param stock_pool_name: stock pool name
+    :param target_date: the latest snapshot not after the date is used, None means the latest one
+    :param entity_type: entity type of the stock pool
+    :return: entity ids
+    """
+    with contract_api.DBSession(provider="zvt", data_schema=StockPoolMember)() as session:
+        _ensure_stock_pool_members(session, stock_pool_name=stock_pool_name)
+        stock_pool_id = _get_stock_pool_ids(
+            session, entity_type=entity_type, target_date=target_date, stock_pool_name=stock_pool_name
+        ).get(stock_pool_name)
+        if not stock_pool_id:
+            return []
+        df = StockPoolMember.query_data(
+            session=session,
+            filters=[StockPoolMember.stock_pool_id == stock_pool_id],
+            columns=[StockPoolMember.entity_id],
+        )
+        return df["entity_id"].tolist() if pd_is_not_null(df) else []
+
+
+def get_entity_stock_pools(entity_id: str, target_date=None) -> List[str]:
+    """
+    get the stock pools containing the entity at the date
+
+    :param entity_id: entity id
+    :param target_date: the latest snapshot not after the date is used, None means the latest one
+    :return: stock pool names
+    """
+    entity_type, _, _ = decode_entity_id(entity_id)
+    with contract_api.DBSession(provider="zvt", data_schema=StockPoolMember)() as session:
+        _ensure_stock_pool_members(session)
+        stock_pool_ids = _get_stock_pool_ids(session, entity_type=entity_type, target_date=target_date)
+        if not stock_pool_ids:
+            return []
+        df = StockPoolMember.query_data(
+            session=session,
+            entity_id=entity_id,
+            filters=[StockPoolMember.stock_pool_id.in_(list(stock_pool_ids.values()))],
+            columns=[StockPoolMember.stock_pool_name],
+        )
+        if not pd_is_not_null(df):
+            return []
+        return df["stock_pool_name"].unique().tolist()
+
+
+def diff_stock_pool(stock_pool_name: str, pre_date, target_date=None, entity_type: str = "stock"):
+    """
+    compare the stock pool snapshots at two dates
+
+    :param stock_pool_name: stock pool name
+    :param pre_date: the previous date
+    :param target_date: the current date, None means the latest one
+    :param entity_type: entity type of the stock pool
+    :return: added entity ids, removed entity ids
+    """
+    pre_entity_ids = set(
+        get_stock_pool_entity_ids(stock_pool_name=stock_pool_name, entity_type=entity_type, target_date=pre_date)
+    )
+    entity_ids = set(
+        get_stock_pool_entity_ids(stock_pool_name=stock_pool_name, entity_type=entity_type, target_date=target_date)
+    )
+    return sorted(entity_ids - pre_entity_ids), sorted(pre_entity_ids - entity_ids)
+
+
 def delete_stock_pool(stock_pool_name: str):
     with contract_api.DBSession(provider="zvt", data_schema=StockPoolInfo)() as session:
         stock_pool_info = StockPoolInfo.query_data(
@@ -580,6 +865,8 @@ def delete_stock_pool(stock_pool_name: str):
         )
 
         contract_api.del_data(data_schema=StockPools, filters=[StockPools.stock_pool_name == stock_pool_name])
+        contract_api.del_data(data_schema=StockPoolMember, filters=[StockPoolMember.stock_pool_name == stock_pool_name])
+        _synced_stock_pool_names.discard(stock_pool_name)
 
         if stock_pool_info:
             session.delete(stock_pool_info[0])
@@ -600,17 +887,7 @@ def get_main_tags_in_stock_pool(stock_pool_name: str) -> List[str]:
 
         entity_ids = None
         if stock_pool_name != "all":
-            stock_pools: List[StockPools] = StockPools.query_data(
-                session=session,
-                filters=[StockPools.stock_pool_name == stock_pool_name],
-                order=StockPools.timestamp.desc(),
-                limit=1,
-                return_type="domain",
-            )
-            if not stock_pools:
-                raise HTTPException(status_code=404, detail=f"Stock pool {stock_pool_name} not found")
-
-            entity_ids = stock_pools[0].entity_ids
+            entity_ids = get_stock_pool_entity_ids(stock_pool_name=stock_pool_name)
             if not entity_ids:
                 return []
 
@@ -1076,6 +1353,7 @@ if __name__ == "__main__":
 __all__ = [
     "get_stock_tag_options",
     "build_stock_tags",
+    "bulk_build_stock_tags",
     "build_tag_parameter",
     "batch_set_stock_tags",
     "build_default_main_tag",
@@ -1085,6 +1363,10 @@ __all__ = [
     "create_tag_info",
     "build_stock_pool_info",
     "build_stock_pool",
+    "sync_stock_pool_members",
+    "get_stock_pool_entity_ids",
+    "get_entity_stock_pools",
+    "diff_stock_pool",
     "query_stock_tag_stats",
     "refresh_main_tag_by_sub_tag",
     "refresh_all_main_tag_by_sub_tag",
@@ -82,6 +82,37 @@ def build_system_stock_pools(start_date, entity_type, force_update=False):
             build_stock_pool(create_stock_pools_model, target_date=target_date)
 
 
+def cal_main_line_continuous_days(df: pd.DataFrame, pre_df: pd.DataFrame = None) -> pd.Series:
+    """
+    calculate the continuous days of the main tags being main line
+
+    :param df: tag stats with timestamp, main_tag and is_main_line columns
+    :param pre_df: the tag stats of the previous day with main_line_continuous_days column
+    :return: the continuous days aligned with df
+    """
+    is_main_line = df.pivot(index="timestamp", columns="main_tag", values="is_main_line")
+    # every day counts 1 except the previous day which counts its continuous days
+    weights = pd.Series(1, index=is_main_line.index)
+    if pd_is_not_null(pre_df):
+        pre_days = pre_df.pivot(index="timestamp", columns="main_tag", values="main_line_continuous_days")
+        is_main_line = pd.concat([pre_days > 0, is_main_line])
+        weights = pd.concat([pd.Series(0, index=pre_days.index), weights])
+        is_main_line = is_main_line.reindex(columns=is_main_line.columns.union(pre_days.columns))
+    is_main_line = is_main_line.eq(True)
+
+    counts = is_main_line.mul(weights, axis=0)
+    if pd_is_not_null(pre_df):
+        counts.iloc[0] = pre_days.iloc[0].reindex(counts.columns).fillna(0)
+    cum_counts = counts.cumsum()
+    # reset at the day not main line
+    days = cum_counts - cum_counts.where(~is_main_line).ffill().fillna(0)
+    days = days.where(is_main_line, 0).astype(int)
+
+    days = days.stack()
+    days.index.names = ["timestamp", "main_tag"]
+    return pd.Series(days.reindex(pd.MultiIndex.from_frame(df[["timestamp", "main_tag"]])).values, index=df.index)
+
+
 def build_stock_pool_tag_stats(
     stock_pool_name,
     entity_type="stock",
@@ -105,7 +136,13 @@ def build_stock_pool_tag_stats(
                 TagStats.stock_pool_name == stock_pool_name
             ).filter(TagStats.timestamp == datas[0].timestamp).delete()
             session.commit()
-            return build_stock_pool_tag_stats(stock_pool_name=stock_pool_name, force_rebuild_latest=False)
+            return build_stock_pool_tag_stats(
+                stock_pool_name=stock_pool_name,
+                entity_type=entity_type,
+                force_rebuild_latest=False,
+                adjust_type=adjust_type,
+                provider=provider,
+            )
 
         latest_tag_stats_timestamp = datas[0].timestamp
         current_df = TagStats.query_data(
@@ -113,84 +150,87 @@ def build_stock_pool_tag_stats(
                 TagStats.entity_type == entity_type,
                 TagStats.stock_pool_name == stock_pool_name,
                 TagStats.timestamp == latest_tag_stats_timestamp,
-            ]
+            ],
+            columns=[TagStats.timestamp, TagStats.main_tag, TagStats.main_line_continuous_days],
         )
         start = next_date(the_time=latest_tag_stats_timestamp)
 
-    stock_pools: List[StockPools] = StockPools.query_data(
+    # all the snapshots at once
+    pools_df = StockPools.query_data(
         start_timestamp=start,
         filters=[StockPools.entity_type == entity_type, StockPools.stock_pool_name == stock_pool_name],
+        columns=[StockPools.timestamp, StockPools.entity_ids],
         order=StockPools.timestamp.asc(),
-        return_type="domain",
     )
-    if not stock_pools:
+    if not pd_is_not_null(pools_df):
         logger.info(f"no data to build tag stats: {entity_type} {stock_pool_name} {start}")
         return None
+    logger.info(
+        f"build_stock_pool_tag_stats for {entity_type} {stock_pool_name} "
+        f"{pools_df['timestamp'].iloc[0]} to {pools_df['timestamp'].iloc[-1]}"
+    )
+    members_df = pools_df.explode("entity_ids").rename(columns={"entity_ids": "entity_id"}).dropna()
+    members_df = members_df.drop_duplicates(subset=["timestamp", "entity_id"])
+    entity_ids = members_df["entity_id"].unique().tolist()
 
-    for stock_pool in stock_pools:
-        target_date = stock_pool.timestamp
-        logger.info(f"build_stock_pool_tag_stats for {entity_type} {stock_pool_name} {target_date}")
-
-        entity_ids = stock_pool.entity_ids
-        tags_df = StockTags.query_data(
-            entity_ids=entity_ids, filters=[StockTags.entity_type == entity_type], return_type="df", index="entity_id"
-        )
-        kdata_schema: KdataCommon = get_kdata_schema(
-            entity_type=entity_type, level=IntervalLevel.LEVEL_1DAY, adjust_type=adjust_type
-        )
-        kdata_df = kdata_schema.query_data(
-            provider=provider,
-            entity_ids=entity_ids,
-            filters=[kdata_schema.timestamp == to_pd_timestamp(target_date)],
-            columns=[kdata_schema.entity_id, kdata_schema.name, kdata_schema.turnover],
-            index="entity_id",
-        )
+    tags_df = StockTags.query_data(
+        entity_ids=entity_ids,
+        filters=[StockTags.entity_type == entity_type, StockTags.main_tag.isnot(None)],
+        columns=[StockTags.entity_id, StockTags.main_tag],
+    )
+    kdata_schema: KdataCommon = get_kdata_schema(
+        entity_type=entity_type, level=IntervalLevel.LEVEL_1DAY, adjust_type=adjust_type
+    )
+    kdata_df = kdata_schema.query_data(
+        provider=provider,
+        entity_ids=entity_ids,
+        start_timestamp=pools_df["timestamp"].iloc[0],
+        end_timestamp=pools_df["timestamp"].iloc[-1],
+        columns=[kdata_schema.entity_id, kdata_schema.timestamp, kdata_schema.turnover],
+    )
+    if not pd_is_not_null(kdata_df):
+        kdata_df = pd.DataFrame(columns=["entity_id", "timestamp", "turnover"])
 
-        df = pd.concat([tags_df, kdata_df[["turnover", "name"]]], axis=1)
+    df = members_df.merge(tags_df[["entity_id", "main_tag"]], on="entity_id", how="inner")
+    df = df.merge(kdata_df[["entity_id", "timestamp", "turnover"]], on=["timestamp", "entity_id"], how="left")
 
-        grouped_df = (
-            df.groupby("main_tag")
-            .agg(
-                turnover=("turnover", "sum"),
-                entity_count=("entity_id", "count"),
-                entity_ids=("entity_id", lambda entity_id: list(entity_id)),
-            )
-            .reset_index()
-        )
-        sorted_df = grouped_df.sort_values(by=["turnover", "entity_count"], ascending=[False, False])
-        # sorted_df = grouped_df.sort_values(by=["entity_count"], ascending=[False])
-        sorted_df = sorted_df.reset_index(drop=True)
-        sorted_df["position"] = sorted_df.index
-        sorted_df["is_main_line"] = sorted_df.index < 5
-        sorted_df["main_line_continuous_days"] = sorted_df["is_main_line"].apply(lambda x: 1 if x else 0)
-        # logger.info(f"current_df\n: {current_df}")
-        if pd_is_not_null(current_df):
-            sorted_df.set_index("main_tag", inplace=True, drop=False)
-            current_df.set_index("main_tag", inplace=True, drop=False)
-            common_index = sorted_df[sorted_df["is_main_line"]].index.intersection(
-                current_df[current_df["is_main_line"]].index
-            )
-            pre_selected = current_df.loc[common_index]
-            if pd_is_not_null(pre_selected):
-                pre_selected = pre_selected.reindex(sorted_df.index, fill_value=0)
-                sorted_df["main_line_continuous_days"] = (
-                    sorted_df["main_line_continuous_days"] + pre_selected["main_line_continuous_days"]
-                )
-        sorted_df["entity_id"] = f"{entity_type}_{stock_pool_name}"
-        sorted_df["timestamp"] = target_date
-        sorted_df["entity_type"] = entity_type
-        sorted_df["stock_pool_name"] = stock_pool_name
-        sorted_df["id"] = sorted_df[["entity_id", "timestamp", "main_tag"]].apply(
-            lambda x: "_".join(x.astype(str)), axis=1
+    grouped_df = (
+        df.groupby(["timestamp", "main_tag"])
+        .agg(
+            turnover=("turnover", "sum"),
+            entity_count=("entity_id", "count"),
+            entity_ids=("entity_id", list),
         )
-        df_to_db(
-            provider="zvt",
-            df=sorted_df,
-            data_schema=TagStats,
-            force_update=True,
-            dtype={"entity_ids": sqlalchemy.JSON},
-        )
-        current_df = sorted_df
+        .reset_index()
+    )
+    if not pd_is_not_null(grouped_df):
+        logger.info(f"no tags to build tag stats: {entity_type} {stock_pool_name} {start}")
+        return None
+    sorted_df = grouped_df.sort_values(
+        by=["timestamp", "turnover", "entity_count"], ascending=[True, False, False]
+    ).reset_index(drop=True)
+    sorted_df["position"] = sorted_df.groupby("timestamp").cumcount()
+    sorted_df["is_main_line"] = sorted_df["position"] < 5
+    sorted_df["main_line_continuous_days"] = cal_main_line_continuous_days(sorted_df, pre_df=current_df)
+
+    sorted_df["entity_id"] = f"{entity_type}_{stock_pool_name}"
+    sorted_df["entity_type"] = entity_type
+    sorted_df["stock_pool_name"] = stock_pool_name
+    sorted_df["id"] = (
+        sorted_df["entity_id"]
+        + "_"
+        + sorted_df["timestamp"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        + "_"
+        + sorted_df["main_tag"]
+    )
+    df_to_db(
+        provider="zvt",
+        df=sorted_df,
+        data_schema=TagStats,
+        force_update=True,
+        dtype={"entity_ids": sqlalchemy.JSON},
+    )
+    return sorted_df
 
 
 def refresh_stock_pool(stock_pool_name, entity_ids, insert_mode=InsertMode.append, target_date=current_date()):
@@ -238,4 +278,9 @@ if __name__ == "__main__":
 
 
 # the __all__ is generated
-__all__ = ["build_system_stock_pools", "build_stock_pool_tag_stats", "refresh_stock_pool"]
+__all__ = [
+    "build_system_stock_pools",
+    "cal_main_line_continuous_days",
+    "build_stock_pool_tag_stats",
+    "refresh_stock_pool",
+]
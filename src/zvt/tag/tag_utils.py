@@ -10,6 +10,7 @@ from zvt.contract.api import df_to_db
 from zvt.domain import Block
 from zvt.tag.common import StockPoolType
 from zvt.tag.tag_schemas import MainTagInfo, SubTagInfo, HiddenTagInfo, StockPoolInfo, IndustryInfo
+from zvt.utils.pd_utils import pd_is_not_null
 from zvt.utils.time_utils import now_pd_timestamp
 
 
@@ -234,6 +235,25 @@ def get_main_tag_by_industry(industry_name):
         _get_default_industry_main_tag_mapping().get(industry_name, "其他")
 
 
+def get_main_tags_by_industries(industry_names: List[str]) -> dict:
+    """
+    get main tags of the industries in one query
+
+    :param industry_names: industry names
+    :return: industry name -> main tag
+    """
+    industry_names = list(set(industry_names))
+    df = IndustryInfo.query_data(
+        filters=[IndustryInfo.industry_name.in_(industry_names)],
+        columns=[IndustryInfo.industry_name, IndustryInfo.main_tag],
+    )
+    default_mapping = _get_default_industry_main_tag_mapping()
+    mapping = {industry_name: default_mapping.get(industry_name, "其他") for industry_name in industry_names}
+    if pd_is_not_null(df):
+        mapping.update(dict(zip(df["industry_name"], df["main_tag"])))
+    return mapping
+
+
 def get_sub_tags():
     df = SubTagInfo.query_data(columns=[SubTagInfo.tag])
     return df["tag"].tolist()
@@ -306,6 +326,7 @@ __all__ = [
     "get_main_tags",
     "get_main_tag_by_sub_tag",
     "get_main_tag_by_industry",
+    "get_main_tags_by_industries",
     "get_sub_tags",
     "get_hidden_tags",
     "get_stock_pool_names",
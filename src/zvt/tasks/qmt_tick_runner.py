@@ -7,7 +7,14 @@ if __name__ == "__main__":
     from apscheduler.schedulers.background import BackgroundScheduler
 
     sched = BackgroundScheduler()
-    record_stock_quote()
-    sched.add_job(func=record_stock_quote, trigger="cron", hour=9, minute=18, day_of_week="mon-fri")
+    record_stock_quote(serve_data_bus=True)
+    sched.add_job(
+        func=record_stock_quote,
+        trigger="cron",
+        hour=9,
+        minute=18,
+        day_of_week="mon-fri",
+        kwargs={"serve_data_bus": True},
+    )
     sched.start()
     sched._thread.join()
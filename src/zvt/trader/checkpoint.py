@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import logging
+import os
+from typing import Optional
+
+from zvt import zvt_env
+from zvt.contract import IntervalLevel
+from zvt.trader import TradingSignal, TradingSignalType
+from zvt.utils.time_utils import to_pd_timestamp
+
+logger = logging.getLogger(__name__)
+
+#: the version of the checkpoint format
+CHECKPOINT_VERSION = 1
+
+
+def get_checkpoint_path(trader_name: str) -> str:
+    """
+    the default checkpoint file of the trader
+
+    :param trader_name: trader name
+    :return: the file path
+    """
+    return os.path.join(zvt_env["data_path"], "trader_checkpoints", f"{trader_name}.json.gz")
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    """
+    save the checkpoint to gzipped json, the file is replaced atomically
+
+    :param path: the file path
+    :param checkpoint: the checkpoint
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(dict(checkpoint, version=CHECKPOINT_VERSION), f)
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path: str) -> Optional[dict]:
+    """
+    load the checkpoint
+
+    :param path: the file path
+    :return: the checkpoint, None if not exists
+    """
+    if not os.path.exists(path):
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("version") != CHECKPOINT_VERSION:
+        logger.warning(f"checkpoint version:{checkpoint.get('version')} of {path} is not supported")
+        return None
+    return checkpoint
+
+
+def trading_signal_to_dict(trading_signal: TradingSignal) -> dict:
+    return {
+        "entity_id": trading_signal.entity_id,
+        "due_timestamp": to_pd_timestamp(trading_signal.due_timestamp).isoformat(),
+        "happen_timestamp": to_pd_timestamp(trading_signal.happen_timestamp).isoformat(),
+        "trading_level": trading_signal.trading_level.value,
+        "trading_signal_type": trading_signal.trading_signal_type.value,
+        "position_pct": trading_signal.position_pct,
+        "order_money": trading_signal.order_money,
+        "order_amount": trading_signal.order_amount,
+    }
+
+
+def trading_signal_from_dict(d: dict) -> TradingSignal:
+    return TradingSignal(
+        entity_id=d["entity_id"],
+        due_timestamp=to_pd_timestamp(d["due_timestamp"]),
+        happen_timestamp=to_pd_timestamp(d["happen_timestamp"]),
+        trading_level=IntervalLevel(d["trading_level"]),
+        trading_signal_type=TradingSignalType(d["trading_signal_type"]),
+        position_pct=d.get("position_pct"),
+        order_money=d.get("order_money"),
+        order_amount=d.get("order_amount"),
+    )
+
+
+# the __all__ is generated
+__all__ = [
+    "get_checkpoint_path",
+    "save_checkpoint",
+    "load_checkpoint",
+    "trading_signal_to_dict",
+    "trading_signal_from_dict",
+]
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+import glob
+import logging
+import os
+import shutil
+from typing import List, Optional, Type, Union
+
+import pandas as pd
+
+from zvt import zvt_env
+from zvt.contract.api import df_to_db, get_schema_columns
+from zvt.contract.schema import Mixin
+from zvt.trader.trader_models import AccountStatsModel
+from zvt.trader.trader_schemas import AccountStats, Position, Order
+from zvt.utils.pd_utils import pd_is_not_null
+from zvt.utils.time_utils import to_pd_timestamp
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+
+def is_parquet_available() -> bool:
+    """
+    whether the results could be saved in parquet, it needs ``pip install zvt[analytic]``
+    """
+    return pyarrow is not None
+
+
+def get_trader_result_path(trader_name: str, data_path: str = zvt_env["data_path"]) -> str:
+    return os.path.join(data_path, "zvt", "trader_results", trader_name)
+
+
+def _parquet_files(trader_name: str, data_schema: Type[Mixin]) -> List[str]:
+    return sorted(
+        glob.glob(os.path.join(get_trader_result_path(trader_name), f"{data_schema.__tablename__}-*.parquet"))
+    )
+
+
+def has_parquet_results(trader_name: str) -> bool:
+    return bool(_parquet_files(trader_name, AccountStats))
+
+
+def clear_parquet_results(trader_name: str):
+    path = get_trader_result_path(trader_name)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+
+
+def read_parquet_results(
+    data_schema: Type[Mixin],
+    trader_name: str,
+    start_timestamp: Union[str, pd.Timestamp] = None,
+    end_timestamp: Union[str, pd.Timestamp] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    read the results of the trader saved in parquet
+
+    :param data_schema: AccountStats, Position or Order
+    :param trader_name: trader name
+    :param start_timestamp: start timestamp
+    :param end_timestamp: end timestamp
+    :return: the df ordered by timestamp
+    """
+    files = _parquet_files(trader_name, data_schema)
+    if not files:
+        return None
+    df = pd.concat([pd.read_parquet(file) for file in files], ignore_index=True)
+    if start_timestamp is not None:
+        df = df[df["timestamp"] >= to_pd_timestamp(start_timestamp)]
+    if end_timestamp is not None:
+        df = df[df["timestamp"] <= to_pd_timestamp(end_timestamp)]
+    return df.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+class TraderResultSink(object):
+    """
+    Buffer the account, position and order records of the trader in memory and write them in bulk when flushing,
+    instead of committing them through the orm one by one.
+
+    sink_type "db" inserts them to the trader tables, "parquet" writes them to columnar files in
+    :func:`get_trader_result_path`, which keeps the db small for the large sweeps.
+    """
+
+    def __init__(self, trader_name: str, sink_type: str = "db") -> None:
+        assert sink_type in ("db", "parquet")
+        if sink_type == "parquet":
+            assert is_parquet_available(), "pyarrow is needed for the parquet results, pip install zvt[analytic]"
+        self.trader_name = trader_name
+        self.sink_type = sink_type
+        self.buffers = {AccountStats: [], Position: [], Order: []}
+        self.columns = {data_schema: get_schema_columns(data_schema) for data_schema in self.buffers}
+        self.part = len(_parquet_files(trader_name, AccountStats)) if sink_type == "parquet" else 0
+
+    def _add(self, data_schema: Type[Mixin], domain):
+        self.buffers[data_schema].append({col: getattr(domain, col) for col in self.columns[data_schema]})
+
+    def add_account(self, account: AccountStats):
+        """
+        add the snapshot of the account and its positions
+        """
+        self._add(AccountStats, account)
+        for position in account.positions:
+            self._add(Position, position)
+
+    def add_order(self, order: Order):
+        self._add(Order, order)
+
+    def flush(self):
+        """
+        write the buffered records
+        """
+        for data_schema, records in self.buffers.items():
+            if not records:
+                continue
+            df = pd.DataFrame.from_records(records, columns=self.columns[data_schema])
+            if self.sink_type == "db":
+                df_to_db(df=df, data_schema=data_schema, provider="zvt", need_check=False)
+            else:
+                path = get_trader_result_path(self.trader_name)
+                os.makedirs(path, exist_ok=True)
+                df.to_parquet(os.path.join(path, f"{data_schema.__tablename__}-{self.part:06d}.parquet"), index=False)
+            records.clear()
+        self.part = self.part + 1
+
+    def delete_after(self, timestamp: pd.Timestamp):
+        """
+        delete the parquet results after the timestamp, the orders at the timestamp are deleted too as they are
+        executed after it
+
+        :param timestamp: the timestamp
+        """
+        for records in self.buffers.values():
+            records.clear()
+        if self.sink_type != "parquet":
+            return
+        for data_schema in self.buffers:
+            for file in _parquet_files(self.trader_name, data_schema):
+                df = pd.read_parquet(file)
+                if data_schema is Order:
+                    kept = df[df["timestamp"] < timestamp]
+                else:
+                    kept = df[df["timestamp"] <= timestamp]
+                if len(kept) != len(df):
+                    kept.to_parquet(file, index=False)
+
+    def load_latest_account(self) -> Optional[AccountStatsModel]:
+        """
+        load the latest account with its positions from the parquet results
+        """
+        accounts = read_parquet_results(AccountStats, self.trader_name)
+        if not pd_is_not_null(accounts):
+            return None
+        account = accounts.iloc[-1].to_dict()
+        positions = read_parquet_results(Position, self.trader_name)
+        if pd_is_not_null(positions):
+            positions = positions[positions["account_stats_id"] == account["id"]].to_dict(orient="records")
+        else:
+            positions = []
+        return AccountStatsModel.model_validate(dict(account, positions=positions))
+
+    def clear(self):
+        for records in self.buffers.values():
+            records.clear()
+        clear_parquet_results(self.trader_name)
+        self.part = 0
+
+
+# the __all__ is generated
+__all__ = [
+    "is_parquet_available",
+    "get_trader_result_path",
+    "has_parquet_results",
+    "clear_parquet_results",
+    "read_parquet_results",
+    "TraderResultSink",
+]
@@ -14,8 +14,9 @@ from zvt.trader.errors import (
     InvalidOrderParamError,
     WrongKdataError,
 )
+from zvt.trader.result_sink import TraderResultSink
 from zvt.trader.trader_info_api import get_trader_info, clear_trader
-from zvt.trader.trader_models import AccountStatsModel, PositionModel
+from zvt.trader.trader_models import AccountStatsModel
 from zvt.trader.trader_schemas import AccountStats, Position, Order, TraderInfo
 from zvt.utils.pd_utils import pd_is_not_null
 from zvt.utils.time_utils import to_pd_timestamp, to_date_time_str, TIME_FORMAT_ISO8601, is_same_date
@@ -39,6 +40,7 @@ class SimAccountService(AccountService):
         keep_history=False,
         real_time=False,
         kdata_use_begin_time=False,
+        result_sink: TraderResultSink = None,
     ):
         self.logger = logging.getLogger(self.__class__.__name__)
 
@@ -58,6 +60,8 @@ class SimAccountService(AccountService):
         self.keep_history = keep_history
         self.real_time = real_time
         self.kdata_use_begin_time = kdata_use_begin_time
+        #: buffer the records and write them in bulk if set, otherwise commit them one by one
+        self.result_sink = result_sink
 
         self.account = self.init_account()
 
@@ -77,6 +81,8 @@ class SimAccountService(AccountService):
         if trader_info:
             self.logger.warning("trader:{} has run before,old result would be deleted".format(self.trader_name))
             clear_trader(session=self.session, trader_name=self.trader_name)
+        if self.result_sink:
+            self.result_sink.clear()
 
     def init_account(self) -> AccountStats:
         # 清除历史数据
@@ -119,6 +125,12 @@ class SimAccountService(AccountService):
         )
 
     def load_account(self) -> AccountStats:
+        if self.result_sink and self.result_sink.sink_type == "parquet":
+            account_stats_model = self.result_sink.load_latest_account()
+            if not account_stats_model:
+                return self.account
+            return self.account_from_model(account_stats_model)
+
         records = AccountStats.query_data(
             filters=[AccountStats.trader_name == self.trader_name],
             order=AccountStats.timestamp.desc(),
@@ -130,13 +142,20 @@ class SimAccountService(AccountService):
         latest_record: AccountStats = records[0]
 
         # create new orm object from latest record
-        account_stats_model = AccountStatsModel.from_orm(latest_record)
+        return self.account_from_model(AccountStatsModel.from_orm(latest_record))
+
+    def account_from_model(self, account_stats_model: AccountStatsModel) -> AccountStats:
+        """
+        create new account orm object with the positions from the model
+
+        :param account_stats_model: the account model
+        :return: the account
+        """
         account = AccountStats()
         fill_domain_from_dict(account, account_stats_model.model_dump(exclude={"id", "positions"}))
 
         positions: List[Position] = []
-        for position_domain in latest_record.positions:
-            position_model = PositionModel.from_orm(position_domain)
+        for position_model in account_stats_model.positions:
             self.logger.debug("current position:{}".format(position_model))
             position = Position()
             fill_domain_from_dict(position, position_model.model_dump())
@@ -146,17 +165,45 @@ class SimAccountService(AccountService):
 
         return account
 
+    def restore_account(self, account_stats_model: AccountStatsModel):
+        """
+        restore the account of a checkpoint, the records after it are deleted
+
+        :param account_stats_model: the account at the checkpoint
+        """
+        timestamp = to_pd_timestamp(account_stats_model.timestamp)
+        for data_schema in (AccountStats, Position):
+            self.session.query(data_schema).filter(
+                data_schema.trader_name == self.trader_name, data_schema.timestamp > timestamp
+            ).delete()
+        # the orders of the signals at the checkpoint are executed after it and happen again
+        self.session.query(Order).filter(Order.trader_name == self.trader_name, Order.timestamp >= timestamp).delete()
+        self.session.commit()
+        if self.result_sink:
+            self.result_sink.delete_after(timestamp)
+        self.account = self.account_from_model(account_stats_model)
+
+    def flush_results(self):
+        """
+        write the records buffered in the result sink
+        """
+        if self.result_sink:
+            self.result_sink.flush()
+
     def on_trading_open(self, timestamp):
         self.logger.info("on_trading_open:{}".format(timestamp))
         if is_same_date(timestamp, self.start_timestamp):
             return
+        # the account in memory is not attached to the session if buffered
+        if self.result_sink:
+            return
         self.account = self.load_account()
 
     def on_trading_error(self, timestamp, error):
         pass
 
     def on_trading_finish(self, timestamp):
-        pass
+        self.flush_results()
 
     def on_trading_signals(self, trading_signals: List[TradingSignal]):
         for trading_signal in trading_signals:
@@ -294,8 +341,11 @@ class SimAccountService(AccountService):
         self.account.profit = self.account.all_value - self.account.input_money
         self.account.profit_rate = self.account.profit / self.account.input_money
 
-        self.session.add(self.account)
-        self.session.commit()
+        if self.result_sink:
+            self.result_sink.add_account(self.account)
+        else:
+            self.session.add(self.account)
+            self.session.commit()
         account_info = (
             f"on_trading_close,holding size:{len(self.account.positions)} profit:{self.account.profit} input_money:{self.account.input_money} "
             f"cash:{self.account.cash} value:{self.account.value} all_value:{self.account.all_value}"
@@ -424,8 +474,11 @@ class SimAccountService(AccountService):
             level=self.level.value,
             status="success",
         )
-        self.session.add(order)
-        self.session.commit()
+        if self.result_sink:
+            self.result_sink.add_order(order)
+        else:
+            self.session.add(order)
+            self.session.commit()
 
     def cal_amount_by_money(
         self,
@@ -1,18 +1,29 @@
 # -*- coding: utf-8 -*-
 import logging
-import time
 from typing import List, Union, Type, Tuple
 
 import pandas as pd
 
 from zvt.contract import IntervalLevel, TradableEntity, AdjustType
+from zvt.contract.data_bus import data_bus
+from zvt.contract.data_event import data_event_center
+from zvt.contract.data_hub import data_hub
 from zvt.contract.drawer import Drawer
 from zvt.contract.factor import Factor, TargetType
 from zvt.contract.normal_data import NormalData
 from zvt.domain import Stock
 from zvt.trader import TradingSignal, TradingSignalType, TradingListener
+from zvt.trader.checkpoint import (
+    get_checkpoint_path,
+    load_checkpoint,
+    save_checkpoint,
+    trading_signal_to_dict,
+    trading_signal_from_dict,
+)
+from zvt.trader.result_sink import TraderResultSink
 from zvt.trader.sim_account import SimAccountService
 from zvt.trader.trader_info_api import AccountStatsReader
+from zvt.trader.trader_models import AccountStatsModel
 from zvt.trader.trader_schemas import AccountStats, Position
 from zvt.utils.time_utils import (
     to_pd_timestamp,
@@ -44,6 +55,11 @@ class Trader(object):
         profit_threshold=(3, -0.3),
         keep_history=False,
         pre_load_days=365,
+        event_driven: bool = False,
+        resume: bool = False,
+        checkpoint_interval: int = None,
+        checkpoint_path: str = None,
+        result_sink_type: str = None,
     ) -> None:
         assert self.entity_schema is not None
         assert start_timestamp is not None
@@ -66,6 +82,12 @@ class Trader(object):
         self.start_timestamp = to_pd_timestamp(start_timestamp)
         self.end_timestamp = to_pd_timestamp(end_timestamp)
         self.pre_load_days = pre_load_days
+        #: wait for the data events published by the recorders instead of polling the db in real time mode
+        self.event_driven = event_driven
+        #: the recorders run in other processes, get their data events from the data bus
+        if self.event_driven and self.real_time and not data_bus.is_connected():
+            if not data_bus.connect():
+                self.logger.warning("data bus is not connected, polling the db until it's connected")
 
         self.trading_dates = self.entity_schema.get_trading_dates(
             start_date=self.start_timestamp, end_date=self.end_timestamp
@@ -92,6 +114,22 @@ class Trader(object):
         self.trading_signals: List[TradingSignal] = []
         self.trading_signal_listeners: List[TradingListener] = []
 
+        #: save the checkpoint every checkpoint_interval trading closes
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_path = checkpoint_path if checkpoint_path else get_checkpoint_path(self.trader_name)
+        self.closed_count = 0
+        #: the timestamps before it are skipped if resumed from the checkpoint
+        self.resume_timestamp = None
+        checkpoint = None
+        if resume:
+            checkpoint = load_checkpoint(self.checkpoint_path)
+            if checkpoint and (
+                checkpoint["trader_name"] != self.trader_name or IntervalLevel(checkpoint["level"]) != self.level
+            ):
+                raise Exception(f"checkpoint {self.checkpoint_path} is not for trader:{self.trader_name} {self.level}")
+            if not checkpoint:
+                self.logger.warning(f"no checkpoint {self.checkpoint_path}, run from the start")
+
         self.account_service = SimAccountService(
             entity_schema=self.entity_schema,
             trader_name=self.trader_name,
@@ -100,20 +138,23 @@ class Trader(object):
             level=self.level,
             rich_mode=self.rich_mode,
             adjust_type=self.adjust_type,
-            keep_history=self.keep_history,
+            keep_history=self.keep_history or checkpoint is not None,
+            result_sink=TraderResultSink(self.trader_name, sink_type=result_sink_type) if result_sink_type else None,
         )
 
         self.register_trading_signal_listener(self.account_service)
 
-        self.factors = self.init_factors(
-            entity_ids=self.entity_ids,
-            entity_schema=self.entity_schema,
-            exchanges=self.exchanges,
-            codes=self.codes,
-            start_timestamp=date_time_by_interval(self.start_timestamp, -self.pre_load_days),
-            end_timestamp=self.end_timestamp,
-            adjust_type=self.adjust_type,
-        )
+        #: the factors with the same data and transformer share the loading and computing
+        with data_hub.sharing():
+            self.factors = self.init_factors(
+                entity_ids=self.entity_ids,
+                entity_schema=self.entity_schema,
+                exchanges=self.exchanges,
+                codes=self.codes,
+                start_timestamp=date_time_by_interval(self.start_timestamp, -self.pre_load_days),
+                end_timestamp=self.end_timestamp,
+                adjust_type=self.adjust_type,
+            )
 
         if self.factors:
             self.trading_level_asc = list(set([IntervalLevel(factor.level) for factor in self.factors]))
@@ -129,6 +170,9 @@ class Trader(object):
         else:
             self.trading_level_asc = [self.level]
             self.trading_level_desc = [self.level]
+
+        if checkpoint:
+            self.restore_checkpoint(checkpoint)
         self.on_init()
 
     def on_init(self):
@@ -389,6 +433,45 @@ class Trader(object):
     def get_factors_by_level(self, level):
         return [factor for factor in self.factors if factor.level == level]
 
+    def wait_for_data(self, timestamp: pd.Timestamp, timeout: float) -> bool:
+        """
+        wait for the data of the factors finished at the timestamp, it wakes up once the recorders publish the data
+        events of all the entities of the factors, see :class:`~zvt.contract.data_event.DataEventCenter`
+
+        :param timestamp: the timestamp of the data
+        :param timeout: timeout in seconds
+        :return: whether the data of all the entities is ready
+        """
+        #: (data_schema, provider) -> entity ids, None means the entities are unknown
+        schema_entity_ids = {}
+        for level in self.trading_level_asc:
+            if self.entity_schema.is_finished_kdata_timestamp(timestamp=timestamp, level=level):
+                for factor in self.get_factors_by_level(level=level):
+                    key = (factor.data_schema, factor.provider)
+                    entity_ids = schema_entity_ids.get(key, set())
+                    if entity_ids is None or not factor.entity_ids:
+                        schema_entity_ids[key] = None
+                    else:
+                        schema_entity_ids[key] = entity_ids | set(factor.entity_ids)
+        if not schema_entity_ids or timeout <= 0:
+            return False
+
+        deadline = now_pd_timestamp() + pd.Timedelta(seconds=timeout)
+        all_known = True
+        for key, entity_ids in schema_entity_ids.items():
+            if entity_ids is None:
+                all_known = False
+            remaining = (deadline - now_pd_timestamp()).total_seconds()
+            if not data_event_center.wait_for(
+                [key],
+                timestamp=timestamp,
+                timeout=max(remaining, 0),
+                entity_ids=sorted(entity_ids) if entity_ids is not None else None,
+            ):
+                return False
+        # the data of some entities may be still on the way if only waiting for the first one
+        return all_known
+
     def handle_factor_targets(self, timestamp: pd.Timestamp):
         """
         select targets from factors
@@ -431,12 +514,77 @@ class Trader(object):
                 # 将各级别的targets缓存在level_map_long_targets，level_map_short_targets
                 self.update_targets_by_level(level, all_long_targets, all_short_targets)
 
+    def get_checkpoint_state(self) -> dict:
+        """
+        overwrite it to save the json serializable state of your trader in the checkpoint
+
+        :return: the state
+        """
+        return {}
+
+    def set_checkpoint_state(self, state: dict):
+        """
+        overwrite it to restore the state saved by :meth:`get_checkpoint_state`
+
+        :param state: the state
+        """
+        pass
+
+    def save_checkpoint(self, timestamp: pd.Timestamp):
+        """
+        save the state after trading close at the timestamp, the account and positions, the signals for the next
+        timestamp, the targets of the levels and the factor states
+        """
+        factor_states = {}
+        for factor in self.factors:
+            if factor.states:
+                factor_states[factor.name] = {
+                    entity_id: factor.encode_state(state) for entity_id, state in factor.states.items() if state
+                }
+        account_model = AccountStatsModel.from_orm(self.account_service.account)
+        checkpoint = {
+            "trader_name": self.trader_name,
+            "level": self.level.value,
+            "timestamp": to_pd_timestamp(timestamp).isoformat(),
+            "account": account_model.model_dump(mode="json"),
+            "trading_signals": [trading_signal_to_dict(signal) for signal in self.trading_signals],
+            "long_targets": {level.value: targets for level, targets in self.level_map_long_targets.items()},
+            "short_targets": {level.value: targets for level, targets in self.level_map_short_targets.items()},
+            "factor_states": factor_states,
+            "state": self.get_checkpoint_state(),
+        }
+        # the results are consistent with the checkpoint
+        self.account_service.flush_results()
+        save_checkpoint(self.checkpoint_path, checkpoint)
+        self.logger.info(f"checkpoint at {timestamp} saved to {self.checkpoint_path}")
+
+    def restore_checkpoint(self, checkpoint: dict):
+        """
+        restore the state saved by :meth:`save_checkpoint`, the run continues after the checkpoint timestamp
+        """
+        self.resume_timestamp = to_pd_timestamp(checkpoint["timestamp"])
+        self.account_service.restore_account(AccountStatsModel.model_validate(checkpoint["account"]))
+        self.trading_signals = [trading_signal_from_dict(d) for d in checkpoint["trading_signals"]]
+        self.level_map_long_targets = {IntervalLevel(k): v for k, v in checkpoint["long_targets"].items()}
+        self.level_map_short_targets = {IntervalLevel(k): v for k, v in checkpoint["short_targets"].items()}
+
+        # the factors are computed to the end at init, the states only restored for the factors without them
+        for factor in self.factors:
+            states = checkpoint["factor_states"].get(factor.name)
+            if states and not factor.states:
+                factor.states = {entity_id: factor.decode_state(state) for entity_id, state in states.items()}
+        self.set_checkpoint_state(checkpoint.get("state", {}))
+        self.logger.info(f"resumed from the checkpoint at {self.resume_timestamp}")
+
     def run(self):
         # iterate timestamp of the min level,e.g,9:30,9:35,9.40...for 5min level
         # timestamp represents the timestamp in kdata
         for timestamp in self.entity_schema.get_interval_timestamps(
             start_date=self.start_timestamp, end_date=self.end_timestamp, level=self.level
         ):
+            if self.resume_timestamp is not None and timestamp <= self.resume_timestamp:
+                continue
+
             self.logger.info(f">>>>>>>>>>")
 
             self.entity_ids = self.init_entities(timestamp=timestamp)
@@ -463,16 +611,19 @@ class Trader(object):
                 factor.add_entities(entity_ids=self.entity_ids)
 
             waiting_seconds = 0
+            data_ready = False
+            move_on_timeout = 0
 
             if self.level == IntervalLevel.LEVEL_1DAY:
                 if is_same_date(timestamp, now_pd_timestamp()):
-                    while True:
-                        self.logger.info(f"time is:{now_pd_timestamp()},just smoke for minutes")
-                        time.sleep(600)
-                        current = now_pd_timestamp()
-                        if current.hour >= 19:
-                            waiting_seconds = 20
-                            break
+                    # wake up once the data of today recorded, at latest 19:00
+                    deadline = timestamp.normalize() + pd.Timedelta(hours=19)
+                    self.logger.info(f"time is:{now_pd_timestamp()},waiting for the data until {deadline}")
+                    data_ready = self.wait_for_data(
+                        timestamp=timestamp, timeout=(deadline - now_pd_timestamp()).total_seconds()
+                    )
+                    waiting_seconds = 20
+                    move_on_timeout = 0 if data_ready else waiting_seconds
 
             elif self.real_time:
                 # all factor move on to handle the coming data
@@ -484,6 +635,15 @@ class Trader(object):
                 seconds = (now_pd_timestamp() - real_end_timestamp).total_seconds()
                 waiting_seconds = self.level.to_second() - seconds
 
+                if waiting_seconds > 0:
+                    # the time waiting for events and polling share the deadline
+                    deadline = now_pd_timestamp() + pd.Timedelta(seconds=waiting_seconds + 20)
+                    #: no events would come if the bus is disconnected, poll the db
+                    if self.event_driven and data_bus.is_connected():
+                        data_ready = self.wait_for_data(timestamp=timestamp, timeout=waiting_seconds + 20)
+                    # the data is there if notified, no need to poll
+                    move_on_timeout = 0 if data_ready else max((deadline - now_pd_timestamp()).total_seconds(), 0)
+
             # meaning the future kdata not ready yet,we could move on to check
             if waiting_seconds > 0:
                 # iterate the factor from min to max which in finished timestamp kdata
@@ -491,7 +651,7 @@ class Trader(object):
                     if self.entity_schema.is_finished_kdata_timestamp(timestamp=timestamp, level=level):
                         factors = self.get_factors_by_level(level=level)
                         for factor in factors:
-                            factor.move_on(to_timestamp=timestamp, timeout=waiting_seconds + 20)
+                            factor.move_on(to_timestamp=timestamp, timeout=move_on_timeout)
 
             if self.factors:
                 self.handle_factor_targets(timestamp=timestamp)
@@ -518,6 +678,9 @@ class Trader(object):
                 self.level != IntervalLevel.LEVEL_1DAY and self.entity_schema.is_close_timestamp(timestamp)
             ):
                 self.on_trading_close(timestamp)
+                self.closed_count = self.closed_count + 1
+                if self.checkpoint_interval and self.closed_count % self.checkpoint_interval == 0:
+                    self.save_checkpoint(timestamp)
 
             self.logger.info(f"<<<<<<<<<<\n")
 
@@ -552,6 +715,11 @@ class StockTrader(Trader):
         adjust_type: AdjustType = AdjustType.hfq,
         profit_threshold=(3, -0.3),
         keep_history=False,
+        event_driven: bool = False,
+        resume: bool = False,
+        checkpoint_interval: int = None,
+        checkpoint_path: str = None,
+        result_sink_type: str = None,
     ) -> None:
         super().__init__(
             entity_ids,
@@ -569,6 +737,11 @@ class StockTrader(Trader):
             adjust_type,
             profit_threshold,
             keep_history,
+            event_driven=event_driven,
+            resume=resume,
+            checkpoint_interval=checkpoint_interval,
+            checkpoint_path=checkpoint_path,
+            result_sink_type=result_sink_type,
         )
 
 
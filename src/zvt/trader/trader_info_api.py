@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from typing import List, Union
+from typing import List, Optional, Type, Union
 
 import pandas as pd
 
@@ -8,7 +8,9 @@ from zvt.contract.api import get_data, get_db_session
 from zvt.contract.drawer import Drawer
 from zvt.contract.normal_data import NormalData
 from zvt.contract.reader import DataReader
+from zvt.trader.result_sink import clear_parquet_results, has_parquet_results, read_parquet_results
 from zvt.trader.trader_schemas import AccountStats, Order, TraderInfo, Position
+from zvt.utils.pd_utils import index_df, pd_is_not_null
 
 
 def clear_trader(trader_name, session=None):
@@ -19,6 +21,7 @@ def clear_trader(trader_name, session=None):
     session.query(Position).filter(Position.trader_name == trader_name).delete()
     session.query(Order).filter(Order.trader_name == trader_name).delete()
     session.commit()
+    clear_parquet_results(trader_name)
 
 
 def get_trader_info(
@@ -66,7 +69,63 @@ def get_order_securities(trader_name):
     return [item[0] for item in items]
 
 
-class AccountStatsReader(DataReader):
+def get_trader_results(
+    data_schema: Type[Union[AccountStats, Position, Order]],
+    trader_names: List[str],
+    start_timestamp: Union[str, pd.Timestamp] = None,
+    end_timestamp: Union[str, pd.Timestamp] = None,
+) -> Optional[pd.DataFrame]:
+    """
+    get the results of the traders as df, from the parquet files if the trader saved them there, otherwise from db
+
+    :param data_schema: AccountStats, Position or Order
+    :param trader_names: trader names
+    :param start_timestamp: start timestamp
+    :param end_timestamp: end timestamp
+    :return: the df
+    """
+    dfs = []
+    db_trader_names = []
+    for trader_name in trader_names:
+        if has_parquet_results(trader_name):
+            dfs.append(read_parquet_results(data_schema, trader_name, start_timestamp, end_timestamp))
+        else:
+            db_trader_names.append(trader_name)
+    if db_trader_names:
+        dfs.append(
+            get_data(
+                data_schema=data_schema,
+                provider="zvt",
+                start_timestamp=start_timestamp,
+                end_timestamp=end_timestamp,
+                filters=[data_schema.trader_name.in_(db_trader_names)],
+                order=data_schema.timestamp.asc(),
+            )
+        )
+    dfs = [df for df in dfs if pd_is_not_null(df)]
+    if not dfs:
+        return None
+    return pd.concat(dfs, ignore_index=True)
+
+
+class _TraderResultReader(DataReader):
+    def load_data(self):
+        if not self.trader_names or not any(has_parquet_results(trader_name) for trader_name in self.trader_names):
+            return super().load_data()
+
+        df = get_trader_results(self.data_schema, self.trader_names, self.start_timestamp, self.end_timestamp)
+        if pd_is_not_null(df):
+            if self.columns:
+                names = [col if isinstance(col, str) else col.name for col in self.columns]
+                df = df[[col for col in df.columns if col in names]]
+            df = index_df(df, index=[self.category_field, self.time_field], time_field=self.time_field)
+        self.data_df = df
+        self.data_key = None
+        for listener in self.data_listeners:
+            listener.on_data_loaded(self.data_df)
+
+
+class AccountStatsReader(_TraderResultReader):
     def __init__(
         self,
         start_timestamp: Union[str, pd.Timestamp] = None,
@@ -82,7 +141,7 @@ class AccountStatsReader(DataReader):
         self.filters = filters
 
         if self.trader_names:
-            filter = [AccountStats.trader_name == name for name in self.trader_names]
+            filter = [AccountStats.trader_name.in_(self.trader_names)]
             if self.filters:
                 self.filters += filter
             else:
@@ -116,7 +175,7 @@ class AccountStatsReader(DataReader):
         return drawer.draw_line(show=show)
 
 
-class OrderReader(DataReader):
+class OrderReader(_TraderResultReader):
     def __init__(
         self,
         start_timestamp: Union[str, pd.Timestamp] = None,
@@ -132,7 +191,7 @@ class OrderReader(DataReader):
         self.filters = filters
 
         if self.trader_names:
-            filter = [Order.trader_name == name for name in self.trader_names]
+            filter = [Order.trader_name.in_(self.trader_names)]
             if self.filters:
                 self.filters += filter
             else:
@@ -168,4 +227,11 @@ if __name__ == "__main__":
     )
     drawer.draw_line()
 # the __all__ is generated
-__all__ = ["clear_trader", "get_trader_info", "get_order_securities", "AccountStatsReader", "OrderReader"]
+__all__ = [
+    "clear_trader",
+    "get_trader_info",
+    "get_order_securities",
+    "get_trader_results",
+    "AccountStatsReader",
+    "OrderReader",
+]
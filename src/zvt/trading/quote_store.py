@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+import logging
+import os
+import threading
+import time
+from typing import List, Optional
+
+import pandas as pd
+
+from zvt.contract.api import get_db_engine, get_schema_columns
+from zvt.contract.data_event import DataEvent
+from zvt.domain import StockQuote
+from zvt.domain.quotes.stockhk.stockhk_quote import StockhkQuote
+from zvt.domain.quotes.stockus.stockus_quote import StockusQuote
+from zvt.tag.tag_schemas import StockTags
+from zvt.tag.tag_service import get_stock_pool_entity_ids
+from zvt.utils.pd_utils import pd_is_not_null
+
+logger = logging.getLogger(__name__)
+
+
+def _get_db_version(data_schema, provider: str):
+    # sqlite file and its wal change on every write, no matter which process writes
+    db_path = get_db_engine(provider=provider, data_schema=data_schema).url.database
+    version = [db_path]
+    for file_path in (db_path, db_path + "-wal"):
+        if os.path.exists(file_path):
+            version.append(os.stat(file_path).st_mtime_ns)
+    return tuple(version)
+
+
+class QuoteSnapshotStore(object):
+    """
+    Process local snapshot of the latest quote per entity joined with the cached stock tags.
+
+    It's fed by the quote writer in the same process with :meth:`update` or by the data bus with
+    :meth:`on_data_event`, otherwise it reloads the quote table only when the db changes.
+    """
+
+    entity_type_map_schema = {"stock": StockQuote, "stockus": StockusQuote, "stockhk": StockhkQuote}
+    schema_name_map_entity_type = {
+        schema.__name__: entity_type for entity_type, schema in entity_type_map_schema.items()
+    }
+    quote_provider = "qmt"
+    tag_provider = "zvt"
+
+    def __init__(self, min_check_interval: float = 1.0) -> None:
+        #: min seconds between two db change checks
+        self.min_check_interval = min_check_interval
+
+        self._lock = threading.RLock()
+        #: entity_type -> latest quotes indexed by entity_id
+        self._quotes = {}
+        #: entity_type -> quotes joined with tags
+        self._snapshots = {}
+        #: entity_type -> the origin feeding it, None means the writer in this process, see :meth:`on_peer_disconnected`
+        self._fed = {}
+        #: data key -> db version
+        self._versions = {}
+        #: data key -> last check time
+        self._check_times = {}
+
+        self._tags_df: Optional[pd.DataFrame] = None
+        #: (stock_pool_name, entity_type) -> entity_ids
+        self._pool_entity_ids = {}
+
+        #: increase after every change of the snapshots
+        self.version = 0
+        #: entity_type -> version, increase after every change of the snapshot of the entity type
+        self.versions = {}
+
+    def _is_changed(self, key, data_schema, provider):
+        now = time.time()
+        if key in self._versions and now - self._check_times.get(key, 0) < self.min_check_interval:
+            return False
+        self._check_times[key] = now
+
+        version = _get_db_version(data_schema=data_schema, provider=provider)
+        if self._versions.get(key) != version:
+            self._versions[key] = version
+            return True
+        return False
+
+    def _refresh_tags(self) -> bool:
+        if not self._is_changed("tags", StockTags, self.tag_provider):
+            return False
+        tags_df = StockTags.query_data(
+            provider=self.tag_provider,
+            columns=[
+                StockTags.entity_id,
+                StockTags.entity_type,
+                StockTags.main_tag,
+                StockTags.sub_tag,
+                StockTags.active_hidden_tags,
+            ],
+            return_type="df",
+        )
+        if pd_is_not_null(tags_df):
+            tags_df = tags_df.drop_duplicates(subset="entity_id", keep="last").set_index("entity_id")
+            tags_df["hidden_tags"] = tags_df["active_hidden_tags"].map(lambda tags: list(tags.keys()) if tags else None)
+            tags_df = tags_df[["entity_type", "main_tag", "sub_tag", "hidden_tags"]]
+        self._tags_df = tags_df
+        self._pool_entity_ids = {}
+        return True
+
+    def _refresh_quotes(self, entity_type) -> bool:
+        if entity_type in self._fed:
+            return False
+        data_schema = self.entity_type_map_schema[entity_type]
+        if not self._is_changed(f"quotes_{entity_type}", data_schema, self.quote_provider):
+            return False
+        df = data_schema.query_data(provider=self.quote_provider, return_type="df")
+        self._set_quotes(entity_type, df)
+        return True
+
+    def _reset_quotes(self, entity_type):
+        # reload the quote table on next get
+        self._fed.pop(entity_type, None)
+        self._versions.pop(f"quotes_{entity_type}", None)
+        self._quotes.pop(entity_type, None)
+        self._snapshots.pop(entity_type, None)
+
+    def _set_quotes(self, entity_type, df: pd.DataFrame):
+        if pd_is_not_null(df):
+            df = df.drop_duplicates(subset="entity_id", keep="last").set_index("entity_id", drop=False)
+            df.index.name = None
+        self._quotes[entity_type] = df
+
+    def _join_tags(self, entity_type):
+        quote_df = self._quotes.get(entity_type)
+        if not pd_is_not_null(quote_df):
+            self._snapshots[entity_type] = None
+            return
+        if pd_is_not_null(self._tags_df):
+            tags_df = self._tags_df[self._tags_df["entity_type"] == entity_type]
+            snapshot = quote_df.join(tags_df[["main_tag", "sub_tag", "hidden_tags"]], how="left")
+        else:
+            snapshot = quote_df.assign(main_tag=None, sub_tag=None, hidden_tags=None)
+        self._snapshots[entity_type] = snapshot
+        self.version = self.version + 1
+        self.versions[entity_type] = self.versions.get(entity_type, 0) + 1
+
+    def update(self, entity_type: str, quote_df: pd.DataFrame):
+        """
+        feed the latest quotes, called by the quote writer
+
+        :param entity_type: entity type of the quotes
+        :param quote_df: the quotes with entity_id column
+        """
+        self._update(entity_type=entity_type, quote_df=quote_df, origin=None)
+
+    def _update(self, entity_type: str, quote_df: pd.DataFrame, origin):
+        if not pd_is_not_null(quote_df):
+            return
+        data_schema = self.entity_type_map_schema[entity_type]
+        cols = [col for col in get_schema_columns(data_schema) if col in quote_df.columns]
+        quote_df = quote_df[cols].drop_duplicates(subset="entity_id", keep="last")
+
+        with self._lock:
+            self._fed[entity_type] = origin
+            current = self._quotes.get(entity_type)
+            if pd_is_not_null(current):
+                current = current[~current.index.isin(quote_df["entity_id"])]
+                quote_df = pd.concat([current, quote_df.set_index("entity_id", drop=False)])
+            self._set_quotes(entity_type, quote_df)
+            self._refresh_tags()
+            self._join_tags(entity_type)
+
+    def clear(self, entity_type: str = None):
+        """
+        drop the quotes kept in memory, they're reloaded from the db on next get,
+        e.g. after the history quotes cleared by the writer
+
+        :param entity_type: entity type, None means all
+        """
+        with self._lock:
+            for current in [entity_type] if entity_type else list(self.entity_type_map_schema.keys()):
+                self._reset_quotes(current)
+
+    def on_data_event(self, event: DataEvent):
+        """
+        feed the quotes recorded by other processes, subscribe it to :class:`~zvt.contract.data_bus.DataBus`.
+        The event without df means the quotes changed without the delta, they're reloaded from the db
+
+        :param event: the data event with the recorded quotes
+        """
+        entity_type = self.schema_name_map_entity_type.get(event.schema_name)
+        if entity_type is None or event.provider != self.quote_provider:
+            return
+        if not pd_is_not_null(event.df):
+            self.clear(entity_type)
+            return
+        with self._lock:
+            # load the current quotes before merging the deltas
+            if entity_type not in self._fed:
+                self._refresh_quotes(entity_type)
+            self._update(entity_type=entity_type, quote_df=event.df, origin=event.origin)
+
+    def on_peer_disconnected(self, peer):
+        """
+        the deltas from the peer are missed after it disconnected, the quotes fed by it are reloaded from the db,
+        register it to :meth:`~zvt.contract.data_bus.DataBus.register_disconnect_listener`
+
+        :param peer: the peer disconnected
+        """
+        with self._lock:
+            for entity_type, origin in list(self._fed.items()):
+                if origin is not None and origin is peer:
+                    self._reset_quotes(entity_type)
+
+    def get_quotes(self, entity_type: str = "stock") -> Optional[pd.DataFrame]:
+        """
+        get the latest quotes joined with main_tag, sub_tag and hidden_tags, indexed by entity_id,
+        the result should not be modified
+
+        :param entity_type: entity type
+        :return: the snapshot df
+        """
+        with self._lock:
+            tags_changed = self._refresh_tags()
+            quotes_changed = self._refresh_quotes(entity_type)
+            if tags_changed or quotes_changed or entity_type not in self._snapshots:
+                self._join_tags(entity_type)
+            return self._snapshots.get(entity_type)
+
+    def get_pool_entity_ids(self, stock_pool_name: str, entity_type: str = "stock") -> Optional[List[str]]:
+        """
+        get the latest entity ids of the stock pool
+
+        :param stock_pool_name: stock pool name
+        :param entity_type: entity type of the stock pool
+        :return: entity ids
+        """
+        with self._lock:
+            self._refresh_tags()
+            key = (stock_pool_name, entity_type)
+            if key not in self._pool_entity_ids:
+                self._pool_entity_ids[key] = get_stock_pool_entity_ids(
+                    stock_pool_name=stock_pool_name, entity_type=entity_type
+                )
+            return self._pool_entity_ids[key]
+
+
+#: the process local store
+quote_store = QuoteSnapshotStore()
+
+
+# the __all__ is generated
+__all__ = ["QuoteSnapshotStore", "quote_store"]
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional
+
+import orjson
+import pandas as pd
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+from starlette.concurrency import run_in_threadpool
+
+import zvt.trading.trading_service as trading_service
+from zvt.contract.api import decode_entity_id, release_db_sessions
+from zvt.trading.quote_store import quote_store, QuoteSnapshotStore
+from zvt.trading.trading_models import QueryStockQuoteModel, QueryTagQuoteModel
+from zvt.utils.pd_utils import pd_is_not_null
+
+logger = logging.getLogger(__name__)
+
+
+def _default(obj):
+    if obj is pd.NaT:
+        return None
+    if isinstance(obj, pd.Timestamp):
+        return obj.isoformat()
+    raise TypeError
+
+
+def to_json_text(data) -> str:
+    return orjson.dumps(data, default=_default, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def diff_quotes(pre_df: Optional[pd.DataFrame], df: Optional[pd.DataFrame]):
+    """
+    compare the quotes pushed last time with the current quotes
+
+    :param pre_df: the quotes pushed last time, indexed by entity_id
+    :param df: the current quotes, indexed by entity_id
+    :return: changed(or added) quotes df, removed entity ids
+    """
+    if not pd_is_not_null(df):
+        return None, pre_df.index.tolist() if pd_is_not_null(pre_df) else []
+    if not pd_is_not_null(pre_df):
+        return df, []
+
+    removed = pre_df.index.difference(df.index).tolist()
+    pre_df = pre_df.reindex(index=df.index, columns=df.columns)
+    same = (df == pre_df) | (df.isna() & pre_df.isna())
+    return df[~same.all(axis=1)], removed
+
+
+class QuoteStreamHub(object):
+    """
+    Fan out the quote store changes to the websocket clients.
+
+    Clients subscribe with :class:`QueryStockQuoteModel`, the clients with same subscription share one computation,
+    and all the store changes in one interval are coalesced into one push.
+    """
+
+    def __init__(self, interval: float = 1.0) -> None:
+        # the store used by trading_service
+        self.store: QuoteSnapshotStore = quote_store
+        #: min seconds between two pushes
+        self.interval = interval
+
+        #: client -> subscription key
+        self.clients: Dict[WebSocket, str] = {}
+        #: subscription key -> subscription
+        self.subscriptions: Dict[str, QueryStockQuoteModel] = {}
+        #: subscription key -> the last quotes
+        self._last_quotes: Dict[str, pd.DataFrame] = {}
+        #: subscription key -> the last message without quotes
+        self._last_stats: Dict[str, dict] = {}
+
+        #: entity_type -> the store version of the last build
+        self._versions: Dict[str, int] = {}
+        # building in the threadpool
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def _get_tag_stats(self, stock_pool_name: str, cache: dict) -> Optional[List[dict]]:
+        if not stock_pool_name:
+            return None
+        if stock_pool_name not in cache:
+            cache[stock_pool_name] = trading_service.query_tag_quotes(
+                QueryTagQuoteModel(stock_pool_name=stock_pool_name, main_tags=[])
+            )
+        return cache[stock_pool_name]
+
+    def _get_entity_type(self, subscription: QueryStockQuoteModel) -> str:
+        # the same with trading_service.query_stock_quotes
+        entity_ids = subscription.entity_ids
+        if subscription.stock_pool_name and subscription.stock_pool_name != "A股":
+            entity_ids = self.store.get_pool_entity_ids(subscription.stock_pool_name)
+        if entity_ids:
+            entity_type, _, _ = decode_entity_id(entity_ids[0])
+            return entity_type
+        return "stock"
+
+    def _build_message(self, key: str, tag_stats_cache: dict, full: bool) -> Optional[dict]:
+        subscription = self.subscriptions.get(key)
+        if not subscription:
+            return None
+        try:
+            result = trading_service.query_stock_quotes(subscription)
+            tag_stats = self._get_tag_stats(subscription.stock_pool_name, tag_stats_cache)
+        except HTTPException as e:
+            return {"type": "error", "detail": e.detail}
+
+        df = None
+        stats = None
+        if result:
+            quotes = result.pop("quotes")
+            stats = result
+            if quotes:
+                df = pd.DataFrame.from_records(quotes)
+                df.index = df["entity_id"].tolist()
+
+        if full:
+            changed_df, removed = df, []
+        else:
+            changed_df, removed = diff_quotes(self._last_quotes.get(key), df)
+        self._last_quotes[key] = df
+        self._last_stats[key] = {"stats": stats, "tag_stats": tag_stats}
+
+        if not full and not pd_is_not_null(changed_df) and not removed:
+            return None
+        return {
+            "type": "snapshot" if full else "diff",
+            "version": self.store.versions.get(self._get_entity_type(subscription)),
+            "stats": stats,
+            "tag_stats": tag_stats,
+            # the order of the subscription
+            "entity_ids": df.index.tolist() if pd_is_not_null(df) else [],
+            "quotes": changed_df.to_dict(orient="records") if pd_is_not_null(changed_df) else [],
+            "removed": removed,
+        }
+
+    def build_messages(self, force: bool = False) -> Dict[str, dict]:
+        """
+        build the messages of the subscriptions whose entity type changed in the store
+
+        :param force: build even if the store not changed
+        :return: subscription key -> message
+        """
+        with self._lock:
+            key_entity_types = {
+                key: self._get_entity_type(subscription) for key, subscription in list(self.subscriptions.items())
+            }
+            changed = set()
+            for entity_type in set(key_entity_types.values()):
+                if entity_type in self.store.entity_type_map_schema:
+                    # trigger the store reloading
+                    self.store.get_quotes(entity_type=entity_type)
+                version = self.store.versions.get(entity_type)
+                if force or version != self._versions.get(entity_type):
+                    changed.add(entity_type)
+                self._versions[entity_type] = version
+
+            messages = {}
+            tag_stats_cache = {}
+            for key, entity_type in key_entity_types.items():
+                if entity_type not in changed:
+                    continue
+                message = self._build_message(key, tag_stats_cache=tag_stats_cache, full=False)
+                if message:
+                    messages[key] = message
+            return messages
+
+    def build_snapshot(self, key: str) -> dict:
+        """
+        the full message for the new client of the subscription
+        """
+        with self._lock:
+            if key in self._last_stats:
+                df = self._last_quotes.get(key)
+                return {
+                    "type": "snapshot",
+                    "version": self._versions.get(self._get_entity_type(self.subscriptions[key])),
+                    **self._last_stats[key],
+                    "entity_ids": df.index.tolist() if pd_is_not_null(df) else [],
+                    "quotes": df.to_dict(orient="records") if pd_is_not_null(df) else [],
+                    "removed": [],
+                }
+            return self._build_message(key, tag_stats_cache={}, full=True)
+
+    def subscribe(self, websocket: WebSocket, subscription: QueryStockQuoteModel) -> str:
+        key = subscription.model_dump_json()
+        self.clients[websocket] = key
+        self.subscriptions[key] = subscription
+        self._clean_subscriptions()
+        return key
+
+    def unsubscribe(self, websocket: WebSocket):
+        self.clients.pop(websocket, None)
+        self._clean_subscriptions()
+
+    def _clean_subscriptions(self):
+        keys = set(self.clients.values())
+        for key in list(self.subscriptions.keys()):
+            if key not in keys:
+                self.subscriptions.pop(key)
+                self._last_quotes.pop(key, None)
+                self._last_stats.pop(key, None)
+
+    async def _send(self, websocket: WebSocket, text: str):
+        try:
+            await asyncio.wait_for(websocket.send_text(text), timeout=self.interval * 5)
+        except Exception as e:
+            logger.warning(f"drop quote stream client: {e}")
+            self.unsubscribe(websocket)
+
+    async def _run(self):
+        while self.clients:
+            try:
+                messages = await run_in_threadpool(release_db_sessions(self.build_messages))
+                for key, message in messages.items():
+                    text = to_json_text(message)
+                    websockets = [websocket for websocket, the_key in list(self.clients.items()) if the_key == key]
+                    await asyncio.gather(*[self._send(websocket, text) for websocket in websockets])
+            except Exception as e:
+                logger.exception(f"quote stream error: {e}")
+            await asyncio.sleep(self.interval)
+        self._task = None
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def serve(self, websocket: WebSocket):
+        """
+        serve the client, every json message from the client is a subscription replacing the old one
+        """
+        await websocket.accept()
+        try:
+            while True:
+                data = await websocket.receive_json()
+                try:
+                    subscription = QueryStockQuoteModel(**data)
+                except Exception as e:
+                    await websocket.send_text(to_json_text({"type": "error", "detail": str(e)}))
+                    continue
+                key = self.subscribe(websocket, subscription)
+                message = await run_in_threadpool(release_db_sessions(self.build_snapshot), key)
+                if message:
+                    await websocket.send_text(to_json_text(message))
+                self._ensure_running()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.unsubscribe(websocket)
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+
+#: the process local hub
+quote_stream_hub = QuoteStreamHub()
+
+
+# the __all__ is generated
+__all__ = ["to_json_text", "diff_quotes", "QuoteStreamHub", "quote_stream_hub"]
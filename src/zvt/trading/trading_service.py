@@ -1,19 +1,16 @@
 # -*- coding: utf-8 -*-
 import logging
-from typing import List
 
-import pandas as pd
 from fastapi import HTTPException
 from fastapi_pagination.ext.sqlalchemy import paginate
 
 import zvt.api.kdata as kdata_api
 import zvt.contract.api as contract_api
-from zvt.common.query_models import TimeUnit
-from zvt.domain import Stock, StockQuote, Stock1mQuote
-from zvt.domain.quotes.stockhk.stockhk_quote import StockhkQuote
-from zvt.domain.quotes.stockus.stockus_quote import StockusQuote
-from zvt.tag.tag_schemas import StockTags, StockPools, StockPoolInfo
+from zvt.common.query_models import TimeUnit, OrderByType
+from zvt.domain import Stock, Stock1mQuote
+from zvt.tag.tag_schemas import StockPoolInfo
 from zvt.trading.common import ExecutionStatus
+from zvt.trading.quote_store import quote_store
 from zvt.trading.trading_models import (
     BuildTradingPlanModel,
     QueryTradingPlanModel,
@@ -174,11 +171,12 @@ def check_trading_plan():
 
 
 def query_quote_stats():
-    quote_df = StockQuote.query_data(
-        return_type="df",
-        filters=[StockQuote.change_pct >= -0.31, StockQuote.change_pct <= 0.31],
-        columns=["timestamp", "entity_id", "time", "change_pct", "turnover", "is_limit_up", "is_limit_down"],
-    )
+    quote_df = quote_store.get_quotes(entity_type="stock")
+    if not pd_is_not_null(quote_df):
+        return None
+    quote_df = quote_df[(quote_df["change_pct"] >= -0.31) & (quote_df["change_pct"] <= 0.31)]
+    if not pd_is_not_null(quote_df):
+        return None
     current_stats = cal_quote_stats(quote_df)
     start_timestamp = current_stats["timestamp"]
 
@@ -219,74 +217,71 @@ def query_quote_stats():
 
 
 def cal_quote_stats(quote_df):
-    quote_df["ss"] = 1
+    change_pct = quote_df["change_pct"]
+    return {
+        "timestamp": quote_df["timestamp"].iloc[-1],
+        "time": quote_df["time"].iloc[-1],
+        "up_count": int((change_pct > 0).sum()),
+        "down_count": int((change_pct <= 0).sum()),
+        "turnover": float(quote_df["turnover"].sum()),
+        "change_pct": float(change_pct.mean()),
+        "limit_up_count": int((quote_df["is_limit_up"] == True).sum()),
+        "limit_down_count": int((quote_df["is_limit_down"] == True).sum()),
+    }
+
 
-    df = (
-        quote_df.groupby("ss")
+def cal_tag_quote_group_stats(df, by="main_tag"):
+    df = df.assign(
+        _up=df["change_pct"] > 0,
+        _down=df["change_pct"] <= 0,
+        _limit_up=df["is_limit_up"] == True,
+        _limit_down=df["is_limit_down"] == True,
+    )
+    return (
+        df.groupby(by)
         .agg(
-            timestamp=("timestamp", "last"),
-            time=("time", "last"),
-            up_count=("change_pct", lambda x: (x > 0).sum()),
-            down_count=("change_pct", lambda x: (x <= 0).sum()),
+            up_count=("_up", "sum"),
+            down_count=("_down", "sum"),
             turnover=("turnover", "sum"),
             change_pct=("change_pct", "mean"),
-            limit_up_count=("is_limit_up", "sum"),
-            limit_down_count=("is_limit_down", lambda x: (x == True).sum()),
+            limit_up_count=("_limit_up", "sum"),
+            limit_down_count=("_limit_down", "sum"),
+            total_count=(by, "size"),  # 添加计数，计算每个分组的总行数
         )
-        .reset_index(drop=True)
+        .reset_index(drop=False)
     )
 
-    return df.to_dict(orient="records")[0]
 
+def _get_entity_type(entity_ids):
+    entity_type = "stock"
+    if entity_ids:
+        entity_type, _, _ = contract_api.decode_entity_id(entity_ids[0])
+    if entity_type not in quote_store.entity_type_map_schema:
+        raise HTTPException(status_code=400, detail=f"Unsupported entity type: {entity_type}")
+    return entity_type
 
-def cal_tag_quote_stats(stock_pool_name):
-    stock_pools: List[StockPools] = StockPools.query_data(
-        filters=[StockPools.stock_pool_name == stock_pool_name],
-        order=StockPools.timestamp.desc(),
-        limit=1,
-        return_type="domain",
-    )
-    if stock_pools:
-        entity_ids = stock_pools[0].entity_ids
-    else:
-        entity_ids = None
-
-    tag_df = StockTags.query_data(
-        entity_ids=entity_ids,
-        filters=[StockTags.main_tag.isnot(None)],
-        columns=[StockTags.entity_id, StockTags.main_tag],
-        return_type="df",
-        index="entity_id",
-    )
 
-    entity_ids = tag_df["entity_id"].tolist()
+def cal_tag_quote_stats(stock_pool_name):
+    entity_ids = quote_store.get_pool_entity_ids(stock_pool_name)
 
-    quote_df = StockQuote.query_data(entity_ids=entity_ids, return_type="df", index="entity_id")
-    timestamp = quote_df["timestamp"].tolist()[0]
+    df = quote_store.get_quotes(entity_type="stock")
+    if not pd_is_not_null(df):
+        logger.warning(f"no quotes for the tag quote stats of {stock_pool_name}")
+        return
+    if entity_ids:
+        df = df[df.index.isin(entity_ids)]
+    df = df[df["main_tag"].notna()]
+    if not pd_is_not_null(df):
+        logger.warning(f"no tagged quotes for the tag quote stats of {stock_pool_name}")
+        return
+    timestamp = df["timestamp"].tolist()[0]
 
-    df = pd.concat([tag_df, quote_df], axis=1)
-    grouped_df = (
-        df.groupby("main_tag")
-        .agg(
-            up_count=("change_pct", lambda x: (x > 0).sum()),
-            down_count=("change_pct", lambda x: (x <= 0).sum()),
-            turnover=("turnover", "sum"),
-            change_pct=("change_pct", "mean"),
-            limit_up_count=("is_limit_up", "sum"),
-            limit_down_count=("is_limit_down", lambda x: (x == True).sum()),
-            total_count=("main_tag", "size"),  # 添加计数，计算每个分组的总行数
-        )
-        .reset_index(drop=False)
-    )
+    grouped_df = cal_tag_quote_group_stats(df)
     grouped_df["stock_pool_name"] = stock_pool_name
 
-    grouped_df["entity_id"] = grouped_df[["stock_pool_name", "main_tag"]].apply(
-        lambda se: "{}_{}".format(se["stock_pool_name"], se["main_tag"]), axis=1
-    )
+    grouped_df["entity_id"] = stock_pool_name + "_" + grouped_df["main_tag"]
     grouped_df["timestamp"] = timestamp
-    grouped_df["id"] = grouped_df[["entity_id", "timestamp"]].apply(
-        lambda se: "{}_{}".format(se["entity_id"], to_date_time_str(se["timestamp"])), axis=1
-    )
+    grouped_df["id"] = grouped_df["entity_id"] + "_" + to_date_time_str(timestamp)
 
     print(grouped_df)
 
@@ -296,55 +291,16 @@ def cal_tag_quote_stats(stock_pool_name):
 
 
 def query_tag_quotes(query_tag_quote_model: QueryTagQuoteModel):
-    stock_pools: List[StockPools] = StockPools.query_data(
-        filters=[StockPools.stock_pool_name == query_tag_quote_model.stock_pool_name],
-        order=StockPools.timestamp.desc(),
-        limit=1,
-        return_type="domain",
-    )
-    if stock_pools:
-        entity_ids = stock_pools[0].entity_ids
-    else:
-        entity_ids = None
+    entity_ids = quote_store.get_pool_entity_ids(query_tag_quote_model.stock_pool_name)
+    entity_type = _get_entity_type(entity_ids)
 
-    entity_type = "stock"
+    df = quote_store.get_quotes(entity_type=entity_type)
+    if not pd_is_not_null(df):
+        return []
     if entity_ids:
-        entity_id = entity_ids[0]
-        entity_type, _, _ = contract_api.decode_entity_id(entity_id)
-
-    tag_df = StockTags.query_data(
-        entity_ids=entity_ids,
-        filters=[StockTags.entity_type == entity_type],
-        columns=[StockTags.entity_id, StockTags.main_tag],
-        return_type="df",
-        index="entity_id",
-    )
-
-    entity_ids = tag_df["entity_id"].tolist()
-
-    if entity_type == "stock":
-        quote_df = StockQuote.query_data(entity_ids=entity_ids, return_type="df", index="entity_id")
-    elif entity_type == "stockus":
-        quote_df = StockusQuote.query_data(entity_ids=entity_ids, return_type="df", index="entity_id")
-    elif entity_type == "stockhk":
-        quote_df = StockhkQuote.query_data(entity_ids=entity_ids, return_type="df", index="entity_id")
-    else:
-        raise HTTPException(status_code=400, detail=f"Unsupported entity type: {entity_type}")
+        df = df[df.index.isin(entity_ids)]
 
-    df = pd.concat([tag_df, quote_df], axis=1)
-    grouped_df = (
-        df.groupby("main_tag")
-        .agg(
-            up_count=("change_pct", lambda x: (x > 0).sum()),
-            down_count=("change_pct", lambda x: (x <= 0).sum()),
-            turnover=("turnover", "sum"),
-            change_pct=("change_pct", "mean"),
-            limit_up_count=("is_limit_up", "sum"),
-            limit_down_count=("is_limit_down", lambda x: (x == True).sum()),
-            total_count=("main_tag", "size"),  # 添加计数，计算每个分组的总行数
-        )
-        .reset_index(drop=False)
-    )
+    grouped_df = cal_tag_quote_group_stats(df)
     sorted_df = grouped_df.sort_values(by=["turnover", "total_count"], ascending=[False, False])
 
     return sorted_df.to_dict(orient="records")
@@ -362,91 +318,40 @@ def query_stock_quotes(query_stock_quote_model: QueryStockQuoteModel):
             raise HTTPException(status_code=404, detail=f"Stock pool info {stock_pool_name} not found")
 
         if stock_pool_name != "A股":
-            stock_pools: List[StockPools] = StockPools.query_data(
-                filters=[StockPools.stock_pool_name == stock_pool_name],
-                order=StockPools.timestamp.desc(),
-                limit=1,
-                return_type="domain",
-            )
-            if not stock_pools:
+            entity_ids = quote_store.get_pool_entity_ids(stock_pool_name)
+            if not entity_ids:
                 raise HTTPException(status_code=404, detail=f"Stock pool {stock_pool_name} not found")
-            if stock_pools:
-                entity_ids = stock_pools[0].entity_ids
     else:
         entity_ids = query_stock_quote_model.entity_ids
 
-    entity_type = "stock"
-    if entity_ids:
-        entity_id = entity_ids[0]
-        entity_type, _, _ = contract_api.decode_entity_id(entity_id)
-
-    if query_stock_quote_model.main_tag:
-        tags_dict = StockTags.query_data(
-            entity_ids=entity_ids,
-            filters=[StockTags.entity_type == entity_type, StockTags.main_tag == query_stock_quote_model.main_tag],
-            return_type="dict",
-        )
-        if not tags_dict:
-            return None
-        entity_ids = [item["entity_id"] for item in tags_dict]
-    else:
-        tags_dict = StockTags.query_data(
-            return_type="dict",
-        )
-
-    entity_tags_map = {item["entity_id"]: item for item in tags_dict}
-
-    if entity_type == "stock":
-        order = eval(
-            f"StockQuote.{query_stock_quote_model.order_by_field}.{query_stock_quote_model.order_by_type.value}()"
-        )
-        df = StockQuote.query_data(order=order, entity_ids=entity_ids, return_type="df")
-    elif entity_type == "stockus":
-        order = eval(
-            f"StockusQuote.{query_stock_quote_model.order_by_field}.{query_stock_quote_model.order_by_type.value}()"
-        )
-        df = StockusQuote.query_data(order=order, entity_ids=entity_ids, return_type="df")
-    elif entity_type == "stockhk":
-        order = eval(
-            f"StockhkQuote.{query_stock_quote_model.order_by_field}.{query_stock_quote_model.order_by_type.value}()"
-        )
-        df = StockhkQuote.query_data(order=order, entity_ids=entity_ids, return_type="df")
-    else:
-        raise HTTPException(status_code=400, detail=f"Unsupported entity type: {entity_type}")
+    entity_type = _get_entity_type(entity_ids)
 
+    df = quote_store.get_quotes(entity_type=entity_type)
     if not pd_is_not_null(df):
         return None
 
-    def set_tags(quote):
-        entity_id = quote["entity_id"]
-        main_tag = entity_tags_map.get(entity_id, {}).get("main_tag", None)
-        sub_tag = entity_tags_map.get(entity_id, {}).get("sub_tag", None)
-        active_hidden_tags = entity_tags_map.get(entity_id, {}).get("active_hidden_tags", None)
-        if active_hidden_tags:
-            hidden_tags = list(active_hidden_tags.keys())
-        else:
-            hidden_tags = None
-        return pd.Series({"main_tag": main_tag, "sub_tag": sub_tag, "hidden_tags": hidden_tags})
-
-    df[["main_tag", "sub_tag", "hidden_tags"]] = df.apply(set_tags, axis=1)
-
-    up_count = (df["change_pct"] > 0).sum()
-    down_count = (df["change_pct"] < 0).sum()
-    turnover = df["turnover"].sum()
-    change_pct = df["change_pct"].mean()
-    limit_up_count = df["is_limit_up"].sum()
-    limit_down_count = df["is_limit_down"].sum()
+    if entity_ids:
+        df = df[df.index.isin(entity_ids)]
+    if query_stock_quote_model.main_tag:
+        df = df[df["main_tag"] == query_stock_quote_model.main_tag]
+    if not pd_is_not_null(df):
+        return None
 
-    quotes = df.to_dict(orient="records")
+    order_by_field = query_stock_quote_model.order_by_field
+    if order_by_field not in df.columns:
+        raise HTTPException(status_code=400, detail=f"Unsupported order by field: {order_by_field}")
+    ascending = query_stock_quote_model.order_by_type == OrderByType.asc
+    # same with sqlite, null is the smallest
+    df = df.sort_values(by=order_by_field, ascending=ascending, na_position="first" if ascending else "last")
 
     result = {
-        "up_count": up_count,
-        "down_count": down_count,
-        "turnover": turnover,
-        "change_pct": change_pct,
-        "limit_up_count": limit_up_count,
-        "limit_down_count": limit_down_count,
-        "quotes": quotes[: query_stock_quote_model.limit],
+        "up_count": int((df["change_pct"] > 0).sum()),
+        "down_count": int((df["change_pct"] < 0).sum()),
+        "turnover": float(df["turnover"].sum()),
+        "change_pct": float(df["change_pct"].mean()),
+        "limit_up_count": int((df["is_limit_up"] == True).sum()),
+        "limit_down_count": int((df["is_limit_down"] == True).sum()),
+        "quotes": df.iloc[: query_stock_quote_model.limit].to_dict(orient="records"),
     }
     return result
 
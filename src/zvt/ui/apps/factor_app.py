@@ -11,6 +11,7 @@ from zvt.contract import Mixin
 from zvt.contract import zvt_context, IntervalLevel
 from zvt.contract.api import get_entities, get_schema_by_name, get_schema_columns
 from zvt.contract.drawer import StackedDrawer
+from zvt.contract.registry_manifest import load_all
 from zvt.trader.trader_info_api import AccountStatsReader, OrderReader, get_order_securities
 from zvt.trader.trader_info_api import get_trader_info
 from zvt.trader.trader_schemas import TraderInfo
@@ -18,6 +19,9 @@ from zvt.ui import zvt_app
 from zvt.ui.components.dcc_components import get_account_stats_figure
 from zvt.utils.pd_utils import pd_is_not_null
 
+# the options need all the schemas and factors
+load_all()
+
 account_readers = []
 order_readers = []
 
@@ -3,8 +3,7 @@
 from dash import dcc
 
 from zvt.api.kdata import get_kdata_schema
-from zvt.contract import zvt_context
-from zvt.contract.api import decode_entity_id
+from zvt.contract.api import decode_entity_id, get_entity_schema
 from zvt.contract.drawer import Drawer
 from zvt.contract.reader import DataReader
 from zvt.trader.trader_info_api import OrderReader, AccountStatsReader
@@ -37,7 +36,7 @@ def get_trading_signals_figure(
         end_timestamp = order_reader.end_timestamp
     kdata_reader = DataReader(
         data_schema=data_schema,
-        entity_schema=zvt_context.tradable_schema_map.get(entity_type),
+        entity_schema=get_entity_schema(entity_type),
         entity_ids=[entity_id],
         start_timestamp=start_timestamp,
         end_timestamp=end_timestamp,
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 from typing import List, Union
 
+import numpy as np
 import pandas as pd
 
 
@@ -120,6 +121,124 @@ def fill_with_same_index(df_list: List[pd.DataFrame]):
     return result
 
 
+def compact_df(
+    df: pd.DataFrame,
+    category_cols: List[str] = None,
+    category_ratio: float = 0.5,
+    float_dtype: str = "float32",
+    float_atol: float = 1e-3,
+) -> pd.DataFrame:
+    """
+    down cast the columns of df to compact dtypes for saving memory, the index is not changed
+
+    :param df: the df
+    :param category_cols: the columns converted to category, default is the str columns
+        whose unique count is less than category_ratio of the rows, e.g. entity_id, code, name, level
+    :param category_ratio: max ratio of unique count to rows for the default category columns
+    :param float_dtype: the float dtype down cast to, None means not down cast float
+    :param float_atol: the float column is down cast only if the max absolute error is not greater than it,
+        it's absolute instead of relative to the values, e.g. the prices are kept exactly in 3 decimals while
+        the big volume and turnover are not down cast, None means always down cast
+    :return: the compact df, df itself is not changed
+    """
+    if not pd_is_not_null(df):
+        return df
+
+    #: the columns are replaced in the shallow copy, the data of df is shared until replaced
+    df = df.copy(deep=False)
+
+    for col in df.columns:
+        s = df[col]
+        if category_cols is not None:
+            if col in category_cols:
+                df[col] = s.astype("category")
+        elif s.dtype == object and pd.api.types.infer_dtype(s, skipna=True) == "string":
+            if s.nunique() < len(s) * category_ratio:
+                df[col] = s.astype("category")
+
+        if pd.api.types.is_integer_dtype(s.dtype):
+            df[col] = pd.to_numeric(s, downcast="integer")
+        elif float_dtype and pd.api.types.is_float_dtype(s.dtype) and np.dtype(s.dtype).itemsize > 4:
+            values = s.to_numpy()
+            with np.errstate(over="ignore", invalid="ignore"):
+                down_values = values.astype(float_dtype)
+            if float_atol is None or np.allclose(down_values, values, rtol=0, atol=float_atol, equal_nan=True):
+                df[col] = down_values
+    return df
+
+
+def df_memory_usage(df: pd.DataFrame) -> int:
+    """
+    memory usage of df in bytes, including the index and the objects
+
+    :param df: the df
+    :return: bytes
+    """
+    if df is None:
+        return 0
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def fill_asof(
+    df: pd.DataFrame,
+    timestamps,
+    fill_method: str = "ffill",
+    limit: int = None,
+    freq: str = "D",
+    category_field: str = "entity_id",
+    time_field: str = "timestamp",
+) -> pd.DataFrame:
+    """
+    get the values of every entity at the timestamps from the sparse df, which is the latest value at or before the
+    timestamp for ffill(the earliest one at or after the timestamp for bfill), column by column.
+    It's the same as reindexing df to the dense calendar and fillna, but only the requested timestamps are
+    materialized.
+
+    :param df: normal df with index (entity_id, timestamp)
+    :param timestamps: the requested timestamps
+    :param fill_method: ffill or bfill
+    :param limit: fill at most limit periods of freq after(before for bfill) the value, None means no limit
+    :param freq: the period of limit
+    :param category_field: the entity level name
+    :param time_field: the time level name
+    :return: normal df at the requested timestamps, the rows without any value are dropped
+    """
+    if not pd_is_not_null(df):
+        return df
+    assert fill_method in ("ffill", "bfill")
+
+    timestamps = pd.DatetimeIndex(pd.to_datetime(timestamps)).unique().sort_values()
+    entity_ids = df.index.get_level_values(0).unique()
+    left = pd.DataFrame(
+        {
+            category_field: np.tile(entity_ids.to_numpy(), len(timestamps)),
+            time_field: np.repeat(timestamps.to_numpy(), len(entity_ids)),
+        }
+    )
+    tolerance = pd.Timedelta(limit, unit=freq) if limit is not None else None
+    direction = "backward" if fill_method == "ffill" else "forward"
+
+    flat_df = df.loc[~df.index.duplicated(keep="first")].copy()
+    flat_df.index.names = [category_field, time_field]
+    flat_df = flat_df.reset_index().sort_values(time_field)
+    flat_df[time_field] = pd.to_datetime(flat_df[time_field])
+
+    result = left
+    for col in df.columns:
+        right = flat_df.loc[flat_df[col].notna(), [category_field, time_field, col]]
+        result = pd.merge_asof(
+            result,
+            right,
+            on=time_field,
+            by=category_field,
+            direction=direction,
+            tolerance=tolerance,
+            allow_exact_matches=True,
+        )
+    result = result.set_index([category_field, time_field]).sort_index(level=[0, 1])
+    return result.dropna(how="all")
+
+
 # the __all__ is generated
 __all__ = [
     "drop_continue_duplicate",
@@ -134,4 +253,7 @@ __all__ = [
     "is_normal_df",
     "df_subset",
     "fill_with_same_index",
+    "compact_df",
+    "df_memory_usage",
+    "fill_asof",
 ]
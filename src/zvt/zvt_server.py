@@ -8,11 +8,15 @@ from fastapi.responses import ORJSONResponse
 from fastapi_pagination import add_pagination
 
 from zvt import zvt_env
+from zvt.contract.data_bus import data_bus
+from zvt.contract.data_event import DataTopic
 from zvt.rest.data import data_router
 from zvt.rest.factor import factor_router
 from zvt.rest.misc import misc_router
 from zvt.rest.trading import trading_router
 from zvt.rest.work import work_router
+from zvt.trading.quote_store import quote_store
+from zvt.trading.quote_stream import quote_stream_hub
 
 app = FastAPI(default_response_class=ORJSONResponse)
 
@@ -32,6 +36,20 @@ async def root():
     return {"message": "Hello World"}
 
 
+@app.on_event("startup")
+async def startup():
+    # receive the quotes from the quote recorder process instead of reloading the db
+    data_bus.subscribe(quote_store.on_data_event, topic=DataTopic.quote)
+    data_bus.register_disconnect_listener(quote_store.on_peer_disconnected)
+    data_bus.connect()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await quote_stream_hub.stop()
+    data_bus.stop()
+
+
 app.include_router(data_router)
 app.include_router(factor_router)
 app.include_router(work_router)
@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
-from zvt.api.kdata import get_kdata
+import pandas as pd
+import pytest
+
+from zvt.api.kdata import get_kdata, adjust_kdata, to_adjust_factor_df, has_adjust_change
 from zvt.api.kdata import get_latest_kdata_date
 from zvt.contract import IntervalLevel, AdjustType
+from zvt.contract.api import df_to_db, del_data
+from zvt.domain import Stock1dKdata, Stock1dBfqKdata, AdjustFactor
+from zvt.utils.pd_utils import pd_is_not_null
 
 
 def test_jq_1mon_kdata():
@@ -44,3 +50,109 @@ def test_jq_1d_hfq_kdata():
 def test_get_latest_kdata_date():
     date = get_latest_kdata_date(provider="joinquant", entity_type="stock", adjust_type=AdjustType.hfq)
     assert date is not None
+
+
+def test_adjust_kdata():
+    timestamps = pd.date_range("2024-01-01", periods=6)
+    bfq_df = pd.DataFrame(
+        {
+            "entity_id": "stock_sz_000338",
+            "code": "000338",
+            "provider": "em",
+            "timestamp": timestamps,
+            "close": [10.0, 10.2, 9.7, 9.8, 9.9, 9.5],
+        }
+    )
+    # dividend 0.5 at 2024-01-03 and 0.4 at 2024-01-06
+    hfq_factors = [1, 1, 10.2 / 9.7, 10.2 / 9.7, 10.2 / 9.7, 10.2 / 9.7 * 9.9 / 9.5]
+    hfq_df = bfq_df.copy()
+    hfq_df["close"] = (bfq_df["close"] * hfq_factors).round(2)
+
+    factor_df = to_adjust_factor_df(bfq_df=bfq_df, hfq_df=hfq_df)
+    assert factor_df["timestamp"].tolist() == [timestamps[0], timestamps[2], timestamps[5]]
+
+    # incremental record
+    assert to_adjust_factor_df(bfq_df=bfq_df[3:], hfq_df=hfq_df[3:], latest_hfq_factor=factor_df.iloc[1]["hfq_factor"])[
+        "timestamp"
+    ].tolist() == [timestamps[5]]
+
+    df = adjust_kdata(kdata_df=bfq_df, factor_df=factor_df, adjust_type="hfq")
+    assert (df["close"] - hfq_df["close"]).abs().max() < 0.01
+
+    df = adjust_kdata(kdata_df=bfq_df, factor_df=factor_df, adjust_type="qfq")
+    assert df["close"].iloc[-1] == 9.5
+    assert round(df["close"].iloc[0], 2) == round(10 * 9.7 / 10.2 * 9.5 / 9.9, 2)
+
+    # the bfq prices are not returned as adjusted
+    with pytest.raises(ValueError):
+        adjust_kdata(kdata_df=bfq_df, factor_df=None, adjust_type="qfq")
+
+
+def test_get_kdata_adjust_on_read():
+    entity_id = "stock_sz_999988"
+    timestamps = pd.date_range("2024-01-01", periods=4)
+    bfq_df = pd.DataFrame(
+        {
+            "id": [f"{entity_id}_{timestamp.date()}" for timestamp in timestamps],
+            "entity_id": entity_id,
+            "code": "999988",
+            "provider": "em",
+            "level": "1d",
+            "timestamp": timestamps,
+            "close": [10.0, 10.2, 9.7, 9.8],
+        }
+    )
+    factor_df = pd.DataFrame(
+        {
+            "id": [f"{entity_id}_{timestamps[0].date()}", f"{entity_id}_{timestamps[2].date()}"],
+            "entity_id": entity_id,
+            "code": "999988",
+            "provider": "em",
+            "timestamp": [timestamps[0], timestamps[2]],
+            "hfq_factor": [1.0, 2.0],
+        }
+    )
+    for schema in (Stock1dBfqKdata, AdjustFactor):
+        del_data(schema, filters=[schema.entity_id == entity_id], provider="em")
+    df_to_db(df=bfq_df, data_schema=Stock1dBfqKdata, provider="em", force_update=True)
+    try:
+        # the factors are not recorded
+        with pytest.raises(ValueError):
+            get_kdata(entity_id=entity_id, provider="em", adjust_on_read=True)
+        assert not pd_is_not_null(get_kdata(entity_id=entity_id, provider="em"))
+
+        df_to_db(df=factor_df, data_schema=AdjustFactor, provider="em", force_update=True)
+        df = get_kdata(entity_id=entity_id, provider="em")
+        assert df["close"].tolist() == [5.0, 5.1, 9.7, 9.8]
+        df = get_kdata(entity_id=entity_id, provider="em", adjust_type="hfq")
+        assert df["close"].tolist() == [10.0, 10.2, 19.4, 19.6]
+
+        # the clauses built with the qfq schema
+        df = get_kdata(
+            entity_id=entity_id,
+            provider="em",
+            columns=[Stock1dKdata.close],
+            filters=[Stock1dKdata.close < 10],
+            order=Stock1dKdata.timestamp.desc(),
+            limit=1,
+        )
+        assert df["close"].tolist() == [9.8]
+    finally:
+        for schema in (Stock1dBfqKdata, AdjustFactor):
+            del_data(schema, filters=[schema.entity_id == entity_id], provider="em")
+
+
+def test_has_adjust_change():
+    bfq_df = pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2024-01-01", periods=4),
+            "close": [10.0, 10.2, 9.7, 9.8],
+            "change_pct": [0.0, 0.02, 0.0, 0.0103],
+        }
+    )
+    # dividend 0.5 at 2024-01-03, the pre close of the provider is 9.7
+    assert has_adjust_change(bfq_df)
+    assert not has_adjust_change(bfq_df[3:], pre_close=9.7)
+    assert not has_adjust_change(bfq_df[:2], pre_close=10.0)
+    assert has_adjust_change(bfq_df[2:], pre_close=10.2)
+    assert has_adjust_change(bfq_df.drop(columns=["change_pct"]))
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from zvt.api.point_in_time import pit_join, get_publish_timestamp
+from zvt.contract.api import df_to_db, del_data
+from zvt.domain import FinanceFactor, BalanceSheet
+
+entity_ids = ["stock_sz_999991", "stock_sz_999992"]
+
+
+def _report_df(rows) -> pd.DataFrame:
+    df = pd.DataFrame(rows, columns=["entity_id", "report_date", "timestamp", "value"])
+    df["report_date"] = pd.to_datetime(df["report_date"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df["id"] = df["entity_id"] + "_" + df["report_date"].dt.strftime("%Y-%m-%d")
+    df["code"] = df["entity_id"].str[-6:]
+    return df
+
+
+def test_publish_timestamp():
+    df = _report_df(
+        [
+            ("stock_sz_999991", "2022-12-31", "2023-03-20", 1),
+            ("stock_sz_999991", "2023-03-31", "2023-03-31", 2),
+            ("stock_sz_999991", "2023-06-30", "2023-06-30", 3),
+        ]
+    )
+    assert get_publish_timestamp(df).tolist() == pd.to_datetime(["2023-03-20", "2023-04-30", "2023-08-31"]).tolist()
+    assert (
+        get_publish_timestamp(df, report_lag=10).tolist()
+        == pd.to_datetime(["2023-03-20", "2023-04-10", "2023-07-10"]).tolist()
+    )
+
+
+def test_pit_join():
+    filters = [FinanceFactor.entity_id.in_(entity_ids)]
+    del_data(FinanceFactor, filters=filters, provider="eastmoney")
+    del_data(BalanceSheet, filters=[BalanceSheet.entity_id.in_(entity_ids)], provider="eastmoney")
+
+    df = _report_df(
+        [
+            # the annual report is published after the q1 report
+            ("stock_sz_999991", "2022-12-31", "2023-04-28", 0.1),
+            ("stock_sz_999991", "2023-03-31", "2023-04-20", 0.03),
+            # no publish date, report_date + 62 days
+            ("stock_sz_999991", "2023-06-30", "2023-06-30", 0.05),
+            ("stock_sz_999992", "2022-09-30", "2022-10-25", 0.2),
+        ]
+    )
+    df_to_db(df=df.rename(columns={"value": "roe"}), data_schema=FinanceFactor, provider="eastmoney")
+    df_to_db(df=df.rename(columns={"value": "goodwill"}), data_schema=BalanceSheet, provider="eastmoney")
+
+    timestamps = pd.to_datetime(["2023-04-19", "2023-04-20", "2023-04-21", "2023-04-29", "2023-08-31", "2023-09-01"])
+    panel_df = pd.DataFrame(
+        {"close": 1.0},
+        index=pd.MultiIndex.from_product([entity_ids, timestamps], names=["entity_id", "timestamp"]),
+    )
+
+    result_df = pit_join(panel_df, columns=[FinanceFactor.roe, BalanceSheet.goodwill], provider="eastmoney")
+    assert result_df.index.equals(panel_df.index)
+    roe = result_df.loc["stock_sz_999991", "roe"].tolist()
+    assert pd.isna(roe[:2]).all()
+    assert roe[2:] == [0.03, 0.03, 0.03, 0.05]
+    assert result_df.loc["stock_sz_999992", "roe"].tolist() == [0.2] * 6
+    pd.testing.assert_series_equal(result_df["goodwill"], result_df["roe"], check_names=False)
+
+    result_df = pit_join(panel_df, columns=[FinanceFactor.roe], provider="eastmoney", include_publish_day=True)
+    assert result_df.loc["stock_sz_999991", "roe"].tolist()[1] == 0.03
+
+    del_data(FinanceFactor, filters=filters, provider="eastmoney")
+    del_data(BalanceSheet, filters=[BalanceSheet.entity_id.in_(entity_ids)], provider="eastmoney")
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zvt.contract.api import df_to_db, del_data
+from zvt.domain import Stock1dKdata
+
+
+def make_kdata_df(entity_ids: List[str], timestamps: pd.DatetimeIndex, prices=None, **columns) -> pd.DataFrame:
+    """
+    build synthetic daily kdata, the prices of the i-th entity are 10 + i + sin(x / (i + 2)) by default
+
+    :param entity_ids: entity ids
+    :param timestamps: timestamps
+    :param prices: function(i) -> the prices of the i-th entity, used as open, close, high and low
+    :param columns: column -> value, or function(i, prices) -> values of the i-th entity
+    :return: kdata df
+    """
+    dfs = []
+    for i, entity_id in enumerate(entity_ids):
+        if prices:
+            values = np.asarray(prices(i), dtype=float)
+        else:
+            values = 10 + i + np.sin(np.arange(len(timestamps)) / (i + 2))
+        data = {
+            "id": [f"{entity_id}_{timestamp.date()}" for timestamp in timestamps],
+            "entity_id": entity_id,
+            "code": entity_id[-6:],
+            "level": "1d",
+            "timestamp": timestamps,
+            "open": values,
+            "close": values,
+            "high": values,
+            "low": values,
+            "volume": 1e6,
+            "turnover": 1e8,
+            "turnover_rate": 0.01,
+        }
+        for col, value in columns.items():
+            data[col] = value(i, values) if callable(value) else value
+        dfs.append(pd.DataFrame(data))
+    return pd.concat(dfs, ignore_index=True)
+
+
+@pytest.fixture(scope="module")
+def stock_kdata():
+    """
+    factory saving the synthetic kdata of the fake entities to Stock1dKdata of em, see :func:`make_kdata_df`,
+    only the kdata of the entities is deleted after the tests of the module
+    """
+    saved = set()
+
+    def save(entity_ids: List[str], timestamps: pd.DatetimeIndex, prices=None, **columns) -> pd.DataFrame:
+        del_data(Stock1dKdata, filters=[Stock1dKdata.entity_id.in_(entity_ids)], provider="em")
+        saved.update(entity_ids)
+        df = make_kdata_df(entity_ids, timestamps, prices=prices, **columns)
+        df_to_db(df=df, data_schema=Stock1dKdata, provider="em", force_update=True)
+        return df
+
+    yield save
+    if saved:
+        del_data(Stock1dKdata, filters=[Stock1dKdata.entity_id.in_(list(saved))], provider="em")
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zvt.contract import analytic
+from zvt.contract.analytic import is_analytic_available, export_parquet, query_analytic
+from zvt.contract.api import get_group
+from zvt.domain import Stock1dKdata
+
+entity_ids = ["stock_sz_999981", "stock_sz_999982", "stock_sz_999983"]
+
+
+@pytest.fixture
+def kdata(stock_kdata):
+    # close and turnover increase by 1 and 1e8 day by day
+    stock_kdata(
+        entity_ids,
+        pd.to_datetime(["2024-09-02", "2024-09-03"]),
+        prices=lambda i: 10.0 + i + np.arange(2),
+        turnover=lambda i, prices: 1e8 * (i + 1 + np.arange(2)),
+    )
+
+
+def test_analytic_engine_same_result(kdata):
+    kwargs = dict(
+        provider="em",
+        entity_ids=entity_ids,
+        filters=[Stock1dKdata.timestamp == pd.Timestamp("2024-09-03"), Stock1dKdata.turnover >= 2e8],
+        columns=["entity_id", "timestamp", "close"],
+        index="entity_id",
+        order=Stock1dKdata.entity_id.asc(),
+    )
+    df = Stock1dKdata.query_data(**kwargs)
+    analytic_df = Stock1dKdata.query_data(engine="analytic", **kwargs)
+    assert analytic_df.index.tolist() == df.index.tolist() == entity_ids
+    assert analytic_df["close"].tolist() == df["close"].tolist()
+    assert analytic_df["timestamp"].tolist() == df["timestamp"].tolist()
+
+    group_df = get_group("em", Stock1dKdata, Stock1dKdata.entity_id, engine="analytic")
+    assert len(group_df) == len(get_group("em", Stock1dKdata, Stock1dKdata.entity_id))
+
+
+def test_analytic_query(kdata):
+    if not is_analytic_available():
+        pytest.skip("duckdb is not installed")
+
+    sql = """
+    select entity_id, timestamp, close - lag(close) over (partition by entity_id order by timestamp) as change
+    from {kdata} where entity_id in ('stock_sz_999981', 'stock_sz_999982', 'stock_sz_999983')
+    order by entity_id, timestamp
+    """
+    df = query_analytic(sql, schemas={"kdata": (Stock1dKdata, "em")}, time_field="timestamp")
+    assert df["change"].dropna().tolist() == [1.0, 1.0, 1.0]
+
+    export_parquet(Stock1dKdata, provider="em")
+    assert query_analytic(sql, schemas={"kdata": (Stock1dKdata, "em")})["change"].dropna().tolist() == [1.0, 1.0, 1.0]
+
+
+class _OfflineDuckdb(object):
+    """
+    duckdb without network, the sqlite extension could not be downloaded
+    """
+
+    class _Connection(object):
+        def execute(self, sql):
+            raise IOError('Failed to download extension "sqlite_scanner"')
+
+    def connect(self, database):
+        return self._Connection()
+
+
+@pytest.mark.parametrize("unavailable", ["duckdb", "pyarrow", "extension"])
+def test_analytic_fallback(kdata, monkeypatch, unavailable):
+    monkeypatch.setattr(analytic, "_db", None)
+    monkeypatch.setattr(analytic, "_unavailable_reason", None)
+    monkeypatch.setattr(analytic, "_local", threading.local())
+    if unavailable == "duckdb":
+        monkeypatch.setattr(analytic, "duckdb", None)
+    elif unavailable == "pyarrow":
+        monkeypatch.setattr(analytic, "duckdb", _OfflineDuckdb())
+        monkeypatch.setattr(analytic, "pyarrow", None)
+    else:
+        monkeypatch.setattr(analytic, "duckdb", _OfflineDuckdb())
+        monkeypatch.setattr(analytic, "pyarrow", object())
+
+    assert not is_analytic_available()
+    assert unavailable in analytic._unavailable_reason
+
+    kwargs = dict(
+        provider="em", entity_ids=entity_ids, columns=["entity_id", "timestamp", "close"], order=Stock1dKdata.id.asc()
+    )
+    pd.testing.assert_frame_equal(
+        Stock1dKdata.query_data(engine="analytic", **kwargs), Stock1dKdata.query_data(**kwargs)
+    )
+    pd.testing.assert_frame_equal(
+        get_group("em", Stock1dKdata, Stock1dKdata.entity_id, engine="analytic"),
+        get_group("em", Stock1dKdata, Stock1dKdata.entity_id),
+    )
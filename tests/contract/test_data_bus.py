@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from zvt.contract.data_bus import DataBus, DataListenerSubscriber, encode_event, decode_event
+from zvt.contract.data_event import DataEvent, DataEventCenter, DataTopic
+from zvt.contract.reader import DataListener
+
+
+class CollectListener(DataListener):
+    def __init__(self) -> None:
+        self.changed = []
+        self.entities = []
+
+    def on_data_loaded(self, data: pd.DataFrame) -> object:
+        pass
+
+    def on_data_changed(self, data: pd.DataFrame) -> object:
+        self.changed.append(data)
+
+    def on_entity_data_changed(self, entity: str, added_data: pd.DataFrame) -> object:
+        self.entities.append(entity)
+
+
+def _kdata_event():
+    df = pd.DataFrame(
+        {
+            "entity_id": ["stock_sz_000338", "stock_sh_600000"],
+            "code": ["000338", "600000"],
+            "timestamp": pd.to_datetime(["2023-01-03 09:31", "2023-01-03 09:31"]),
+            "close": [1.0, np.nan],
+        }
+    )
+    return DataEvent(
+        "Stock1mKdata",
+        "em",
+        pd.Timestamp("2023-01-03 09:31"),
+        entity_ids=df["entity_id"].tolist(),
+        topic=DataTopic.kdata,
+        df=df,
+    )
+
+
+def test_encode_event():
+    event = _kdata_event()
+    decoded = decode_event(encode_event(event))
+    assert decoded.to_dict() == event.to_dict()
+    assert decoded.topic == DataTopic.kdata
+    pd.testing.assert_frame_equal(decoded.df, event.df)
+
+
+def test_data_bus(tmp_path):
+    address = os.path.join(tmp_path, "bus.sock")
+    server_center, client_center = DataEventCenter(), DataEventCenter()
+    server_bus, client_bus = DataBus(event_center=server_center), DataBus(event_center=client_center)
+
+    received = threading.Event()
+    disconnected = threading.Event()
+    server_events, client_events, factor_events = [], [], []
+    listener = CollectListener()
+
+    def on_client_event(event):
+        client_events.append(event)
+        received.set()
+
+    # the subscribers are called in order
+    client_bus.subscribe(DataListenerSubscriber(listener, entity_ids=["stock_sz_000338"]), data_schema="Stock1mKdata")
+    client_bus.subscribe(on_client_event, topic=DataTopic.kdata)
+    client_bus.subscribe(lambda event: client_events.append("quote"), topic=DataTopic.quote)
+    server_bus.subscribe(server_events.append)
+    client_bus.subscribe(factor_events.append, topic=DataTopic.factor)
+    client_bus.register_disconnect_listener(lambda peer: disconnected.set())
+    try:
+        server_bus.serve(address)
+        assert client_bus.connect(address, reconnect=False)
+
+        # publish in the server process
+        server_center.publish(_kdata_event())
+        assert received.wait(10)
+        assert client_center.wait_for([("Stock1mKdata", "em")], timestamp="2023-01-03 09:31", timeout=10)
+
+        assert len(client_events) == 1
+        assert client_events[0].origin is not None
+        pd.testing.assert_frame_equal(client_events[0].df, _kdata_event().df)
+        assert listener.entities == ["stock_sz_000338"]
+        assert listener.changed[0].index.names == ["entity_id", "timestamp"]
+
+        # publish in the client process
+        client_center.publish(DataEvent("StockQuote", "qmt", pd.Timestamp("2023-01-03 09:32"), topic="quote"))
+        assert server_center.wait_for([("StockQuote", "qmt")], timestamp="2023-01-03 09:32", timeout=10)
+        assert [event.schema_name for event in server_events] == ["Stock1mKdata", "StockQuote"]
+        # not echoed back
+        assert client_events[1:] == ["quote"]
+
+        # only the df of the quote and kdata is forwarded
+        factor_event = _kdata_event()
+        factor_event.schema_name, factor_event.topic = "MacdFactor", DataTopic.factor
+        server_center.publish(factor_event)
+        assert client_center.wait_for([("MacdFactor", "em")], timestamp="2023-01-03 09:31", timeout=10)
+        assert server_events[-1].df is not None
+        assert factor_events[0].df is None
+
+        # the disconnect listeners are called
+        server_bus.stop()
+        assert disconnected.wait(10)
+        assert not client_bus.is_connected()
+    finally:
+        client_bus.stop()
+        server_bus.stop()
+    assert not os.path.exists(address)
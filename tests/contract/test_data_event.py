@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+
+import pandas as pd
+
+from zvt.contract.api import df_to_db, del_data
+from zvt.contract.data_event import DataEvent, DataEventCenter, data_event_center
+from zvt.domain import Stock1dKdata
+
+
+def test_wait_for():
+    center = DataEventCenter()
+    events = []
+    center.register_listener(events.append)
+
+    assert not center.wait_for([Stock1dKdata], timestamp="2023-01-03", timeout=0.05)
+
+    def publish():
+        time.sleep(0.1)
+        center.publish(DataEvent("Stock1dKdata", "em", pd.Timestamp("2023-01-02")))
+        center.publish(DataEvent("Stock1dKdata", "em", pd.Timestamp("2023-01-03"), entity_ids=["stock_sz_000338"]))
+
+    thread = threading.Thread(target=publish)
+    start = time.time()
+    thread.start()
+    assert center.wait_for([(Stock1dKdata, "em")], timestamp="2023-01-03", timeout=10)
+    assert time.time() - start < 5
+    thread.join()
+
+    assert center.latest_timestamp(Stock1dKdata) == pd.Timestamp("2023-01-03")
+    assert center.latest_timestamp(Stock1dKdata, provider="joinquant") is None
+    assert [event.timestamp for event in events] == [pd.Timestamp("2023-01-02"), pd.Timestamp("2023-01-03")]
+    assert DataEvent.from_dict(events[-1].to_dict()).to_dict() == events[-1].to_dict()
+
+
+def test_wait_for_entities():
+    center = DataEventCenter()
+    entity_ids = ["stock_sz_000338", "stock_sz_000001"]
+    center.publish(DataEvent("Stock1dKdata", "em", pd.Timestamp("2023-01-03"), entity_ids=["stock_sz_000338"]))
+
+    # the recorders publish entity by entity, the first one doesn't wake up the waiting for all
+    assert center.wait_for([Stock1dKdata], timestamp="2023-01-03", timeout=0)
+    assert not center.wait_for([Stock1dKdata], timestamp="2023-01-03", timeout=0.05, entity_ids=entity_ids)
+
+    center.publish(DataEvent("Stock1dKdata", "em", pd.Timestamp("2023-01-03"), entity_ids=["stock_sz_000001"]))
+    assert center.wait_for([(Stock1dKdata, "em")], timestamp="2023-01-03", timeout=0, entity_ids=entity_ids)
+    assert not center.wait_for([(Stock1dKdata, "joinquant")], timestamp="2023-01-03", timeout=0, entity_ids=entity_ids)
+
+    # the event without entities is for all the entities
+    center.publish(DataEvent("Stock1dKdata", "em", pd.Timestamp("2023-01-04")))
+    assert center.wait_for([Stock1dKdata], timestamp="2023-01-04", timeout=0, entity_ids=entity_ids)
+
+
+def test_df_to_db_publish():
+    entity_id = "stock_sz_999995"
+    del_data(Stock1dKdata, filters=[Stock1dKdata.entity_id == entity_id], provider="em")
+    events = []
+    data_event_center.register_listener(events.append)
+    try:
+        df = pd.DataFrame(
+            {
+                "entity_id": entity_id,
+                "timestamp": pd.to_datetime(["2023-01-03", "2023-01-04"]),
+                "close": [1.0, 2.0],
+            }
+        )
+        df["id"] = df["entity_id"] + "_" + df["timestamp"].dt.strftime("%Y-%m-%d")
+        df_to_db(df=df, data_schema=Stock1dKdata, provider="em", force_update=True)
+    finally:
+        data_event_center.deregister_listener(events.append)
+        del_data(Stock1dKdata, filters=[Stock1dKdata.entity_id == entity_id], provider="em")
+
+    assert len(events) == 1
+    assert events[0].schema_name == "Stock1dKdata"
+    assert events[0].entity_ids == [entity_id]
+    assert events[0].timestamp == pd.Timestamp("2023-01-04")
+    assert data_event_center.wait_for([(Stock1dKdata, "em")], timestamp="2023-01-04", timeout=0)
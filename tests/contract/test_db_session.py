@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from zvt.contract.api import (
+    get_db_session,
+    get_db_engine,
+    df_to_db,
+    del_data,
+    remove_db_sessions,
+    release_db_sessions,
+)
+from zvt.domain import StockQuote, Stock1dKdata
+from zvt.utils.pd_utils import pd_is_not_null
+
+#: the fake entities
+entity_ids = [f"stock_sz_9{i:05d}" for i in range(800)]
+
+
+def _quote_df(start: int, count: int) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "id": entity_ids[start : start + count],
+            "entity_id": entity_ids[start : start + count],
+            "timestamp": pd.Timestamp("2024-09-02 09:31"),
+            "price": 1.0,
+        }
+    )
+
+
+def test_thread_local_session():
+    session = get_db_session(provider="qmt", data_schema=StockQuote)
+    assert session is get_db_session(provider="qmt", data_schema=StockQuote)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        other = executor.submit(get_db_session, provider="qmt", data_schema=StockQuote).result()
+    assert other is not session
+
+    remove_db_sessions()
+    assert get_db_session(provider="qmt", data_schema=StockQuote) is not session
+
+
+def test_release_db_sessions():
+    def run():
+        session = release_db_sessions(get_db_session)(provider="qmt", data_schema=StockQuote)
+        return session is get_db_session(provider="qmt", data_schema=StockQuote)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert not executor.submit(run).result()
+
+
+def test_read_uncommitted_writes():
+    entity_id = "stock_sz_999989"
+    del_data(Stock1dKdata, filters=[Stock1dKdata.entity_id == entity_id], provider="em")
+    session = get_db_session(provider="em", data_schema=Stock1dKdata)
+    session.add(Stock1dKdata(id=entity_id, entity_id=entity_id, timestamp=pd.Timestamp("2024-09-02"), close=1.0))
+    session.flush()
+    try:
+        # the writes not committed are read by the writable session of the thread
+        df = Stock1dKdata.query_data(provider="em", entity_id=entity_id, return_type="df")
+        assert df["close"].tolist() == [1.0]
+    finally:
+        session.rollback()
+    assert not pd_is_not_null(Stock1dKdata.query_data(provider="em", entity_id=entity_id, return_type="df"))
+    assert session.info.get("flushed") is None
+
+
+def test_read_only_engine():
+    engine = get_db_engine(provider="qmt", data_schema=StockQuote, read_only=True)
+    with engine.connect() as con:
+        assert con.execute(text("PRAGMA journal_mode;")).scalar() == "wal"
+        assert con.execute(text("PRAGMA busy_timeout;")).scalar() == 30000
+        with pytest.raises(OperationalError):
+            con.execute(text("DELETE FROM stock_quote"))
+
+
+def test_concurrent_write_and_read():
+    del_data(StockQuote, filters=[StockQuote.entity_id.in_(entity_ids)], provider="qmt")
+
+    def write(start):
+        df_to_db(df=_quote_df(start, 100), data_schema=StockQuote, provider="qmt", force_update=True)
+
+    def read(_):
+        return StockQuote.query_data(provider="qmt", entity_ids=entity_ids, return_type="dict")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        writes = [executor.submit(write, i * 100) for i in range(8)]
+        reads = [executor.submit(read, i) for i in range(8)]
+        for future in writes + reads:
+            future.result()
+
+    assert len(StockQuote.query_data(provider="qmt", entity_ids=entity_ids)) == 800
+    del_data(StockQuote, filters=[StockQuote.entity_id.in_(entity_ids)], provider="qmt")
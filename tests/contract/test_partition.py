@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import os
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine
+
+from zvt import zvt_env
+from zvt.contract.api import df_to_db, get_db_partitions, drop_db_partitions, migrate_to_partitions
+from zvt.domain import Stock1mQuote
+
+
+def test_partitioned_schema():
+    drop_db_partitions("qmt", data_schema=Stock1mQuote, before_timestamp="2100-01-01")
+
+    timestamps = pd.to_datetime(["2024-09-02 09:31", "2024-09-02 09:32", "2024-09-03 09:31", "2024-09-04 09:31"])
+    df = pd.DataFrame(
+        {
+            "id": [f"stock_sz_000338_{timestamp}" for timestamp in timestamps],
+            "entity_id": "stock_sz_000338",
+            "timestamp": timestamps,
+            "price": [1.0, 2.0, 3.0, 4.0],
+        }
+    )
+    assert df_to_db(df=df, data_schema=Stock1mQuote, provider="qmt") == 4
+    assert get_db_partitions("qmt", data_schema=Stock1mQuote) == ["20240902", "20240903", "20240904"]
+
+    # range query spans partitions
+    assert Stock1mQuote.query_data(provider="qmt")["price"].tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert Stock1mQuote.query_data(provider="qmt", start_timestamp="2024-09-03")["price"].tolist() == [3.0, 4.0]
+    latest = Stock1mQuote.query_data(provider="qmt", order=Stock1mQuote.timestamp.desc(), limit=2)
+    assert latest["price"].tolist() == [4.0, 3.0]
+
+    # retention by dropping partitions
+    assert drop_db_partitions("qmt", data_schema=Stock1mQuote, before_timestamp="2024-09-04") == [
+        "20240902",
+        "20240903",
+    ]
+    assert Stock1mQuote.query_data(provider="qmt")["price"].tolist() == [4.0]
+    drop_db_partitions("qmt", data_schema=Stock1mQuote, before_timestamp="2100-01-01")
+
+
+def test_partitioned_order_and_distinct():
+    drop_db_partitions("qmt", data_schema=Stock1mQuote, before_timestamp="2100-01-01")
+
+    timestamps = pd.to_datetime(["2024-09-02 09:31", "2024-09-02 09:32", "2024-09-03 09:31", "2024-09-04 09:31"])
+    df = pd.DataFrame(
+        {
+            "id": [f"stock_sz_000338_{timestamp}" for timestamp in timestamps],
+            "entity_id": "stock_sz_000338",
+            "timestamp": timestamps,
+            "price": [3.0, 1.0, 4.0, 1.0],
+        }
+    )
+    df_to_db(df=df, data_schema=Stock1mQuote, provider="qmt")
+
+    # merged by the order instead of the partitions
+    result = Stock1mQuote.query_data(provider="qmt", order=Stock1mQuote.price.desc(), limit=3)
+    assert result["price"].tolist() == [4.0, 3.0, 1.0]
+    domains = Stock1mQuote.query_data(provider="qmt", order=Stock1mQuote.price.asc(), return_type="domain")
+    assert [domain.price for domain in domains] == [1.0, 1.0, 3.0, 4.0]
+
+    # the order column is used for merging but not returned
+    result = Stock1mQuote.query_data(provider="qmt", columns=["entity_id"], order=Stock1mQuote.price.asc())
+    assert result.columns.tolist() == ["entity_id", "timestamp"]
+    assert result["timestamp"].tolist() == [timestamps[1], timestamps[3], timestamps[0], timestamps[2]]
+
+    result = Stock1mQuote.query_data(
+        provider="qmt", columns=["entity_id", "price"], filters=[Stock1mQuote.price == 1.0], distinct=True
+    )
+    assert len(result) == 2
+    result = Stock1mQuote.query_data(provider="qmt", columns=[Stock1mQuote.price], distinct=True)
+    assert len(result) == 4
+
+    with pytest.raises(ValueError):
+        Stock1mQuote.query_data(provider="qmt", return_type="select")
+
+    drop_db_partitions("qmt", data_schema=Stock1mQuote, before_timestamp="2100-01-01")
+
+
+def test_migrate_to_partitions():
+    drop_db_partitions("qmt", data_schema=Stock1mQuote, before_timestamp="2100-01-01")
+
+    # Stock1mQuote was in the stock_quote db before partitioning
+    legacy_file = os.path.join(zvt_env["data_path"], "qmt", "qmt_stock_quote.db")
+    os.makedirs(os.path.dirname(legacy_file), exist_ok=True)
+    engine = create_engine(f"sqlite:///{legacy_file}")
+    Stock1mQuote.__table__.create(bind=engine, checkfirst=True)
+    timestamps = pd.to_datetime(["2024-09-02 09:31", "2024-09-03 09:31"])
+    pd.DataFrame(
+        {
+            "id": [f"stock_sz_000338_{timestamp}" for timestamp in timestamps],
+            "entity_id": "stock_sz_000338",
+            "timestamp": timestamps,
+            "price": [1.0, 2.0],
+        }
+    ).to_sql("stock_1m_quote", engine, if_exists="append", index=False)
+    engine.dispose()
+
+    assert migrate_to_partitions(Stock1mQuote, provider="qmt", legacy_db_name="stock_quote") == 2
+    assert get_db_partitions("qmt", data_schema=Stock1mQuote) == ["20240902", "20240903"]
+    assert Stock1mQuote.query_data(provider="qmt")["price"].tolist() == [1.0, 2.0]
+    # the old table is dropped
+    assert migrate_to_partitions(Stock1mQuote, provider="qmt", legacy_db_name="stock_quote") == 0
+
+    drop_db_partitions("qmt", data_schema=Stock1mQuote, before_timestamp="2100-01-01")
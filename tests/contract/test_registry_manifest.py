@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import os
+import subprocess
+import sys
+
+from zvt.contract.registry_manifest import get_registry_manifest
+
+
+def _run(code: str) -> str:
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "TESTING_ZVT": "1"},
+        check=True,
+    )
+    return result.stdout.strip().splitlines()[-1]
+
+
+def test_registry_manifest():
+    manifest = get_registry_manifest()
+    assert manifest["schemas"]["Stock1dKdata"] == "zvt.domain.quotes.stock.stock_1d_kdata"
+    assert manifest["entities"]["stock"] == "zvt.domain.meta.stock_meta"
+    assert "em" in manifest["recorders"]["Stock"]
+    assert "MacdFactor" in manifest["factors"]
+
+
+def test_import_zvt_lazily():
+    assert _run("import sys, zvt; print([m for m in ('zvt.recorders', 'zvt.factors') if m in sys.modules])") == "[]"
+
+
+def test_load_on_first_use():
+    code = """
+import sys
+from zvt.contract.api import get_schema_by_name, get_entity_schema
+print(get_schema_by_name("Stock1dKdata").__name__, get_entity_schema("stockus").__name__, "zvt.recorders" in sys.modules)
+"""
+    assert _run(code) == "Stock1dKdata Stockus False"
+
+    code = """
+from zvt.contract.registry_manifest import load_recorders
+from zvt.domain import Stock
+load_recorders("Stock")
+print(Stock.provider_map_recorder["em"].__name__)
+"""
+    assert _run(code) == "EMStockRecorder"
+
+
+def test_register_schema_after_engine_created():
+    code = """
+import os
+from sqlalchemy.orm import declarative_base
+from zvt import zvt_env
+from zvt.contract import Mixin
+from zvt.contract.api import get_db_engine
+from zvt.contract.register import register_schema
+
+db_path = os.path.join(zvt_env["data_path"], "zvt", "zvt_lazy_test.db")
+if os.path.exists(db_path):
+    os.remove(db_path)
+get_db_engine(provider="zvt", db_name="lazy_test")
+
+LazyTestBase = declarative_base()
+
+
+class LazyTestData(LazyTestBase, Mixin):
+    __tablename__ = "lazy_test_data"
+
+
+register_schema(providers=["zvt"], db_name="lazy_test", schema_base=LazyTestBase)
+print(len(LazyTestData.query_data(provider="zvt", return_type="domain")))
+"""
+    assert _run(code) == "0"
+
+
+def test_import_time():
+    code = """
+import time
+start = time.perf_counter()
+import zvt
+lazy_cost = time.perf_counter() - start
+
+from zvt.contract.registry_manifest import load_all
+load_all()
+eager_cost = time.perf_counter() - start
+print(lazy_cost, eager_cost)
+"""
+    lazy_cost, eager_cost = [float(cost) for cost in _run(code).split()]
+    print(f"import zvt: {lazy_cost:.2f}s, import all the modules: {eager_cost:.2f}s")
+    assert lazy_cost * 1.2 < eager_cost
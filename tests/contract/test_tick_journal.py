@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from zvt.contract.reader import DataListener
+from zvt.contract.tick_journal import TickJournalWriter, TickJournalReader
+from zvt.utils.time_utils import to_timestamp_ms
+
+
+class CollectListener(DataListener):
+    def __init__(self) -> None:
+        self.loaded = None
+        self.changed = []
+        self.entities = []
+
+    def on_data_loaded(self, data: pd.DataFrame) -> object:
+        self.loaded = data
+
+    def on_data_changed(self, data: pd.DataFrame) -> object:
+        self.changed.append(data)
+
+    def on_entity_data_changed(self, entity: str, added_data: pd.DataFrame) -> object:
+        self.entities.append(entity)
+
+
+def _quote_df(time, prices):
+    return pd.DataFrame(
+        {
+            "entity_id": ["stock_sz_000338", "stock_sh_600000", "stock_sz_000001"],
+            "time": to_timestamp_ms(time),
+            "price": prices,
+            "is_limit_up": [False, True, False],
+        }
+    )
+
+
+def test_tick_journal(tmp_path):
+    writer = TickJournalWriter(compression="zlib", data_path=str(tmp_path))
+    assert writer.write(_quote_df("2024-09-02 09:31:03", [1.0, 2.0, 3.0])) == 3
+    assert writer.write(_quote_df("2024-09-02 09:31:06", [1.1, 2.1, 3.1])) == 3
+    assert writer.write(_quote_df("2024-09-03 09:31:03", [1.2, 2.2, 3.2])) == 3
+    writer.close()
+
+    reader = TickJournalReader(data_path=str(tmp_path))
+    assert reader.get_dates() == ["20240902", "20240903"]
+    assert len(reader.get_block_index("2024-09-02")) == 2
+
+    df = reader.read("2024-09-02", entity_ids=["stock_sz_000338", "stock_sh_600000"])
+    assert df["price"].tolist() == [1.0, 2.0, 1.1, 2.1]
+    assert df["timestamp"].iloc[-1] == pd.Timestamp("2024-09-02 09:31:06")
+    assert df["is_limit_up"].tolist() == [False, True, False, True]
+
+    df = reader.read("2024-09-02", start_timestamp="2024-09-02 09:31:05")
+    assert df["price"].tolist() == [1.1, 2.1, 3.1]
+
+    listener = CollectListener()
+    assert reader.replay("2024-09-02", listeners=[listener], entity_ids=["stock_sz_000338"]) == 2
+    assert listener.loaded["price"].tolist() == [1.0]
+    assert listener.entities == ["stock_sz_000338"]
+    assert listener.changed[0]["price"].tolist() == [1.1]
@@ -1,5 +1,16 @@
 # -*- coding: utf-8 -*-
-from zvt.factors.algorithm import point_in_range, intersect, intersect_ranges, combine, distance
+import numpy as np
+import pandas as pd
+
+from zvt.factors.algorithm import (
+    point_in_range,
+    intersect,
+    intersect_ranges,
+    combine,
+    distance,
+    IntersectTransformer,
+    get_overlap,
+)
 
 
 def test_point_in_range():
@@ -86,3 +97,25 @@ def test_distance():
     b = (2, 3)
     assert distance(a, b) == 0
     assert distance(b, a) == 0
+
+
+def test_intersect_transformer():
+    rng = np.random.default_rng(3)
+    index = pd.MultiIndex.from_product(
+        [["stock_sz_000001", "stock_sz_000002"], pd.date_range("2023-01-01", periods=50)],
+        names=["entity_id", "timestamp"],
+    )
+    low = 10 + rng.normal(size=len(index)).cumsum() / 5
+    df = pd.DataFrame({"low": low, "high": low + rng.random(size=len(index))}, index=index)
+
+    result_df = IntersectTransformer(kdata_overlap=3).transform(df.copy())
+
+    # the overlap of the last 3 bars by intersect_ranges
+    expected = []
+    for _, entity_df in df.groupby(level=0):
+        ranges = list(zip(entity_df["low"], entity_df["high"]))
+        for i in range(len(ranges)):
+            intersection = intersect_ranges(ranges[i - 2 : i + 1]) if i >= 2 else None
+            expected.append(intersection if intersection else (0, 0))
+    assert get_overlap(result_df).tolist() == expected
+    assert result_df["overlap_low"].notna().any() and result_df["overlap_low"].isna().any()
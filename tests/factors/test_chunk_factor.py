@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from zvt.contract.api import del_data, get_data
+from zvt.contract.data_hub import data_hub
+from zvt.factors.ma.domain import Stock1dMaFactor
+from zvt.factors.ma.ma_factor import CrossMaFactor
+
+entity_ids = [f"stock_sz_99992{i}" for i in range(1, 6)]
+
+
+class ChunkCrossMaFactor(CrossMaFactor):
+    chunk_size = 2
+
+
+def test_chunk_factor(stock_kdata):
+    stock_kdata(entity_ids, pd.date_range("2023-01-01", periods=60))
+    del_data(Stock1dMaFactor, filters=[Stock1dMaFactor.entity_id.in_(entity_ids)], provider="zvt")
+    kwargs = dict(
+        provider="em",
+        entity_ids=entity_ids,
+        start_timestamp="2023-01-01",
+        end_timestamp="2023-12-31",
+        adjust_type="qfq",
+        windows=[5, 10],
+    )
+    factor = CrossMaFactor(**kwargs)
+    chunk_factor = ChunkCrossMaFactor(need_persist=True, clear_state=True, **kwargs)
+
+    # only the result is kept
+    assert chunk_factor.data_df is None
+    assert chunk_factor.factor_df is None
+    pd.testing.assert_frame_equal(chunk_factor.result_df, factor.result_df)
+
+    persisted_df = get_data(
+        provider="zvt", data_schema=Stock1dMaFactor, entity_ids=entity_ids, index=["entity_id", "timestamp"]
+    )
+    assert len(persisted_df) == len(factor.factor_df)
+    np.testing.assert_allclose(persisted_df["ma10"].to_numpy(), factor.factor_df["ma10"].to_numpy())
+
+    del_data(Stock1dMaFactor, filters=[Stock1dMaFactor.entity_id.in_(entity_ids)], provider="zvt")
+
+
+def test_chunk_factor_in_sharing(stock_kdata):
+    stock_kdata(entity_ids, pd.date_range("2023-01-01", periods=60))
+    kwargs = dict(
+        provider="em",
+        entity_ids=entity_ids,
+        start_timestamp="2023-01-01",
+        end_timestamp="2023-12-31",
+        adjust_type="qfq",
+        windows=[5, 10],
+    )
+    factor = CrossMaFactor(**kwargs)
+    with data_hub.sharing():
+        chunk_factor = ChunkCrossMaFactor(**kwargs)
+        # the chunks are not kept by the hub
+        assert not data_hub._data
+        assert not data_hub._transformed
+    pd.testing.assert_frame_equal(chunk_factor.result_df, factor.result_df)
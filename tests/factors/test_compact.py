@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from zvt.contract.reader import DataReader
+from zvt.domain import Stock1dKdata
+from zvt.factors.algorithm import MaTransformer, MacdTransformer
+from zvt.factors.ma.ma_stats_factor import MaStatsAccumulator
+
+entity_ids = ["stock_sz_999911", "stock_sz_999912"]
+
+
+@pytest.fixture(scope="module")
+def kdata(stock_kdata):
+    timestamps = pd.date_range("2023-01-01", periods=120)
+    stock_kdata(
+        entity_ids,
+        timestamps,
+        prices=lambda i: 10 + i + np.sin(np.arange(len(timestamps)) / 5),
+        name=lambda i, prices: entity_ids[i],
+        close=lambda i, prices: prices.round(2),
+        high=lambda i, prices: prices + 0.5,
+        low=lambda i, prices: prices - 0.5,
+        volume=lambda i, prices: 1e6 * (i + 1),
+        turnover=lambda i, prices: 1e8 * (i + 1),
+    )
+
+
+def _read(compact):
+    return DataReader(
+        data_schema=Stock1dKdata,
+        provider="em",
+        entity_ids=entity_ids,
+        start_timestamp="2023-01-01",
+        end_timestamp="2023-12-31",
+        compact=compact,
+    )
+
+
+def test_compact_reader(kdata):
+    reader = _read(compact=False)
+    compact_reader = _read(compact=True)
+
+    df = compact_reader.data_df
+    assert df.index.names == ["entity_id", "timestamp"]
+    assert "entity_id" not in df.columns and "timestamp" not in df.columns
+    assert df["close"].dtype == "float32"
+    assert df["code"].dtype == "category"
+    assert compact_reader.memory_usage() < reader.memory_usage() / 2
+
+    for transformer in (MaTransformer(windows=[5, 10]), MacdTransformer()):
+        expected = transformer.transform(reader.data_df.copy())
+        result = transformer.transform(df.copy())
+        for col in transformer.indicators:
+            np.testing.assert_allclose(result[col].to_numpy(), expected[col].to_numpy(), rtol=1e-4)
+
+
+def test_compact_accumulator(kdata):
+    reader = _read(compact=False)
+    # the accumulator needs the timestamp column
+    compact_reader = _read(compact={"drop_index_col": False})
+    assert compact_reader.data_df["entity_id"].dtype == "category"
+
+    accumulator = MaStatsAccumulator(windows=[5, 10], vol_windows=[10])
+    expected, _ = accumulator.acc(reader.data_df.copy(), None, {})
+    result, _ = accumulator.acc(compact_reader.data_df.copy(), None, {})
+    np.testing.assert_allclose(result["ma10"].to_numpy(), expected["ma10"].to_numpy(), rtol=1e-4)
+    assert result["live"].tolist() == expected["live"].tolist()
+    assert result["count"].tolist() == expected["count"].tolist()
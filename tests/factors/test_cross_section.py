@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from zvt.contract.api import df_to_db, del_data
+from zvt.domain import Block, BlockStock
+from zvt.factors.algorithm import QuantileScorer
+from zvt.factors.cross_section import cs_rank, cs_zscore, cs_winsorize, cs_neutralize, industry_neutralize
+
+entity_ids = [f"stock_sz_99990{i}" for i in range(10)]
+timestamps = pd.date_range("2023-01-01", periods=5)
+
+
+def _factor_df() -> pd.DataFrame:
+    index = pd.MultiIndex.from_product([entity_ids, timestamps], names=["entity_id", "timestamp"])
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({"f1": rng.normal(size=len(index)), "f2": rng.integers(0, 5, size=len(index))}, index=index)
+    df.iloc[3, 0] = np.nan
+    return df
+
+
+def _quantile_score_by_row(input_df, score_levels):
+    # the row-wise way: score every cell by the quantile dict of its timestamp
+    score_levels = sorted(score_levels, reverse=True)
+    quantile_df = input_df.groupby(level=1).quantile(score_levels)
+    result_df = input_df.copy()
+    for col in input_df.columns:
+        scores = []
+        for (_, timestamp), value in input_df[col].items():
+            score_map = quantile_df.loc[timestamp, col]
+            score = np.nan
+            if value < score_map[score_levels[-1]]:
+                score = 0
+            else:
+                for level in score_levels[:-1]:
+                    if value >= score_map[level]:
+                        score = level
+                        break
+            scores.append(score)
+        result_df[col] = scores
+    return result_df
+
+
+def test_quantile_scorer():
+    df = _factor_df()
+    score_levels = [0, 0.1, 0.3, 0.5, 0.7, 0.9, 1.0]
+    result_df = QuantileScorer(score_levels=score_levels).score(df)
+    pd.testing.assert_frame_equal(result_df, _quantile_score_by_row(df, score_levels), check_dtype=False)
+
+
+def test_cs_utils():
+    df = _factor_df()
+    one_df = df.xs(timestamps[0], level=1)
+
+    rank = cs_rank(df["f1"]).xs(timestamps[0], level=1)
+    pd.testing.assert_series_equal(rank, one_df["f1"].rank(pct=True))
+
+    zscore = cs_zscore(df).xs(timestamps[0], level=1)
+    pd.testing.assert_frame_equal(zscore, (one_df - one_df.mean()) / one_df.std())
+
+    winsorized = cs_winsorize(df, lower=0.1, upper=0.9).xs(timestamps[0], level=1)
+    assert (winsorized["f1"] >= one_df["f1"].quantile(0.1) - 1e-12).all()
+    assert (winsorized["f1"] <= one_df["f1"].quantile(0.9) + 1e-12).all()
+
+    groups = pd.Series({entity_id: f"g{i % 2}" for i, entity_id in enumerate(entity_ids[:-1])})
+    neutralized = cs_neutralize(df, groups)
+    grouped = neutralized.iloc[:-5]
+    keys = [grouped.index.get_level_values(1), grouped.index.get_level_values(0).map(groups)]
+    group_mean = grouped.groupby(keys).mean()
+    assert np.allclose(group_mean.values, 0)
+    # the entity without group is kept
+    pd.testing.assert_frame_equal(neutralized.iloc[-5:], df.iloc[-5:].astype(float))
+
+
+def _del_blocks(block_ids):
+    del_data(Block, filters=[Block.entity_id.in_(block_ids)], provider="em")
+    del_data(BlockStock, filters=[BlockStock.stock_id.in_(entity_ids)], provider="em")
+
+
+def test_industry_neutralize():
+    block_ids = ["block_cn_999991", "block_cn_999992", "block_cn_999993"]
+    blocks = pd.DataFrame(
+        {
+            "id": block_ids,
+            "entity_id": block_ids,
+            "entity_type": "block",
+            "exchange": "cn",
+            "code": ["999991", "999992", "999993"],
+            "name": ["b1", "b2", "b3"],
+            "category": ["industry", "industry", "concept"],
+        }
+    )
+    block_stocks = pd.DataFrame(
+        {
+            "entity_id": [block_ids[0]] * 5 + [block_ids[1]] * 5 + [block_ids[2]] * 10,
+            "stock_id": entity_ids + entity_ids,
+        }
+    )
+    block_stocks["id"] = block_stocks["entity_id"] + "_" + block_stocks["stock_id"]
+    _del_blocks(block_ids)
+    df_to_db(df=blocks, data_schema=Block, provider="em", force_update=True)
+    df_to_db(df=block_stocks, data_schema=BlockStock, provider="em", force_update=True)
+
+    df = _factor_df()
+    groups = pd.Series({entity_id: block_ids[0] if i < 5 else block_ids[1] for i, entity_id in enumerate(entity_ids)})
+    pd.testing.assert_frame_equal(industry_neutralize(df, provider="em"), cs_neutralize(df, groups))
+
+    _del_blocks(block_ids)
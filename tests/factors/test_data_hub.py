@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from zvt.contract.data_hub import data_hub
+from zvt.domain import Stock1dKdata
+from zvt.factors.ma.ma_factor import CrossMaFactor
+from zvt.factors.transformers import MaTransformer
+
+entity_ids = [f"stock_sz_99993{i}" for i in range(1, 4)]
+
+
+@pytest.fixture
+def kdata(stock_kdata):
+    stock_kdata(entity_ids, pd.date_range("2023-01-01", periods=40))
+
+
+def _count_calls(monkeypatch, obj, name) -> list:
+    calls = []
+    func = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(kwargs)
+        return func(*args, **kwargs)
+
+    monkeypatch.setattr(obj, name, wrapper)
+    return calls
+
+
+def test_share_data_and_transform(kdata, monkeypatch):
+    kwargs = dict(
+        provider="em",
+        entity_ids=entity_ids,
+        start_timestamp="2023-01-01",
+        end_timestamp="2023-12-31",
+        adjust_type="qfq",
+        windows=[5, 10],
+    )
+    factor = CrossMaFactor(**kwargs)
+
+    queries = _count_calls(monkeypatch, Stock1dKdata, "query_data")
+    transforms = _count_calls(monkeypatch, MaTransformer, "transform")
+    with data_hub.sharing():
+        factor1 = CrossMaFactor(**kwargs)
+        factor2 = CrossMaFactor(**kwargs)
+
+    assert len(queries) == 1
+    assert factor1.data_key == factor2.data_key
+    # the result of the same transformer config is shared
+    assert len(transforms) == 1
+    assert factor2.pipe_df is not factor1.pipe_df
+    assert factor2.transformer.indicators == factor.transformer.indicators
+    pd.testing.assert_frame_equal(factor1.factor_df, factor.factor_df)
+    pd.testing.assert_frame_equal(factor2.factor_df, factor.factor_df)
+    pd.testing.assert_frame_equal(factor2.result_df, factor.result_df)
+
+    # the cache is cleared after leaving the scope
+    assert not data_hub.is_sharing()
+    assert not data_hub._data
+
+
+def test_share_columns(kdata):
+    with data_hub.sharing():
+        df1, key1 = data_hub.query_data(
+            Stock1dKdata, provider="em", columns=["entity_id", "timestamp", "close"], entity_ids=entity_ids
+        )
+        df2, key2 = data_hub.query_data(
+            Stock1dKdata, provider="em", columns=["entity_id", "timestamp", "volume"], entity_ids=entity_ids
+        )
+        df3, _ = data_hub.query_data(
+            Stock1dKdata, provider="em", columns=[Stock1dKdata.close], entity_ids=entity_ids[::-1]
+        )
+    assert key1 == key2
+    assert set(df1.columns) == {"entity_id", "timestamp", "close"}
+    assert set(df2.columns) == {"entity_id", "timestamp", "volume"}
+    assert list(df3.columns) == ["close"]
+    pd.testing.assert_series_equal(df1["close"], df3["close"])
+
+    # not shared out of the scope
+    _, key = data_hub.query_data(Stock1dKdata, provider="em", entity_ids=entity_ids)
+    assert key is None
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+
+from zvt.contract.api import df_to_db, del_data
+from zvt.domain import FinanceFactor
+from zvt.factors.fundamental.finance_factor import GoodCompanyFactor, period_threshold_filter
+
+entity_ids = ["stock_sz_999993", "stock_sz_999994"]
+
+report_periods = {3: "season1", 6: "half_year", 9: "season3", 12: "year"}
+
+
+def _finance_df() -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    report_dates = pd.date_range("2010-01-01", "2022-12-31", freq="QE")
+    dfs = []
+    for entity_id in entity_ids:
+        df = pd.DataFrame({"report_date": report_dates, "timestamp": report_dates})
+        df["entity_id"] = entity_id
+        df["code"] = entity_id[-6:]
+        df["id"] = entity_id + "_" + df["report_date"].dt.strftime("%Y-%m-%d")
+        df["report_period"] = df["report_date"].dt.month.map(report_periods)
+        mul = df["report_date"].dt.month // 3
+        # around the threshold of the period
+        df["roe"] = 0.02 * mul * rng.uniform(0.5, 1.5, len(df))
+        df["current_ratio"] = rng.uniform(0.5, 1.5, len(df))
+        df.loc[3, "roe"] = np.nan
+        dfs.append(df)
+    return pd.concat(dfs, ignore_index=True)
+
+
+def _row_filter(df, col_period_threshold):
+    se = pd.Series(index=df.index, dtype=bool)
+    for index, row in df.iterrows():
+        mul = {"year": 4, "season3": 3, "half_year": 2}.get(row.report_period, 1)
+        se[index] = all(getattr(row, col) >= mul * threshold for col, threshold in col_period_threshold.items())
+    return se
+
+
+def test_period_threshold_filter():
+    df = _finance_df()
+    col_period_threshold = {"roe": 0.02, "current_ratio": 1}
+    passed = period_threshold_filter(df, col_period_threshold)
+    pd.testing.assert_series_equal(passed, _row_filter(df, col_period_threshold))
+    assert 0 < passed.sum() < len(df)
+
+
+def test_good_company_factor():
+    filters = [FinanceFactor.entity_id.in_(entity_ids)]
+    del_data(FinanceFactor, filters=filters, provider="eastmoney")
+    df = _finance_df()
+    df_to_db(df=df, data_schema=FinanceFactor, provider="eastmoney")
+
+    factor = GoodCompanyFactor(
+        entity_ids=entity_ids,
+        provider="eastmoney",
+        columns=[FinanceFactor.roe, FinanceFactor.report_period],
+        filters=None,
+        start_timestamp="2010-01-01",
+        end_timestamp="2022-12-31",
+        keep_all_timestamp=False,
+        count=8,
+    )
+
+    # count the passed reports in the last 1095 days
+    df["passed"] = _row_filter(df, {"roe": 0.02}).astype(float)
+    expected = {}
+    for entity_id, entity_df in df.groupby("entity_id"):
+        for _, row in entity_df.iterrows():
+            in_window = (entity_df["timestamp"] > row.timestamp - pd.Timedelta("1095d")) & (
+                entity_df["timestamp"] <= row.timestamp
+            )
+            expected[(entity_id, row.timestamp)] = entity_df.loc[in_window, "passed"].sum()
+
+    counts = factor.factor_df["count"]
+    assert len(counts) == len(expected)
+    for key, value in expected.items():
+        assert counts.loc[key] == value
+    assert (factor.result_df["filter_score"] == (counts >= 8)).all()
+    assert factor.result_df["filter_score"].any()
+
+    del_data(FinanceFactor, filters=filters, provider="eastmoney")
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from zvt.factors.algorithm import ma, ema, macd
+from zvt.factors.online import OnlineSma, OnlineEma, OnlineMacd, OnlineMacdAccumulator, OnlineMaAccumulator
+from zvt.factors.technical_factor import TechnicalFactor
+
+entity_ids = [f"stock_sz_99995{i}" for i in range(1, 4)]
+timestamps = pd.date_range("2023-01-01", periods=60)
+
+
+def _to_series(values) -> pd.Series:
+    return pd.Series([np.nan if value is None else value for value in values], dtype=float)
+
+
+def test_online_indicators():
+    s = pd.Series(10 + np.sin(np.arange(100) / 3) + np.random.rand(100))
+
+    online_sma = OnlineSma(window=5)
+    pd.testing.assert_series_equal(_to_series([online_sma.update(x) for x in s]), ma(s, window=5))
+
+    online_ema = OnlineEma(window=12)
+    pd.testing.assert_series_equal(_to_series([online_ema.update(x) for x in s]), ema(s, window=12))
+
+    # the NaN only affects the windows including it
+    nan_s = s.copy()
+    nan_s[[20, 50, 51]] = np.nan
+    online_sma = OnlineSma(window=5)
+    pd.testing.assert_series_equal(_to_series([online_sma.update(x) for x in nan_s]), ma(nan_s, window=5))
+
+    expected = macd(s, count_live_dead=True)
+    online_macd = OnlineMacd()
+    values = []
+    for x in s:
+        diff, dea, m = online_macd.update(x)
+        values.append((diff, dea, m, online_macd.live_count))
+    df = pd.DataFrame(values, columns=["diff", "dea", "macd", "live_count"], dtype=float)
+    pd.testing.assert_frame_equal(df, expected[["diff", "dea", "macd", "live_count"]].astype(float))
+
+
+def test_online_indicator_state():
+    s = pd.Series(np.random.rand(50))
+    online_macd = OnlineMacd()
+    for x in s[:30]:
+        online_macd.update(x)
+    restored = OnlineMacd()
+    restored.set_state(online_macd.get_state())
+    for x in s[30:]:
+        assert restored.update(x) == online_macd.update(x)
+
+    online_sma = OnlineSma(window=5)
+    for x in s[:32]:
+        online_sma.update(x)
+    restored = OnlineSma(window=5)
+    restored.set_state(online_sma.get_state())
+    for x in s[32:]:
+        assert restored.update(x) == pytest.approx(online_sma.update(x))
+
+
+def _factor(accumulator, end_timestamp, online):
+    return TechnicalFactor(
+        provider="em",
+        entity_ids=entity_ids,
+        start_timestamp=timestamps[0],
+        end_timestamp=end_timestamp,
+        adjust_type="qfq",
+        accumulator=accumulator,
+        online=online,
+    )
+
+
+def test_online_factor(stock_kdata, monkeypatch):
+    stock_kdata(entity_ids, timestamps, volume=1e6 * (1 + np.cos(np.arange(len(timestamps)))))
+
+    for accumulator in (OnlineMacdAccumulator(), OnlineMaAccumulator(windows=[5, 10], vol_windows=[10])):
+        factor = _factor(accumulator, end_timestamp=timestamps[-1], online=False)
+        online_factor = _factor(accumulator, end_timestamp=timestamps[49], online=True)
+
+        new_rows = []
+        acc_new = accumulator.acc_new
+
+        def count_acc_new(entity_id, df, state):
+            new_rows.append(len(df))
+            return acc_new(entity_id=entity_id, df=df, state=state)
+
+        monkeypatch.setattr(accumulator, "acc_new", count_acc_new)
+        online_factor.move_on(to_timestamp=timestamps[-1], timeout=0)
+        monkeypatch.undo()
+
+        # only the new bars are computed
+        assert new_rows == [10] * len(entity_ids)
+        pd.testing.assert_frame_equal(online_factor.factor_df, factor.factor_df[online_factor.factor_df.columns])
+        assert online_factor.states == factor.states
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+import pytest
+
+from zvt.contract.factor import shutdown_factor_executor
+
+from zvt.factors.algorithm import MacdTransformer
+from zvt.factors.ma.ma_stats_factor import MaStatsAccumulator
+from zvt.factors.technical_factor import TechnicalFactor
+
+entity_ids = [f"stock_sz_99994{i}" for i in range(1, 6)]
+
+
+def _compute(workers):
+    return TechnicalFactor(
+        provider="em",
+        entity_ids=entity_ids,
+        start_timestamp="2023-01-01",
+        end_timestamp="2023-12-31",
+        adjust_type="qfq",
+        transformer=MacdTransformer(),
+        accumulator=MaStatsAccumulator(windows=[5, 10], vol_windows=[10]),
+        workers=workers,
+    )
+
+
+def test_parallel_factor(stock_kdata):
+    stock_kdata(entity_ids, pd.date_range("2023-01-01", periods=60), turnover=lambda i, prices: 1e8 * (i + 1))
+    factor = _compute(workers=None)
+    parallel_factor = _compute(workers=2)
+
+    pd.testing.assert_frame_equal(parallel_factor.factor_df, factor.factor_df)
+    assert parallel_factor.states.keys() == factor.states.keys()
+    assert parallel_factor.transformer.indicators == ["diff", "dea", "macd"]
+    assert set(parallel_factor.accumulator.indicators) == set(factor.accumulator.indicators)
+
+    #: the intermediate result of the transformer is merged back too
+    assert parallel_factor.pipe_df is not None
+    assert "macd" in parallel_factor.pipe_df.columns
+
+
+def test_parallel_factor_recompute(stock_kdata, monkeypatch):
+    stock_kdata(entity_ids, pd.date_range("2023-01-01", periods=60))
+    factor = _compute(workers=2)
+    #: the pool is shared by the factors
+    executor = factor.get_executor()
+    assert _compute(workers=2).get_executor() is executor
+    #: the state of the entity not in the data of this round
+    factor.states["stock_sz_999949"] = {"current_count": 1}
+
+    #: recompute all in the pool
+    factor.process_min_rows = 0
+    factor.compute_factor()
+
+    assert factor.get_executor() is executor
+    assert factor.states["stock_sz_999949"] == {"current_count": 1}
+    assert set(entity_ids) <= set(factor.states.keys())
+
+    #: the small update is computed in the current process
+    factor.process_min_rows = 10
+    assert factor.is_small_update()
+    monkeypatch.setattr(factor, "compute_factor_in_processes", lambda entity_ids: pytest.fail("not small update"))
+    factor.compute_factor()
+    shutdown_factor_executor()
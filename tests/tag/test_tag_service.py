@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from zvt.contract.api import del_data, DBSession
+from zvt.tag.common import InsertMode
+from zvt.tag.tag_models import CreateStockPoolsModel
+from zvt.tag.tag_schemas import StockTags, SubTagInfo, HiddenTagInfo, StockPools, StockPoolMember
+from zvt.tag.tag_service import (
+    bulk_build_stock_tags,
+    build_stock_pool,
+    delete_stock_pool,
+    get_stock_pool_entity_ids,
+    get_entity_stock_pools,
+    diff_stock_pool,
+)
+from zvt.utils.time_utils import now_pd_timestamp, to_pd_timestamp
+
+
+def test_bulk_build_stock_tags():
+    entity_ids = ["stock_sz_999971", "stock_sz_999972"]
+    del_data(StockTags, filters=[StockTags.entity_id.in_(entity_ids)], provider="zvt")
+    del_data(SubTagInfo, provider="zvt", filters=[SubTagInfo.tag == "测试子标签"])
+    del_data(HiddenTagInfo, provider="zvt", filters=[HiddenTagInfo.tag == "测试隐藏标签"])
+
+    tags_df = pd.DataFrame(
+        {
+            "entity_id": ["stock_sz_999971", "stock_sz_999972"],
+            "main_tag": ["汽车", "金融"],
+            "main_tag_reason": ["来自行业:汽车零部件", "来自行业:银行"],
+        }
+    )
+    stock_tags_list = bulk_build_stock_tags(tags_df=tags_df, timestamp=now_pd_timestamp(), set_by_user=False)
+    assert [item.entity_id for item in stock_tags_list] == ["stock_sz_999971", "stock_sz_999972"]
+    assert stock_tags_list[0].id == "stock_sz_999971_tags"
+    assert stock_tags_list[0].entity_type == "stock"
+    assert stock_tags_list[0].main_tags == {"汽车": "来自行业:汽车零部件"}
+
+    tags_df = pd.DataFrame(
+        {
+            "entity_id": ["stock_sz_999971"],
+            "main_tag": ["新能源"],
+            "main_tag_reason": ["来自概念:测试子标签"],
+            "sub_tag": ["测试子标签"],
+            "sub_tag_reason": ["来自概念:测试子标签"],
+            "active_hidden_tags": [{"测试隐藏标签": "reason"}],
+        }
+    )
+    stock_tags = bulk_build_stock_tags(tags_df=tags_df, timestamp=now_pd_timestamp(), set_by_user=True)[0]
+    assert stock_tags.main_tag == "新能源"
+    # the history is merged
+    assert stock_tags.main_tags == {"汽车": "来自行业:汽车零部件", "新能源": "来自概念:测试子标签"}
+    assert stock_tags.sub_tags == {"测试子标签": "来自概念:测试子标签"}
+    assert stock_tags.active_hidden_tags == {"测试隐藏标签": "reason"}
+    assert stock_tags.set_by_user
+
+    # the missing tag infos are created
+    assert SubTagInfo.query_data(filters=[SubTagInfo.tag == "测试子标签"], return_type="domain")
+    assert HiddenTagInfo.query_data(filters=[HiddenTagInfo.tag == "测试隐藏标签"], return_type="domain")
+
+    # keep current
+    tags_df = pd.DataFrame({"entity_id": ["stock_sz_999972"], "main_tag": ["银行"], "main_tag_reason": ["reason"]})
+    stock_tags = bulk_build_stock_tags(
+        tags_df=tags_df, timestamp=now_pd_timestamp(), set_by_user=False, keep_current=True
+    )[0]
+    assert stock_tags.main_tag == "金融"
+    assert stock_tags.main_tags == {"金融": "来自行业:银行", "银行": "reason"}
+
+    del_data(StockTags, filters=[StockTags.entity_id.in_(entity_ids)], provider="zvt")
+
+
+def test_stock_pool_members():
+    delete_stock_pool("测试股票池")
+    delete_stock_pool("测试股票池2")
+
+    build_stock_pool(
+        CreateStockPoolsModel(stock_pool_name="测试股票池", entity_ids=["stock_sz_000001", "stock_sz_000338"]),
+        target_date="2024-09-02",
+    )
+    build_stock_pool(
+        CreateStockPoolsModel(stock_pool_name="测试股票池", entity_ids=["stock_sz_000338", "stock_sh_600000"]),
+        target_date="2024-09-04",
+    )
+    build_stock_pool(
+        CreateStockPoolsModel(stock_pool_name="测试股票池2", entity_ids=["stock_sz_000001"]),
+        target_date="2024-09-03",
+    )
+
+    assert sorted(get_stock_pool_entity_ids("测试股票池")) == ["stock_sh_600000", "stock_sz_000338"]
+    assert sorted(get_stock_pool_entity_ids("测试股票池", target_date="2024-09-03")) == [
+        "stock_sz_000001",
+        "stock_sz_000338",
+    ]
+    assert get_stock_pool_entity_ids("测试股票池", target_date="2024-09-01") == []
+
+    assert sorted(get_entity_stock_pools("stock_sz_000001", target_date="2024-09-03")) == ["测试股票池", "测试股票池2"]
+    assert get_entity_stock_pools("stock_sz_000001", target_date="2024-09-02") == ["测试股票池"]
+    assert "测试股票池" not in get_entity_stock_pools("stock_sz_000001")
+
+    assert diff_stock_pool("测试股票池", pre_date="2024-09-02") == (["stock_sh_600000"], ["stock_sz_000001"])
+
+    # append to the snapshot
+    build_stock_pool(
+        CreateStockPoolsModel(
+            stock_pool_name="测试股票池", entity_ids=["stock_sz_000001"], insert_mode=InsertMode.append
+        ),
+        target_date="2024-09-04",
+    )
+    assert "测试股票池" in get_entity_stock_pools("stock_sz_000001")
+
+    # the empty snapshot
+    build_stock_pool(CreateStockPoolsModel(stock_pool_name="测试股票池", entity_ids=[]), target_date="2024-09-05")
+    assert get_stock_pool_entity_ids("测试股票池") == []
+    assert get_entity_stock_pools("stock_sz_000338", target_date="2024-09-05") == []
+    assert "测试股票池" in get_entity_stock_pools("stock_sz_000338", target_date="2024-09-04")
+    assert diff_stock_pool("测试股票池", pre_date="2024-09-04") == (
+        [],
+        ["stock_sh_600000", "stock_sz_000001", "stock_sz_000338"],
+    )
+
+    delete_stock_pool("测试股票池")
+    assert get_stock_pool_entity_ids("测试股票池") == []
+
+
+def test_stock_pool_members_backfill():
+    delete_stock_pool("测试旧股票池")
+
+    # the pools created before the membership table
+    build_stock_pool(
+        CreateStockPoolsModel(stock_pool_name="测试旧股票池", entity_ids=["stock_sz_000001", "stock_sz_000338"]),
+        target_date="2024-09-02",
+    )
+    del_data(StockPoolMember, filters=[StockPoolMember.stock_pool_name == "测试旧股票池"])
+    with DBSession(provider="zvt", data_schema=StockPools)() as session:
+        session.add(
+            StockPools(
+                id="stockhk_测试旧股票池_2024-09-03",
+                entity_id="stockhk_测试旧股票池",
+                timestamp=to_pd_timestamp("2024-09-03"),
+                entity_type="stockhk",
+                stock_pool_name="测试旧股票池",
+                entity_ids=["stockhk_hk_00700"],
+            )
+        )
+        session.commit()
+
+    assert sorted(get_stock_pool_entity_ids("测试旧股票池")) == ["stock_sz_000001", "stock_sz_000338"]
+    assert get_stock_pool_entity_ids("测试旧股票池", entity_type="stockhk") == ["stockhk_hk_00700"]
+    assert get_entity_stock_pools("stockhk_hk_00700") == ["测试旧股票池"]
+
+    delete_stock_pool("测试旧股票池")
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from zvt.contract.api import del_data, df_to_db
+from zvt.domain import Stock1dKdata
+from zvt.tag.tag_models import CreateStockPoolsModel
+from zvt.tag.tag_schemas import TagStats, StockTags
+from zvt.tag.tag_service import build_stock_pool, delete_stock_pool, bulk_build_stock_tags
+from zvt.tag.tag_stats import cal_main_line_continuous_days, build_stock_pool_tag_stats
+
+
+def test_cal_main_line_continuous_days():
+    timestamps = pd.to_datetime(["2024-09-02", "2024-09-03", "2024-09-04", "2024-09-05"])
+    df = pd.DataFrame(
+        {
+            "timestamp": timestamps.repeat(2),
+            "main_tag": ["a", "b"] * 4,
+            "is_main_line": [True, False, True, True, False, True, True, True],
+        }
+    )
+    assert cal_main_line_continuous_days(df).tolist() == [1, 0, 2, 1, 0, 2, 1, 3]
+
+    # continue from the previous day, tag c disappears
+    pre_df = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2024-09-01"] * 3),
+            "main_tag": ["a", "b", "c"],
+            "main_line_continuous_days": [3, 0, 2],
+        }
+    )
+    df = df[df["main_tag"] != "b"].reset_index(drop=True)
+    assert cal_main_line_continuous_days(df, pre_df=pre_df).tolist() == [4, 5, 0, 1]
+
+
+def test_build_stock_pool_tag_stats():
+    stock_pool_name = "测试统计池"
+    entity_ids = ["stock_sz_990001", "stock_sz_990002", "stock_sz_990003"]
+    delete_stock_pool(stock_pool_name)
+    del_data(TagStats, provider="zvt", filters=[TagStats.stock_pool_name == stock_pool_name])
+    del_data(StockTags, provider="zvt", filters=[StockTags.entity_id.in_(entity_ids)])
+    del_data(Stock1dKdata, provider="em", filters=[Stock1dKdata.entity_id.in_(entity_ids)])
+
+    bulk_build_stock_tags(
+        tags_df=pd.DataFrame({"entity_id": entity_ids, "main_tag": ["x", "y", "y"], "main_tag_reason": "test"}),
+        timestamp=pd.Timestamp("2024-09-01"),
+        set_by_user=False,
+    )
+    dates = ["2024-09-02", "2024-09-03"]
+    kdata_df = pd.DataFrame(
+        {
+            "entity_id": entity_ids * 2,
+            "timestamp": pd.to_datetime(dates).repeat(3),
+            "turnover": [300.0, 100.0, 100.0, 100.0, 200.0, 200.0],
+        }
+    )
+    kdata_df["id"] = kdata_df["entity_id"] + "_" + kdata_df["timestamp"].dt.strftime("%Y-%m-%d")
+    df_to_db(df=kdata_df, data_schema=Stock1dKdata, provider="em", force_update=True)
+    for target_date in dates:
+        build_stock_pool(CreateStockPoolsModel(stock_pool_name=stock_pool_name, entity_ids=entity_ids), target_date)
+
+    df = build_stock_pool_tag_stats(stock_pool_name=stock_pool_name)
+    assert df["main_tag"].tolist() == ["x", "y", "y", "x"]
+    assert df["turnover"].tolist() == [300.0, 200.0, 400.0, 100.0]
+    assert df["entity_count"].tolist() == [1, 2, 2, 1]
+    assert df["position"].tolist() == [0, 1, 0, 1]
+    assert df["main_line_continuous_days"].tolist() == [1, 1, 2, 2]
+
+    # incremental from the latest stats
+    build_stock_pool(CreateStockPoolsModel(stock_pool_name=stock_pool_name, entity_ids=entity_ids[:1]), "2024-09-04")
+    df = build_stock_pool_tag_stats(stock_pool_name=stock_pool_name)
+    assert df["main_tag"].tolist() == ["x"]
+    assert df["main_line_continuous_days"].tolist() == [3]
+    assert len(TagStats.query_data(provider="zvt", filters=[TagStats.stock_pool_name == stock_pool_name])) == 5
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+import pandas as pd
+
+from zvt.contract import IntervalLevel, AdjustType
+from zvt.trader import StockTrader
+from zvt.trader.checkpoint import load_checkpoint
+from zvt.trader.trader_info_api import clear_trader
+from zvt.trader.trader_schemas import AccountStats
+from zvt.utils.time_utils import is_same_date
+
+entity_ids = ["stock_sz_999996"]
+buy_timestamp = "2023-01-17"
+sell_timestamp = "2023-02-01"
+
+
+class CheckpointTrader(StockTrader):
+    def on_time(self, timestamp):
+        if is_same_date(buy_timestamp, timestamp):
+            self.buy(timestamp=timestamp, entity_ids=entity_ids)
+        if is_same_date(sell_timestamp, timestamp):
+            self.sell(timestamp=timestamp, entity_ids=entity_ids)
+
+    def long_position_control(self):
+        return 1
+
+
+def _trader(trader_name, end_timestamp, **kwargs):
+    return CheckpointTrader(
+        entity_ids=entity_ids,
+        provider="em",
+        level=IntervalLevel.LEVEL_1DAY,
+        start_timestamp="2023-01-02",
+        end_timestamp=end_timestamp,
+        trader_name=trader_name,
+        draw_result=False,
+        adjust_type=AdjustType.qfq,
+        **kwargs,
+    )
+
+
+def _account_history(trader_name):
+    df = AccountStats.query_data(
+        filters=[AccountStats.trader_name == trader_name],
+        columns=[AccountStats.timestamp, AccountStats.cash, AccountStats.all_value],
+        order=AccountStats.timestamp.asc(),
+    )
+    return df.reset_index(drop=True)
+
+
+def test_resume_from_checkpoint(stock_kdata, tmp_path):
+    timestamps = pd.date_range("2023-01-02", "2023-02-28", freq="B")
+    stock_kdata(entity_ids, timestamps, prices=lambda i: 10 + 0.1 * np.arange(len(timestamps)))
+    checkpoint_path = os.path.join(tmp_path, "trader.json.gz")
+    try:
+        full_trader = _trader("checkpoint_full_trader", "2023-02-28")
+        full_trader.run()
+
+        # interrupted after 2023-01-20, the last checkpoint is at the 12th trading close 2023-01-17
+        _trader("checkpoint_resume_trader", "2023-01-20", checkpoint_interval=4, checkpoint_path=checkpoint_path).run()
+        checkpoint = load_checkpoint(checkpoint_path)
+        assert checkpoint["timestamp"] == "2023-01-17T00:00:00"
+        assert [signal["entity_id"] for signal in checkpoint["trading_signals"]] == entity_ids
+
+        resumed_trader = _trader(
+            "checkpoint_resume_trader",
+            "2023-02-28",
+            checkpoint_interval=4,
+            checkpoint_path=checkpoint_path,
+            resume=True,
+        )
+        assert resumed_trader.resume_timestamp == pd.Timestamp("2023-01-17")
+        resumed_trader.run()
+
+        full_history = _account_history("checkpoint_full_trader")
+        resumed_history = _account_history("checkpoint_resume_trader")
+        pd.testing.assert_frame_equal(full_history, resumed_history)
+        assert full_history["all_value"].iloc[-1] != full_history["all_value"].iloc[0]
+    finally:
+        clear_trader("checkpoint_full_trader")
+        clear_trader("checkpoint_resume_trader")
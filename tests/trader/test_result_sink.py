@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from zvt.contract import IntervalLevel, AdjustType
+from zvt.trader import StockTrader
+from zvt.trader.result_sink import is_parquet_available, has_parquet_results
+from zvt.trader.trader_info_api import clear_trader, get_trader_results, AccountStatsReader
+from zvt.trader.trader_schemas import AccountStats, Order, Position
+from zvt.utils.pd_utils import pd_is_not_null
+from zvt.utils.time_utils import is_same_date
+
+entity_ids = ["stock_sz_999997", "stock_sz_999998"]
+
+
+class SinkTrader(StockTrader):
+    def on_time(self, timestamp):
+        if is_same_date("2023-01-10", timestamp):
+            self.buy(timestamp=timestamp, entity_ids=entity_ids)
+        if is_same_date("2023-02-01", timestamp):
+            self.sell(timestamp=timestamp, entity_ids=entity_ids[:1])
+
+    def long_position_control(self):
+        return 1
+
+
+def _run(trader_name, end_timestamp="2023-02-28", **kwargs):
+    trader = SinkTrader(
+        entity_ids=entity_ids,
+        provider="em",
+        level=IntervalLevel.LEVEL_1DAY,
+        start_timestamp="2023-01-02",
+        end_timestamp=end_timestamp,
+        trader_name=trader_name,
+        draw_result=False,
+        adjust_type=AdjustType.qfq,
+        **kwargs,
+    )
+    trader.run()
+    return trader
+
+
+def _results(data_schema, trader_name):
+    df = get_trader_results(data_schema, trader_names=[trader_name])
+    cols = {
+        AccountStats: ["timestamp", "cash", "value", "all_value", "profit"],
+        Position: ["timestamp", "entity_id", "long_amount", "value"],
+        Order: ["timestamp", "entity_id", "order_type", "order_amount"],
+    }[data_schema]
+    return df[cols].sort_values(cols[:2]).reset_index(drop=True)
+
+
+def _assert_same_results(trader_name, expected_trader_name):
+    for data_schema in (AccountStats, Position, Order):
+        pd.testing.assert_frame_equal(_results(data_schema, trader_name), _results(data_schema, expected_trader_name))
+
+
+@pytest.fixture(scope="module")
+def kdata(stock_kdata):
+    timestamps = pd.date_range("2023-01-02", "2023-02-28", freq="B")
+    stock_kdata(entity_ids, timestamps, prices=lambda i: 10 + (0.1 + i * 0.05) * np.arange(len(timestamps)))
+    _run("sink_orm_trader")
+    yield
+    clear_trader("sink_orm_trader")
+
+
+def test_db_sink(kdata, tmp_path):
+    try:
+        _run("sink_db_trader", result_sink_type="db")
+        _assert_same_results("sink_db_trader", "sink_orm_trader")
+        reader = AccountStatsReader(trader_names=["sink_db_trader", "sink_orm_trader"])
+        assert len(reader.data_df) == 2 * len(_results(AccountStats, "sink_orm_trader"))
+
+        # flushed at the checkpoint and resumed
+        checkpoint_path = os.path.join(tmp_path, "trader.json.gz")
+        _run(
+            "sink_db_trader",
+            "2023-01-20",
+            result_sink_type="db",
+            checkpoint_interval=4,
+            checkpoint_path=checkpoint_path,
+        )
+        _run(
+            "sink_db_trader",
+            result_sink_type="db",
+            checkpoint_interval=4,
+            checkpoint_path=checkpoint_path,
+            resume=True,
+        )
+        _assert_same_results("sink_db_trader", "sink_orm_trader")
+    finally:
+        clear_trader("sink_db_trader")
+
+
+@pytest.mark.skipif(not is_parquet_available(), reason="pyarrow is not installed")
+def test_parquet_sink(kdata):
+    try:
+        _run("sink_parquet_trader", result_sink_type="parquet")
+        assert has_parquet_results("sink_parquet_trader")
+        assert not pd_is_not_null(AccountStats.query_data(filters=[AccountStats.trader_name == "sink_parquet_trader"]))
+        _assert_same_results("sink_parquet_trader", "sink_orm_trader")
+        reader = AccountStatsReader(trader_names=["sink_parquet_trader"])
+        assert reader.data_df["all_value"].tolist() == _results(AccountStats, "sink_orm_trader")["all_value"].tolist()
+    finally:
+        clear_trader("sink_parquet_trader")
+    assert not has_parquet_results("sink_parquet_trader")
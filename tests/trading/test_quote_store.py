@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from zvt.contract.api import del_data, get_db_session
+from zvt.contract.data_event import DataEvent, DataTopic
+from zvt.tag.tag_schemas import StockTags
+from zvt.trading.quote_store import QuoteSnapshotStore
+
+#: the fake entities
+entity_ids = ["stock_sz_999961", "stock_sz_999962", "stock_sh_999963"]
+
+
+def _save_tags(main_tags):
+    session = get_db_session(provider="zvt", data_schema=StockTags)
+    for entity_id, main_tag, sub_tag, active_hidden_tags in zip(
+        entity_ids[:2], main_tags, ["发动机", "银行"], [{"国企": "reason"}, None]
+    ):
+        session.merge(
+            StockTags(
+                id=entity_id,
+                entity_id=entity_id,
+                entity_type="stock",
+                timestamp=pd.Timestamp("2024-09-02"),
+                main_tag=main_tag,
+                sub_tag=sub_tag,
+                active_hidden_tags=active_hidden_tags,
+            )
+        )
+    session.commit()
+
+
+def test_quote_store():
+    del_data(StockTags, filters=[StockTags.entity_id.in_(entity_ids)], provider="zvt")
+    _save_tags(["汽车", "金融"])
+
+    store = QuoteSnapshotStore(min_check_interval=0)
+    quote_df = pd.DataFrame(
+        {
+            "entity_id": ["stock_sz_999961", "stock_sz_999962", "stock_sh_999963"],
+            "timestamp": pd.Timestamp("2024-09-02 10:00"),
+            "price": [10.0, 11.0, 12.0],
+            "change_pct": [0.01, -0.02, 0.1],
+            "unknown": [1, 2, 3],
+        }
+    )
+    store.update(entity_type="stock", quote_df=quote_df)
+    df = store.get_quotes(entity_type="stock")
+    assert "unknown" not in df.columns
+    assert df.loc["stock_sz_999961", "main_tag"] == "汽车"
+    assert df.loc["stock_sz_999961", "hidden_tags"] == ["国企"]
+    assert pd.isna(df.loc["stock_sh_999963", "main_tag"])
+
+    # only the changed quotes
+    version = store.version
+    store.update(entity_type="stock", quote_df=quote_df.iloc[[0]].assign(price=10.5))
+    assert store.version == version + 1
+    df = store.get_quotes(entity_type="stock")
+    assert df["price"].tolist() == [11.0, 12.0, 10.5]
+
+    # tags change is picked up
+    _save_tags(["新能源", "金融"])
+    df = store.get_quotes(entity_type="stock")
+    assert df.loc["stock_sz_999961", "main_tag"] == "新能源"
+
+    del_data(StockTags, filters=[StockTags.entity_id.in_(entity_ids)], provider="zvt")
+
+
+def _quote_event(origin, df=None):
+    event = DataEvent("StockQuote", "qmt", pd.Timestamp("2024-09-02 10:00"), topic=DataTopic.quote, df=df)
+    event.origin = origin
+    return event
+
+
+def _has_fake_quotes(store):
+    df = store.get_quotes(entity_type="stock")
+    return df is not None and "stock_sz_999961" in df.index
+
+
+def test_quote_store_reload():
+    store = QuoteSnapshotStore(min_check_interval=0)
+    quote_df = pd.DataFrame(
+        {"entity_id": entity_ids, "timestamp": pd.Timestamp("2024-09-02 10:00"), "price": [10.0, 11.0, 12.0]}
+    )
+    peer, other_peer = object(), object()
+
+    store.on_data_event(_quote_event(peer, df=quote_df))
+    assert _has_fake_quotes(store)
+    # the quotes of other peer are kept
+    store.on_peer_disconnected(other_peer)
+    assert _has_fake_quotes(store)
+    # the deltas would be missed, reload the db
+    store.on_peer_disconnected(peer)
+    assert not _has_fake_quotes(store)
+
+    # fed by the writer in this process
+    store.update(entity_type="stock", quote_df=quote_df)
+    store.on_peer_disconnected(peer)
+    assert _has_fake_quotes(store)
+    # the history quotes cleared by the writer
+    store.on_data_event(_quote_event(peer))
+    assert not _has_fake_quotes(store)
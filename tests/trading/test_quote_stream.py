@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import pandas as pd
+
+from zvt.trading.quote_store import quote_store
+from zvt.trading.quote_stream import QuoteStreamHub, diff_quotes, to_json_text
+from zvt.trading.trading_models import QueryStockQuoteModel
+
+
+def test_diff_quotes():
+    pre_df = pd.DataFrame({"price": [1.0, 2.0, None]}, index=["a", "b", "c"])
+    df = pd.DataFrame({"price": [1.0, 2.5, None, 4.0]}, index=["a", "b", "c", "d"])
+    changed_df, removed = diff_quotes(pre_df, df)
+    assert changed_df.index.tolist() == ["b", "d"]
+    assert removed == []
+
+    changed_df, removed = diff_quotes(df, pre_df.iloc[:2])
+    assert changed_df.index.tolist() == ["b"]
+    assert removed == ["c", "d"]
+
+
+def test_quote_stream_hub():
+    entity_ids = ["stock_sz_300001", "stock_sz_300002", "stock_sz_300003"]
+    quote_df = pd.DataFrame(
+        {
+            "entity_id": entity_ids,
+            "timestamp": pd.Timestamp("2024-09-02 10:00"),
+            "price": [10.0, 11.0, 12.0],
+            "change_pct": [0.01, -0.02, 0.1],
+            "turnover": [100.0, 200.0, 300.0],
+            "is_limit_up": [False, False, True],
+            "is_limit_down": [False, False, False],
+        }
+    )
+    quote_store.update(entity_type="stock", quote_df=quote_df)
+
+    hub = QuoteStreamHub()
+    key = hub.subscribe(websocket="client1", subscription=QueryStockQuoteModel(entity_ids=entity_ids, limit=2))
+    # same subscription share the key
+    assert hub.subscribe(websocket="client2", subscription=QueryStockQuoteModel(entity_ids=entity_ids, limit=2)) == key
+
+    snapshot = hub.build_snapshot(key)
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["entity_ids"] == ["stock_sz_300003", "stock_sz_300001"]
+    assert snapshot["stats"]["limit_up_count"] == 1
+    assert to_json_text(snapshot)
+
+    hub.build_messages(force=True)
+    # nothing changed
+    assert hub.build_messages() == {}
+
+    quote_store.update(entity_type="stock", quote_df=quote_df.iloc[[1]].assign(change_pct=0.2))
+    message = hub.build_messages()[key]
+    assert message["type"] == "diff"
+    assert message["entity_ids"] == ["stock_sz_300002", "stock_sz_300003"]
+    assert [quote["entity_id"] for quote in message["quotes"]] == ["stock_sz_300002"]
+    assert message["removed"] == ["stock_sz_300001"]
+
+    hub.unsubscribe("client1")
+    hub.unsubscribe("client2")
+    assert hub.subscriptions == {}
+
+
+def test_quote_stream_entity_types():
+    entity_ids = ["stock_sz_300001", "stock_sz_300002"]
+    hk_entity_ids = ["stockhk_hk_09991", "stockhk_hk_09992"]
+    quote_df = pd.DataFrame(
+        {
+            "entity_id": entity_ids + hk_entity_ids,
+            "timestamp": pd.Timestamp("2024-09-02 10:00"),
+            "price": [10.0, 11.0, 12.0, 13.0],
+            "change_pct": [0.01, -0.02, 0.1, 0.03],
+            "turnover": [100.0, 200.0, 300.0, 400.0],
+            "is_limit_up": False,
+            "is_limit_down": False,
+        }
+    )
+    quote_store.update(entity_type="stock", quote_df=quote_df.iloc[:2])
+    quote_store.update(entity_type="stockhk", quote_df=quote_df.iloc[2:])
+
+    hub = QuoteStreamHub()
+    key = hub.subscribe(websocket="client1", subscription=QueryStockQuoteModel(entity_ids=entity_ids))
+    hk_key = hub.subscribe(websocket="client2", subscription=QueryStockQuoteModel(entity_ids=hk_entity_ids))
+    assert hub.build_messages(force=True).keys() == {key, hk_key}
+
+    # only the subscriptions of the changed entity type
+    quote_store.update(entity_type="stockhk", quote_df=quote_df.iloc[[2]].assign(change_pct=0.2))
+    messages = hub.build_messages()
+    assert messages.keys() == {hk_key}
+    assert [quote["entity_id"] for quote in messages[hk_key]["quotes"]] == ["stockhk_hk_09991"]
+    assert messages[hk_key]["version"] == quote_store.versions["stockhk"]
+    assert hub.build_messages() == {}
+
+    hub.unsubscribe("client1")
+    hub.unsubscribe("client2")
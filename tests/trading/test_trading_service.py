@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+import zvt.trading.trading_service as trading_service
+from zvt.trading.quote_store import quote_store
+from zvt.trading.trading_models import QueryStockQuoteModel, QueryTagQuoteModel
+
+
+def test_no_quotes(monkeypatch):
+    monkeypatch.setattr(quote_store, "get_quotes", lambda entity_type="stock": None)
+    monkeypatch.setattr(quote_store, "get_pool_entity_ids", lambda stock_pool_name, entity_type="stock": None)
+
+    assert trading_service.query_quote_stats() is None
+    assert trading_service.cal_tag_quote_stats(stock_pool_name="all") is None
+    assert trading_service.query_tag_quotes(QueryTagQuoteModel(stock_pool_name="all", main_tags=[])) == []
+    assert trading_service.query_stock_quotes(QueryStockQuoteModel(entity_ids=["stock_sz_000338"])) is None
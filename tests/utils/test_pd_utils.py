@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
 
-from zvt.utils.pd_utils import drop_continue_duplicate
+from zvt.utils.pd_utils import drop_continue_duplicate, compact_df, df_memory_usage, fill_asof
 
 
 def test_drop_continue_duplicate():
@@ -19,3 +19,62 @@ def test_drop_continue_duplicate():
 
     df2 = drop_continue_duplicate(s=df, col="B")
     assert df2["A"].tolist() == [1, 2, 4, 5]
+
+
+def test_compact_df():
+    df = pd.DataFrame(
+        {
+            "entity_id": ["stock_sz_000001", "stock_sz_000002"] * 50,
+            "name": [f"name{i}" for i in range(100)],
+            "close": [10.01 + i for i in range(100)],
+            "turnover_rate": [1.0 / 3 * (i + 1) for i in range(100)],
+            "volume": [1e9 + i for i in range(100)],
+            "count": list(range(100)),
+        }
+    )
+    memory = df_memory_usage(df)
+    origin_df = df
+    df = compact_df(df)
+    # the origin df is not changed
+    assert origin_df["entity_id"].dtype == object
+    assert origin_df["close"].dtype == "float64"
+    assert origin_df["count"].dtype == "int64"
+
+    assert df["entity_id"].dtype == "category"
+    # too many unique values
+    assert df["name"].dtype == object
+    assert df["close"].dtype == "float32"
+    assert df["turnover_rate"].dtype == "float32"
+    # not lossless enough
+    assert df["volume"].dtype == "float64"
+    assert df["count"].dtype == "int8"
+    assert df_memory_usage(df) < memory
+    assert df["entity_id"].tolist()[:2] == ["stock_sz_000001", "stock_sz_000002"]
+
+    df = compact_df(df, category_cols=["name"], float_atol=None)
+    assert df["name"].dtype == "category"
+    assert df["volume"].dtype == "float32"
+
+
+def test_fill_asof():
+    index = pd.MultiIndex.from_tuples(
+        [
+            ("stock_sz_000001", pd.Timestamp("2023-01-05")),
+            ("stock_sz_000001", pd.Timestamp("2023-03-31")),
+            ("stock_sz_000002", pd.Timestamp("2023-02-01")),
+            ("stock_sz_000002", pd.Timestamp("2023-02-10")),
+        ],
+        names=["entity_id", "timestamp"],
+    )
+    df = pd.DataFrame({"filter_result": [True, False, True, None], "score": [0.1, 0.2, None, 0.4]}, index=index)
+
+    # the dense way
+    calendar = pd.date_range("2023-01-01", "2023-04-30")
+    for limit in (None, 20):
+        dense_df = df.reindex(pd.MultiIndex.from_product([index.levels[0], calendar], names=index.names))
+        dense_df = dense_df.groupby(level=0).ffill(limit=limit).dropna(how="all")
+
+        timestamps = ["2023-01-01", "2023-01-05", "2023-01-24", "2023-01-26", "2023-02-15", "2023-04-30"]
+        result_df = fill_asof(df, timestamps, limit=limit)
+        expected = dense_df[dense_df.index.get_level_values(1).isin(pd.to_datetime(timestamps))]
+        pd.testing.assert_frame_equal(result_df, expected, check_dtype=False)